@@ -0,0 +1,428 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+import metrics
+from check_api import API_TARGET, DEFAULT_CONCURRENCY, iter_ndjson, resolve_link
+
+# Applies a file of fixes to the directory in bulk: the writes Review Mode makes
+# one click at a time, as a job that can be stopped and started again.
+#
+# A changeset has one change per line. Most are a person and the attributes to
+# give them, in the shape `prepareUpdateAttributes` (src/utils/pco.ts) produces:
+#
+#   {"id": "123", "attributes": {"last_name": "Smith",
+#                                "email_addresses": [{"address": "a@b.org", "location": "Home"}]}}
+#
+# and are written the way `updatePerson` writes them: the Person's own
+# attributes with a PATCH, then each contact record under the person,
+# read-before-write so an existing email is corrected rather than joined by a
+# second one. A change can also name one contact record directly:
+#
+#   {"id": "456", "person_id": "123", "type": "PhoneNumber", "attributes": {"number": "+15035550100"}}
+#
+# Changes to different people go out concurrently, up to --concurrency requests
+# at once; changes to one person stay in order. A 429 pauses every worker for
+# its Retry-After, as src/utils/api.ts does, and halves how many requests may be
+# in flight; that limit creeps back up as requests succeed, so a long run
+# settles at whatever rate the backend is actually granting.
+#
+# Every finished change is appended to a progress file beside the changeset. A
+# rerun skips what is already done, so an interrupted job picks up where it
+# stopped. Each step is safe to repeat: PATCHes set values rather than add to
+# them, and a contact write re-reads the collection before choosing PATCH or
+# POST, so a change cut off half way is simply sent again. That is also why a
+# POST is never resent by itself after a 5xx, a dropped connection or a
+# timeout: the server may have stored it, so the retry starts from the read.
+#
+# Nothing is written unless --apply is given, in keeping with setWriteAccess:
+# by default the job only prints what it would send. --sandbox goes further,
+# reading from the API so the PATCH-or-POST choices are real, but answering
+# every write locally the way public/sandbox-sw.js does in the browser.
+
+CONTACT_RESOURCES = {
+    "email_addresses": ("emails", "Email"),
+    "phone_numbers": ("phone_numbers", "PhoneNumber"),
+    "addresses": ("addresses", "Address"),
+}
+CONTACT_ENDPOINTS = {kind: endpoint for endpoint, kind in CONTACT_RESOURCES.values()}
+
+MAX_RETRIES = 3  # per request, for server errors and dropped connections
+MAX_THROTTLED = 8  # per request, for 429s; these cost time, not correctness
+PROGRESS_EVERY = 5.0  # seconds between progress lines
+
+
+class ChangeError(Exception):
+    """A change the backend refused; recorded and skipped, not retried."""
+
+
+class UnconfirmedWrite(ChangeError):
+    """
+    A POST that failed without a clear refusal: a 5xx, a dropped connection or
+    a timeout. The record may have been created all the same.
+    """
+
+
+def change_key(change):
+    """A change's identity in the progress file, independent of its line number."""
+    return hashlib.sha1(json.dumps(change, sort_keys=True).encode()).hexdigest()
+
+
+def split_attributes(attributes):
+    """(Person attributes, [(contact key, record)]), split as updatePerson splits them."""
+    person, contacts = {}, []
+    for key, value in attributes.items():
+        record = value[0] if isinstance(value, list) and value else None
+        if key in CONTACT_RESOURCES and record:
+            contacts.append((key, record))
+        else:
+            person[key] = value
+    return person, contacts
+
+
+def validate(change):
+    if not isinstance(change, dict) or not change.get("id") or not isinstance(change.get("attributes"), dict):
+        return "needs an id and an attributes object"
+    if "person_id" in change and change.get("type") not in CONTACT_ENDPOINTS:
+        return f"contact type must be one of {', '.join(sorted(CONTACT_ENDPOINTS))}"
+    return None
+
+
+def plan(change):
+    """The requests a change becomes, as (method, path, body); "WRITE" is a contact read-before-write."""
+    if "person_id" in change:
+        endpoint = CONTACT_ENDPOINTS[change["type"]]
+        path = f"/people/v2/people/{change['person_id']}/{endpoint}/{change['id']}"
+        return [("PATCH", path, {"data": {"type": change["type"], "id": change["id"],
+                                          "attributes": change["attributes"]}})]
+
+    person_id = change["id"]
+    person, contacts = split_attributes(change["attributes"])
+    steps = []
+    if person or not contacts:
+        steps.append(("PATCH", f"/people/v2/people/{person_id}",
+                      {"data": {"type": "Person", "id": person_id, "attributes": person}}))
+    for key, record in contacts:
+        endpoint, kind = CONTACT_RESOURCES[key]
+        steps.append(("WRITE", f"/people/v2/people/{person_id}/{endpoint}",
+                      {"data": {"type": kind, "attributes": record}}))
+    return steps
+
+
+class Throttle:
+    """
+    How many requests may be in flight, and when the next may start.
+
+    Additive increase, multiplicative decrease: a 429 halves the limit and holds
+    everyone until its Retry-After has passed; every `limit` successes in a row
+    raise it by one, back towards the ceiling.
+    """
+
+    def __init__(self, ceiling, rate=None):
+        self.ceiling = ceiling
+        self.limit = ceiling
+        self.interval = 1 / rate if rate else 0.0
+        self.in_flight = 0
+        self.streak = 0
+        self.resume_at = 0.0
+        self.next_start = 0.0
+        self.changed = asyncio.Condition()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self.changed:
+            while True:
+                wait = self.resume_at - loop.time()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self.changed.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < self.limit:
+                    break
+                await self.changed.wait()
+            self.in_flight += 1
+            start = max(loop.time(), self.next_start)
+            self.next_start = start + self.interval
+        # --rate spaces starts out; sleeping outside the lock lets others queue behind.
+        delay = start - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, retry_after=None):
+        loop = asyncio.get_running_loop()
+        async with self.changed:
+            self.in_flight -= 1
+            if retry_after is not None:
+                self.limit = max(1, self.limit // 2)
+                self.streak = 0
+                self.resume_at = max(self.resume_at, loop.time() + retry_after)
+            else:
+                self.streak += 1
+                if self.streak >= self.limit and self.limit < self.ceiling:
+                    self.limit += 1
+                    self.streak = 0
+            self.changed.notify_all()
+
+
+class Writer:
+    """Sends changes, sharing one connection pool and one throttle."""
+
+    def __init__(self, session, base, throttle, sandbox=False):
+        self.session = session
+        self.base = base
+        self.throttle = throttle
+        self.sandbox = sandbox
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.person_locks = {}
+
+    async def request(self, method, path, body=None):
+        if self.sandbox and method != "GET":
+            # What the sandbox service worker answers in the browser.
+            attributes = (body or {}).get("data", {}).get("attributes", {})
+            return {"data": {"id": path.rsplit("/", 1)[-1], "attributes": attributes}, "meta": {"sandbox": True}}
+
+        url = resolve_link(self.base, path)
+        failures = throttles = 0
+        while True:
+            await self.throttle.acquire()
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                async with self.session.request(method, url, json=body) as response:
+                    payload = await response.read()
+                    status = response.status
+                    if status == 429:
+                        header = response.headers.get("Retry-After", "")
+                        retry_after = int(header) if header.isdigit() else 2 ** throttles
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, payload, error = None, b"", e
+            finally:
+                self.requests += 1
+                await self.throttle.release(retry_after)
+            metrics.record_request(url, len(payload), time.perf_counter() - started, status)
+
+            if status == 429:
+                self.throttled += 1
+                throttles += 1
+                if throttles > MAX_THROTTLED:
+                    raise ChangeError(f"{method} {path}: still rate limited after {MAX_THROTTLED} waits")
+                continue
+            if status is None or status >= 500:
+                if method == "POST":
+                    # Sending it again could create a second record; the caller re-reads first.
+                    raise UnconfirmedWrite(f"{method} {path}: {status or error}")
+                failures += 1
+                if failures > MAX_RETRIES:
+                    raise ChangeError(f"{method} {path}: {status or error}")
+                self.retried += 1
+                await asyncio.sleep(2 ** (failures - 1))
+                continue
+            if status >= 400:
+                raise ChangeError(f"{method} {path}: {status} {_error_title(payload)}")
+            return json.loads(payload) if payload else {}
+
+    async def write_contact(self, collection, body):
+        """
+        PATCH the collection's first record, or POST one if there is none. A
+        POST whose outcome is unknown is retried from the read, so a record
+        the server did store is PATCHed rather than created twice.
+        """
+        failures = 0
+        while True:
+            existing = await self.request("GET", collection)
+            current = (existing.get("data") or [None])[0]
+            if current:
+                body = {"data": {**body["data"], "id": current["id"]}}
+                await self.request("PATCH", f"{collection}/{current['id']}", body)
+                return
+            try:
+                await self.request("POST", collection, body)
+                return
+            except UnconfirmedWrite:
+                failures += 1
+                if failures > MAX_RETRIES:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(2 ** (failures - 1))
+
+    async def apply(self, change):
+        person_id = change.get("person_id", change["id"])
+        lock = self.person_locks.setdefault(person_id, asyncio.Lock())
+        async with lock:
+            for method, path, body in plan(change):
+                if method == "WRITE":
+                    await self.write_contact(path, body)
+                else:
+                    await self.request(method, path, body)
+
+
+def _error_title(payload):
+    try:
+        errors = json.loads(payload).get("errors") or []
+        return errors[0].get("detail") or errors[0].get("title") or ""
+    except (ValueError, AttributeError, IndexError):
+        return payload[:200].decode(errors="replace")
+
+
+def progress_path(changeset, sandbox=False):
+    return changeset + (".sandbox-progress" if sandbox else ".progress")
+
+
+def load_progress(path):
+    """{change key: its latest record} from a progress file; a torn last line is ignored."""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                done[record["key"]] = record
+    return done
+
+
+async def run_changes(changeset, base, concurrency, rate, sandbox, retry_failed):
+    """Apply every outstanding change and return the run's counts."""
+    journal_path = progress_path(changeset, sandbox)
+    previous = load_progress(journal_path)
+    counts = {"done": 0, "failed": 0, "skipped": 0, "invalid": 0}
+    failures = []
+    queue = asyncio.Queue(maxsize=concurrency * 4)
+
+    credentials = f"{os.environ.get('VITE_PCO_APP_ID', 'test')}:{os.environ.get('VITE_PCO_SECRET', 'test')}"
+    headers = {"Authorization": "Basic " + base64.b64encode(credentials.encode()).decode()}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    started = time.perf_counter()
+    last_report = started
+
+    with open(journal_path, "a") as journal:
+        async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+            throttle = Throttle(concurrency, rate)
+            writer = Writer(session, base, throttle, sandbox)
+
+            def record(line, key, status, error=None):
+                nonlocal last_report
+                entry = {"key": key, "line": line, "status": status, "at": time.time()}
+                if error:
+                    entry["error"] = error
+                journal.write(json.dumps(entry) + "\n")
+                journal.flush()
+                counts[status] += 1
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_EVERY:
+                    last_report = now
+                    finished = counts["done"] + counts["failed"]
+                    print(f"  {finished:,} applied ({counts['failed']:,} failed), "
+                          f"{finished / (now - started):.1f}/s, {throttle.limit} in flight",
+                          file=sys.stderr)
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    line, key, change = item
+                    try:
+                        await writer.apply(change)
+                        record(line, key, "done")
+                    except ChangeError as e:
+                        failures.append((line, str(e)))
+                        record(line, key, "failed", str(e))
+
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            for line, change in enumerate(iter_ndjson(changeset), 1):
+                problem = validate(change)
+                if problem:
+                    counts["invalid"] += 1
+                    failures.append((line, problem))
+                    continue
+                key = change_key(change)
+                status = previous.get(key, {}).get("status")
+                if status == "done" or (status == "failed" and not retry_failed):
+                    counts["skipped"] += 1
+                    continue
+                await queue.put((line, key, change))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+    return {
+        **counts,
+        "requests": writer.requests,
+        "throttled": writer.throttled,
+        "retried": writer.retried,
+        "seconds": time.perf_counter() - started,
+        "progress": journal_path,
+        "failures": failures,
+    }
+
+
+def print_plan(changeset):
+    """The dry run: every request the outstanding changes would make."""
+    previous = load_progress(progress_path(changeset))
+    pending = skipped = 0
+    for line, change in enumerate(iter_ndjson(changeset), 1):
+        problem = validate(change)
+        if problem:
+            print(f"line {line}: {problem}")
+            continue
+        if previous.get(change_key(change), {}).get("status") == "done":
+            skipped += 1
+            continue
+        pending += 1
+        for method, path, body in plan(change):
+            if method == "WRITE":
+                method = "PATCH or POST"
+            print(f"{method} {path} {json.dumps(body['data']['attributes'])}")
+    print(f"\n{pending:,} change(s) to apply, {skipped:,} already done. Nothing was sent; "
+          f"rerun with --apply to write them, or --sandbox to rehearse against the API.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply a changeset of directory fixes in bulk.")
+    parser.add_argument("changeset", help="NDJSON file, one change per line")
+    parser.add_argument("--target", default=API_TARGET, help="API origin (default: $VITE_API_TARGET)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--apply", action="store_true", help="write the changes (default: print them)")
+    mode.add_argument("--sandbox", action="store_true",
+                      help="read from the API but answer writes locally; progress is kept separately")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="most requests in flight at once; 429s lower this for the rest of the run")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="most requests started per second (default: as many as the backend accepts)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="try changes the backend refused last time again")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not (args.apply or args.sandbox):
+        print_plan(args.changeset)
+        sys.exit(0)
+
+    with metrics.run("apply_changes", args):
+        result = asyncio.run(run_changes(args.changeset, args.target.rstrip("/"), max(args.concurrency, 1),
+                                         args.rate, args.sandbox, args.retry_failed))
+
+    print(f"{'Sandboxed' if args.sandbox else 'Applied'} {result['done']:,} change(s) in {result['seconds']:.1f}s "
+          f"with {result['requests']:,} requests ({result['throttled']:,} rate limited, "
+          f"{result['retried']:,} retried); {result['skipped']:,} already done.")
+    if result["failures"]:
+        print(f"{len(result['failures']):,} change(s) not applied:")
+        for line, error in result["failures"][:20]:
+            print(f"  line {line}: {error}")
+        if len(result["failures"]) > 20:
+            print(f"  ... see {result['progress']}")
+        sys.exit(1)
@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import aiohttp
+from aiohttp import web
+
+from check_api import API_TARGET
+
+# A caching reverse proxy to put between Locus (or the Python tools) and the API,
+# so a reload, a test run or a verification script does not pull the whole
+# directory from pcomirror again:
+#
+#   python cache_proxy.py --upstream http://localhost:3000 --port 8099
+#   VITE_API_TARGET=http://localhost:8099 npm run dev
+#
+# GETs under /people/v2 and /check-ins/v2 are kept in an LRU bounded by size,
+# one entry per path, query and credential, so two API keys never see each
+# other's pages. An entry younger than --ttl is served as it is; an older one is
+# revalidated with the ETag or Last-Modified it came with, and a 304 renews it
+# without sending the body again. If the upstream cannot be reached, the stale
+# copy is served rather than an error.
+#
+# Identical requests that arrive while one is already on its way upstream wait
+# for that one instead of making their own. That matters most for /check-ins/v2,
+# which pcomirror does not mirror and answers by spending its PCO budget: the
+# dashboard and Ghost Protocol ask for the same pages from every open tab.
+#
+# Writes always go through. A PATCH, POST or DELETE drops every cached copy of
+# the record it touched, its sub-resources, and the collection pages that list
+# it, for every credential, unless the upstream refused it with a 4xx: a write
+# that failed with a 5xx or timed out may still have landed, and a client that
+# re-reads before retrying (apply_changes.py does) must see if it did. A read
+# that was already in flight when the write landed is not stored.
+#
+# Bodies are gzipped for clients that accept it. The mock API writes absolute
+# page links against its own origin; those are rewritten to the proxy's, so a
+# client following `links.next` stays behind the cache.
+
+CACHED_PREFIXES = ("/people/v2/", "/check-ins/v2/")
+WRITE_METHODS = frozenset(["POST", "PUT", "PATCH", "DELETE"])
+# Not forwarded in either direction: per-connection, or recomputed here.
+HOP_HEADERS = frozenset([
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length", "content-encoding", "accept-encoding",
+])
+PASSED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After", "Location")
+STATS_PATH = "/__cache"
+
+DEFAULT_PORT = 8099
+DEFAULT_TTL = 300
+DEFAULT_MAX_MB = 256
+MIN_COMPRESS = 1024
+
+
+def cacheable(method, path):
+    return method == "GET" and path.startswith(CACHED_PREFIXES)
+
+
+def cache_key(request):
+    """(path, query in a fixed order, a digest of the credential)."""
+    query = urlencode(sorted(parse_qsl(request.query_string, keep_blank_values=True)))
+    credential = hashlib.sha256(request.headers.get("Authorization", "").encode()).hexdigest()
+    return request.path, query, credential
+
+
+def affected_by(path):
+    """A predicate for the cached paths a write to `path` makes stale."""
+    parts = path.rstrip("/").split("/")
+    collection = "/".join(parts[:4])  # e.g. /people/v2/people
+    record = "/".join(parts[:5])  # e.g. /people/v2/people/123
+    return lambda cached: cached == collection or cached == record or cached.startswith(record + "/")
+
+
+class Entry:
+    __slots__ = ("status", "headers", "body", "etag", "last_modified", "stored_at", "variants")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.stored_at = time.monotonic()
+        self.variants = {}  # (origin, encoding) -> the body as sent
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+
+class ResponseCache:
+    """Least recently used entries, up to `max_bytes` of bodies in total."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+        self.entries[key] = entry
+        self.size += entry.size
+        self.trim()
+
+    def grew(self, nbytes):
+        self.size += nbytes
+        self.trim()
+
+    def trim(self):
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.size -= entry.size
+            self.evicted += 1
+
+    def invalidate(self, stale):
+        """Drop every entry whose path `stale` accepts; how many went."""
+        keys = [k for k in self.entries if stale(k[0])]
+        for key in keys:
+            self.size -= self.entries.pop(key).size
+        return len(keys)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+class CachingProxy:
+    def __init__(self, upstream, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, log=False):
+        self.upstream = upstream.rstrip("/")
+        self.ttl = ttl
+        self.log = log
+        self.cache = ResponseCache(max_bytes)
+        self.inflight = {}
+        # Bumped by every write, so a read that started before it is not stored.
+        self.generation = 0
+        self.stats = Counter()
+        self.session = None
+
+    async def start(self, app):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120))
+
+    async def stop(self, app):
+        await self.session.close()
+
+    async def handle(self, request):
+        if request.path == STATS_PATH:
+            return self.report(request)
+        if not cacheable(request.method, request.path):
+            return await self.passthrough(request)
+
+        key = cache_key(request)
+        entry = self.cache.get(key)
+        revalidate = "no-cache" in request.headers.get("Cache-Control", "")
+        if entry is not None and not revalidate and time.monotonic() - entry.stored_at < self.ttl:
+            outcome = "HIT"
+        else:
+            entry, outcome = await self.fetch(key, request, entry)
+        self.stats[outcome.lower()] += 1
+        if self.log:
+            print(f"{outcome:11s} {request.method} {request.path_qs}")
+        return self.respond(request, entry, outcome, key)
+
+    async def fetch(self, key, request, stale):
+        """Fetch or revalidate once however many ask at the same time: (entry, outcome)."""
+        pending = self.inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), "COALESCED"
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            entry, outcome = await self._fetch(key, request, stale)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, whether or not anyone was waiting
+            raise
+        else:
+            future.set_result(entry)
+            return entry, outcome
+        finally:
+            del self.inflight[key]
+
+    async def _fetch(self, key, request, stale):
+        headers = forwarded_headers(request.headers)
+        if stale is not None:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+        generation = self.generation
+        try:
+            async with self.session.get(self.upstream + request.path_qs, headers=headers) as response:
+                body = await response.read()
+                status = response.status
+                upstream_headers = {h: response.headers[h] for h in PASSED_HEADERS if h in response.headers}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if stale is not None:
+                return stale, "STALE"
+            return bad_gateway(e), "ERROR"
+
+        if status == 304 and stale is not None:
+            stale.stored_at = time.monotonic()
+            return stale, "REVALIDATED"
+        entry = Entry(status, upstream_headers, body)
+        if status == 200 and generation == self.generation:
+            self.cache.put(key, entry)
+        return entry, "MISS"
+
+    async def passthrough(self, request):
+        body = await request.read()
+        try:
+            async with self.session.request(request.method, self.upstream + request.path_qs,
+                                            headers=forwarded_headers(request.headers),
+                                            data=body or None) as response:
+                payload = await response.read()
+                entry = Entry(response.status, {h: response.headers[h] for h in PASSED_HEADERS
+                                                if h in response.headers}, payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            entry = bad_gateway(e)
+
+        if request.method in WRITE_METHODS:
+            self.generation += 1
+            # A 5xx, a 502 from here or a timeout may still have been stored
+            # upstream; only a 4xx says for certain that nothing changed.
+            if not 400 <= entry.status < 500:
+                self.stats["invalidated"] += self.cache.invalidate(affected_by(request.path))
+        self.stats["passthrough"] += 1
+        if self.log:
+            print(f"{'PASS':11s} {request.method} {request.path_qs} -> {entry.status}")
+        return self.respond(request, entry, "PASS")
+
+    def respond(self, request, entry, outcome, key=None):
+        headers = {**entry.headers, "X-Cache": outcome, "Vary": "Accept-Encoding, Authorization"}
+        if entry.status == 200 and entry.etag and request.headers.get("If-None-Match") == entry.etag:
+            return web.Response(status=304, headers=headers)
+
+        origin = f"{request.scheme}://{request.host}"
+        gzip_ok = "gzip" in request.headers.get("Accept-Encoding", "") and len(entry.body) >= MIN_COMPRESS
+        variant = (origin, "gzip" if gzip_ok else "identity")
+        body = entry.variants.get(variant)
+        if body is None:
+            body = entry.body.replace(self.upstream.encode(), origin.encode())
+            if gzip_ok:
+                body = gzip.compress(body, compresslevel=6)
+            # Only a cached entry keeps its encodings; a one-off response does not.
+            if key is not None and self.cache.entries.get(key) is entry:
+                entry.variants[variant] = body
+                self.cache.grew(len(body))
+        if gzip_ok:
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(status=entry.status, body=body, headers=headers)
+
+    def report(self, request):
+        if request.method == "DELETE":
+            self.cache.clear()
+        data = {
+            **self.stats,
+            "entries": len(self.cache),
+            "bytes": self.cache.size,
+            "evicted": self.cache.evicted,
+            "in_flight": len(self.inflight),
+        }
+        return web.json_response(data)
+
+
+def forwarded_headers(headers):
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+
+
+def bad_gateway(error):
+    body = json.dumps({"errors": [{"status": "502", "title": "Bad Gateway", "detail": str(error)}]})
+    return Entry(502, {"Content-Type": "application/json"}, body.encode())
+
+
+def make_app(proxy):
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_route("*", "/{tail:.*}", proxy.handle)
+    app.on_startup.append(proxy.start)
+    app.on_cleanup.append(proxy.stop)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A caching reverse proxy in front of the Locus API.")
+    parser.add_argument("--upstream", default=API_TARGET, help="API origin to cache (default: $VITE_API_TARGET)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds a response is served without asking the upstream again")
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help="cache size, in MiB of bodies")
+    parser.add_argument("--log", action="store_true", help="print one line per request")
+    args = parser.parse_args()
+
+    if urlsplit(args.upstream).port == args.port and urlsplit(args.upstream).hostname in ("localhost", args.host):
+        parser.error("the upstream is this proxy's own address")
+    proxy = CachingProxy(args.upstream, args.ttl, int(args.max_mb * 1024 * 1024), args.log)
+    print(f"Caching {args.upstream} on http://{args.host}:{args.port} (stats at {STATS_PATH})")
+    web.run_app(make_app(proxy), host=args.host, port=args.port, print=None)
@@ -1,46 +1,309 @@
-import requests
+import argparse
 import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from family_audit import analyze_families, household_columns
+from people_table import PersonTable
+
+# The same target the Vite dev proxy forwards `/api` to: the mock API by default,
+# or a pcomirror when `VITE_API_TARGET` says so.
+API_TARGET = os.environ.get("VITE_API_TARGET", "http://localhost:3000")
+
+# Mirrors PEOPLE_INCLUDES in src/utils/pco.ts. Asked for on the first page only;
+# PCO echoes `include` into `links.next`, so later pages carry it already.
+PEOPLE_INCLUDES = "emails,phone_numbers,addresses,households"
+
+PER_PAGE = 100
+
+# How many pages may be in flight at once when prefetching. PCO allows 100
+# requests per 20 seconds, so this stays small on purpose.
+DEFAULT_CONCURRENCY = 4
+
+
+def make_session(concurrency=DEFAULT_CONCURRENCY):
+    """A keep-alive session with a connection pool big enough for the prefetcher."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrency, 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # pcomirror accepts its `pcm_…` key as either half of HTTP Basic; the mock
+    # accepts anything.
+    session.auth = (
+        os.environ.get("VITE_PCO_APP_ID", "test"),
+        os.environ.get("VITE_PCO_SECRET", "test"),
+    )
+    return session
+
+
+def resolve_link(base, link):
+    """
+    Turn a `links.next` into something requestable.
+
+    The mock API returns absolute links against itself; pcomirror returns
+    mirror-relative paths like `/people/v2/people?offset=100`. `urljoin` leaves
+    the first alone and anchors the second on the target.
+    """
+    return urljoin(base + "/", link)
+
+
+def _with_offset(url, offset):
+    parts = urlsplit(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query["offset"] = [str(offset)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
 
-def check_api_anomaly():
-    url = "http://localhost:3000/people/v2/people?per_page=100"
+
+def _predicted_urls(first_page, next_url):
+    """
+    The URLs of every remaining page, if the first page lets us work them out.
+
+    Offset pagination with a known `total_count` is predictable: page k lives at
+    `offset + k * per_page`. Anything else (no offset in the link, no count)
+    returns None and the caller follows `links.next` one page at a time.
+    """
+    total = (first_page.get("meta") or {}).get("total_count")
+    query = parse_qs(urlsplit(next_url).query)
+    if total is None or "offset" not in query:
+        return None
     try:
-        response = requests.get(url)
-        data = response.json()
-        people = data.get('data', [])
-
-        anomaly_found = False
-
-        # Build map of households
-        households = {}
-        for p in people:
-            hid = p['attributes'].get('household_id')
-            if hid:
-                if hid not in households:
-                    households[hid] = []
-                households[hid].append(p)
-
-        for hid, members in households.items():
-            parents = [m for m in members if not m['attributes']['child']]
-            children = [m for m in members if m['attributes']['child']]
-
-            for child in children:
-                child_dob = int(child['attributes']['birthdate'].split('-')[0])
-                for parent in parents:
-                    parent_dob = int(parent['attributes']['birthdate'].split('-')[0])
-
-                    # Parent should be older (smaller year) than child
-                    # If child year is smaller than parent year, child is older.
-                    if child_dob < parent_dob:
-                        print(f"Anomaly Found! Household {hid}")
-                        print(f"Parent: {parent['attributes']['name']} ({parent_dob})")
-                        print(f"Child: {child['attributes']['name']} ({child_dob})")
-                        anomaly_found = True
-
-        if not anomaly_found:
+        offset = int(query["offset"][0])
+        per_page = int(query.get("per_page", [len(first_page.get("data", []))])[0])
+    except ValueError:
+        return None
+    if per_page <= 0:
+        return None
+    return [_with_offset(next_url, o) for o in range(offset, total, per_page)]
+
+
+def _get(session, url):
+    with metrics.span("http"):
+        started = time.perf_counter()
+        response = session.get(url)
+        metrics.record_request(url, len(response.content), time.perf_counter() - started, response.status_code)
+        response.raise_for_status()
+    with metrics.span("json"):
+        return response.json()
+
+
+def _result(future):
+    # The prefetcher's own "http" and "json" spans land on its worker threads;
+    # this is the part of them the consumer actually waited for.
+    with metrics.span("prefetch wait"):
+        return future.result()
+
+
+def iter_pages(session, path, params=None, base=API_TARGET,
+               concurrency=DEFAULT_CONCURRENCY, max_pages=None):
+    """
+    Yield every page of a paginated collection, in order, as decoded JSON.
+
+    When the page offsets can be predicted, up to `concurrency` pages are fetched
+    ahead of the consumer; otherwise `links.next` is followed serially. Only that
+    window of pages is ever held, so memory does not grow with the directory.
+    """
+    url = resolve_link(base, path)
+    if params:
+        url = f"{url}?{urlencode(params)}"
+
+    page = _get(session, url)
+    yield page
+    pages = 1
+
+    next_link = (page.get("links") or {}).get("next")
+    if not next_link or (max_pages is not None and pages >= max_pages):
+        return
+    next_url = resolve_link(base, next_link)
+
+    predicted = _predicted_urls(page, next_url) if concurrency > 1 else None
+    if predicted:
+        if max_pages is not None:
+            predicted = predicted[:max_pages - pages]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            window = []
+            for prefetch_url in predicted:
+                window.append(pool.submit(_get, session, prefetch_url))
+                if len(window) >= concurrency:
+                    page = _result(window.pop(0))
+                    pages += 1
+                    yield page
+            while window:
+                page = _result(window.pop(0))
+                pages += 1
+                yield page
+        # The directory can grow while we read it; anything past the predicted
+        # end is still reachable from the last page's link.
+        next_link = (page.get("links") or {}).get("next")
+        next_url = resolve_link(base, next_link) if next_link else None
+
+    while next_url and (max_pages is None or pages < max_pages):
+        page = _get(session, next_url)
+        pages += 1
+        yield page
+        next_link = (page.get("links") or {}).get("next")
+        next_url = resolve_link(base, next_link) if next_link else None
+
+
+@metrics.timed("transform")
+def flatten_included(page):
+    """
+    Fold `included[]` back onto the people that own it.
+
+    The Python twin of `flattenIncluded` in src/utils/pco.ts: contact records and
+    households arrive as sideloads on real PCO and pcomirror, and inline on the
+    mock. Inline attributes win, so mock responses pass through unchanged.
+    """
+    included = page.get("included") or []
+    if not included:
+        return page.get("data", [])
+
+    by_id = {(r["type"], r["id"]): r for r in included}
+
+    def pick(rels, name, kind):
+        data = (rels.get(name) or {}).get("data")
+        if not data:
+            return []
+        refs = data if isinstance(data, list) else [data]
+        return [by_id[(kind, ref["id"])] for ref in refs if (kind, ref["id"]) in by_id]
+
+    people = []
+    for person in page.get("data", []):
+        rels = person.get("relationships") or {}
+        attributes = dict(person.get("attributes") or {})
+
+        emails = pick(rels, "emails", "Email")
+        phones = pick(rels, "phone_numbers", "PhoneNumber")
+        addresses = pick(rels, "addresses", "Address")
+        households = pick(rels, "households", "Household")
+
+        if "email_addresses" not in attributes and emails:
+            attributes["email_addresses"] = [
+                {"address": e["attributes"].get("address"), "location": e["attributes"].get("location")}
+                for e in emails]
+        if "phone_numbers" not in attributes and phones:
+            attributes["phone_numbers"] = [
+                {"number": p["attributes"].get("number"), "location": p["attributes"].get("location")}
+                for p in phones]
+        if "addresses" not in attributes and addresses:
+            attributes["addresses"] = [
+                {k: a["attributes"].get(k) for k in ("street", "city", "state", "zip", "location")}
+                for a in addresses]
+        # The first household is the one the app means by "the" household.
+        if "household_id" not in attributes and households:
+            attributes["household_id"] = households[0]["id"]
+
+        people.append({**person, "attributes": attributes})
+    return people
+
+
+def iter_people(session=None, base=API_TARGET, concurrency=DEFAULT_CONCURRENCY,
+                max_pages=None):
+    """Stream every person in the directory, contacts and household folded in."""
+    session = session or make_session(concurrency)
+    params = {"per_page": PER_PAGE, "include": PEOPLE_INCLUDES}
+    for page in iter_pages(session, "/people/v2/people", params, base=base,
+                           concurrency=concurrency, max_pages=max_pages):
+        yield from flatten_included(page)
+
+
+def iter_ndjson(path):
+    """Person resources from a file with one JSON object per line."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def add_source_arguments(parser):
+    """The options every directory tool shares for choosing where people come from."""
+    parser.add_argument("--target", default=API_TARGET, help="API origin (default: $VITE_API_TARGET)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="pages fetched ahead when offsets are predictable; 1 disables prefetch")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="stop after this many pages (default: the whole directory)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="read the local snapshot, refreshing only what changed (see snapshot.py)")
+    parser.add_argument("--input", metavar="NDJSON", help="read people from a file instead of the API")
+    metrics.add_arguments(parser)
+
+
+def people_from_args(args):
+    """Stream people from whichever source `add_source_arguments` selected."""
+    if args.input:
+        return iter_ndjson(args.input)
+    target = args.target.rstrip("/")
+    if args.snapshot:
+        # Imported here because the snapshot is built with this module's fetcher.
+        from snapshot import refresh
+        return refresh(target, concurrency=args.concurrency).iter_people()
+    return iter_people(base=target, concurrency=args.concurrency, max_pages=args.max_pages)
+
+
+def table_from_args(args):
+    """
+    The same people as `people_from_args`, loaded into a PersonTable.
+
+    From the API, pages go into the table as they arrive, sideloads and all,
+    without being flattened into dicts first.
+    """
+    if args.input:
+        return PersonTable.from_ndjson(args.input)
+    if args.snapshot:
+        return PersonTable(people_from_args(args))
+    session = make_session(args.concurrency)
+    params = {"per_page": PER_PAGE, "include": PEOPLE_INCLUDES}
+    return PersonTable.from_pages(iter_pages(session, "/people/v2/people", params, base=args.target.rstrip("/"),
+                                             concurrency=args.concurrency, max_pages=args.max_pages))
+
+
+def check_api_anomaly(people=None, as_json=False):
+    try:
+        with metrics.span("analysis"):
+            # Built here rather than inside analyze_families so the birth years
+            # the summary prints can be read back from the same pass.
+            cols = household_columns(iter_people() if people is None else people)
+            issues = analyze_families(cols)
+
+        if as_json:
+            with metrics.span("output"):
+                print(json.dumps(issues, indent=2))
+            return issues
+
+        anomalies = [i for i in issues if i.get("fixType") == "Swap"]
+        flagged = {i[key] for i in anomalies for key in ("parentId", "studentId")}
+        born = {person_id: ymd // 10000 for person_id, ymd in zip(cols.ids, cols.birthdate.tolist())
+                if person_id in flagged}
+        for issue in anomalies:
+            print(f"Anomaly Found! Household {issue['householdId']}")
+            print(f"Parent: {issue['parentName']} ({born[issue['parentId']]})")
+            print(f"Child: {issue['studentName']} ({born[issue['studentId']]})")
+
+        if not anomalies:
             print("No anomalies found in API data.")
 
+        others = len(issues) - len(anomalies)
+        if others:
+            print(f"{others} other household issue(s); rerun with --json for details.")
+
+        return issues
+
     except Exception as e:
-        print(f"Error: {e}")
+        metrics.record_error(e)
+        print(f"Error: {metrics.describe_error(e)}", file=sys.stderr)
+
 
 if __name__ == "__main__":
-    check_api_anomaly()
+    parser = argparse.ArgumentParser(description="Audit the directory for household anomalies.")
+    add_source_arguments(parser)
+    parser.add_argument("--json", action="store_true",
+                        help="print every household issue as JSON instead of a summary")
+    args = parser.parse_args()
+    with metrics.run("check_api", args):
+        check_api_anomaly(people_from_args(args), args.json)
@@ -0,0 +1,551 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import metrics
+from check_api import (API_TARGET, DEFAULT_CONCURRENCY, add_source_arguments, iter_ndjson,
+                       make_session, people_from_args)
+from family_audit import ages_from_birthdates, parse_birthdate
+from snapshot import (CACHE_DIR, StringColumn, fetch_check_ins, fetch_events, format_timestamp,
+                      read_columns, write_columns)
+
+# Attendance, burnout and recruitment numbers over the whole check-in history,
+# not the 100 pages the dashboard can afford to fetch.
+#
+# Check-ins are held column by column: person and event as interned integers,
+# the time, the week and a worship/serving class. Alongside them sit running
+# aggregates per person (count, worship, serving, first and last check-in) and
+# per week (count, worship, serving). Adding check-ins only touches the new
+# rows, so a refresh costs what came in since the last one, and answering
+# "how many times has each of these people checked in" is an array lookup
+# rather than one /check-ins/v2/people/:id request per person.
+#
+# The store is saved in the snapshot column format next to the directory
+# snapshot, one file per API target.
+
+# classifyEvent in src/utils/burnout.ts, checked in this order.
+SERVING_WORDS = ("team", "volunteer", "serving", "greeter", "ministry")
+WORSHIP_WORDS = ("service", "worship", "kids church", "friday night live")
+UNKNOWN, WORSHIP, SERVING = 0, 1, 2
+CLASS_NAMES = {UNKNOWN: "Unknown", WORSHIP: "Worship", SERVING: "Serving"}
+
+# The burnout and recruitment window: eight weeks back from the newest check-in.
+WINDOW_DAYS = 8 * 7
+BURNOUT_MIN_SERVING = 6
+BURNOUT_MEDIUM_MAX_WORSHIP = 2
+RECRUIT_MIN_WORSHIP = 4
+RECRUIT_MAX_SERVING = 1
+
+WEEK = 7 * 24 * 3600
+# 1970-01-04, the first Sunday of the epoch; weeks start on Sunday as in
+# aggregateCheckInsByWeek.
+FIRST_SUNDAY = 3 * 24 * 3600
+
+NO_TIME = np.iinfo(np.int64).max
+
+
+def classify_event(name):
+    name = (name or "").lower()
+    if any(word in name for word in SERVING_WORDS):
+        return SERVING
+    if any(word in name for word in WORSHIP_WORDS):
+        return WORSHIP
+    return UNKNOWN
+
+
+def parse_moment(value):
+    """
+    (epoch seconds, week number) for an ISO-8601 time, or None.
+
+    The week is taken from the wall clock the timestamp was written in, the way
+    the browser's `startOfWeek` reads it in the church's own time zone, so a
+    Saturday-evening service does not slide into Sunday's week in UTC.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    seconds = int(parsed.timestamp())
+    local = seconds + int(parsed.utcoffset().total_seconds())
+    return seconds, (local - FIRST_SUNDAY) // WEEK
+
+
+def week_start(week):
+    return datetime(1970, 1, 4) + timedelta(weeks=int(week))
+
+
+def months_between(later, earlier):
+    """date-fns' differenceInMonths for two epoch-second times."""
+    a = datetime.fromtimestamp(int(later), timezone.utc)
+    b = datetime.fromtimestamp(int(earlier), timezone.utc)
+    months = (a.year - b.year) * 12 + a.month - b.month
+    if (a.day, a.time()) < (b.day, b.time()):
+        months -= 1
+    return max(months, 0)
+
+
+class Growable:
+    """An append-only NumPy array that doubles its capacity as it fills."""
+
+    def __init__(self, dtype, values=None):
+        values = np.asarray(values if values is not None else [], dtype=dtype)
+        self.data = np.empty(max(1024, len(values)), dtype=dtype)
+        self.data[:len(values)] = values
+        self.size = len(values)
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def resize(self, size, fill):
+        """Grow to `size`, filling new slots with `fill`."""
+        if size > self.size:
+            self.extend(np.full(size - self.size, fill, dtype=self.data.dtype))
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+
+class CheckInStore:
+    """
+    Every check-in for one API target, with per-person and per-week aggregates.
+
+    `add` is the only way in, and it updates the aggregates from the new rows
+    alone. Check-ins are history: the store assumes one is never back-dated, so
+    anything older than the newest it holds has been seen already.
+    """
+
+    PERSON = {"count": (np.int32, 0), "worship": (np.int32, 0), "serving": (np.int32, 0),
+              "first": (np.int64, NO_TIME), "last": (np.int64, -1)}
+    WEEKLY = ("count", "worship", "serving")
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_index = {}
+        self.event_ids = []
+        self.event_index = {}
+        self.event_class = Growable(np.int8)
+
+        self.person = Growable(np.int32)
+        self.event = Growable(np.int32)
+        self.created = Growable(np.int64)
+        self.week = Growable(np.int32)
+        self.volunteer = Growable(bool)
+        self.klass = Growable(np.int8)
+
+        self.per_person = {name: Growable(dtype) for name, (dtype, _) in self.PERSON.items()}
+        self.first_week = None
+        self.per_week = {name: Growable(np.int32) for name in self.WEEKLY}
+
+        # The newest check-in time held, and the ids seen at exactly that time:
+        # a refresh asks for everything from that second on, so those come back.
+        self.high_water = -1
+        self.ids_at_mark = set()
+
+    def __len__(self):
+        return self.person.size
+
+    # --- Ingest ---------------------------------------------------------------
+
+    def _intern_person(self, person_id):
+        row = self.person_index.get(person_id)
+        if row is None:
+            row = self.person_index[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+        return row
+
+    def _intern_event(self, event_id):
+        row = self.event_index.get(event_id)
+        if row is None:
+            row = self.event_index[event_id] = len(self.event_ids)
+            self.event_ids.append(event_id)
+            self.event_class.extend([UNKNOWN])
+        return row
+
+    def set_events(self, events):
+        """
+        Classify events by name and reclassify every held check-in.
+
+        Event names can change between refreshes, so this is the one operation
+        that rescans; it is a single vectorised pass over two small columns.
+        """
+        for e in events:
+            row = self._intern_event(e["id"])
+            self.event_class.data[row] = classify_event((e.get("attributes") or {}).get("name"))
+        if len(self):
+            self.klass.values[:] = self._classes(self.event.values, self.volunteer.values)
+            self._rebuild_counts()
+
+    def _classes(self, events, volunteer):
+        # calculateBurnoutRisk: a Volunteer check-in is serving whatever the event.
+        return np.where(volunteer, SERVING, self.event_class.values[events]).astype(np.int8)
+
+    @metrics.timed("transform")
+    def add(self, check_ins):
+        """Add check-in resources not already held; how many were new."""
+        people, events, created, weeks, volunteer, at_mark = [], [], [], [], [], []
+        mark = self.high_water
+        for c in check_ins:
+            moment = parse_moment((c.get("attributes") or {}).get("created_at"))
+            if moment is None or moment[0] < mark:
+                continue
+            if moment[0] == mark and c["id"] in self.ids_at_mark:
+                continue
+            rels = c.get("relationships") or {}
+            person = ((rels.get("person") or {}).get("data") or {}).get("id")
+            event = ((rels.get("event") or {}).get("data") or {}).get("id")
+            if person is None:
+                continue
+            people.append(self._intern_person(person))
+            events.append(self._intern_event(event))
+            created.append(moment[0])
+            weeks.append(moment[1])
+            volunteer.append((c.get("attributes") or {}).get("kind") == "Volunteer")
+            at_mark.append(c["id"])
+        if not people:
+            return 0
+
+        people = np.array(people, dtype=np.int32)
+        events = np.array(events, dtype=np.int32)
+        created = np.array(created, dtype=np.int64)
+        weeks = np.array(weeks, dtype=np.int32)
+        volunteer = np.array(volunteer, dtype=bool)
+        classes = self._classes(events, volunteer)
+
+        self.person.extend(people)
+        self.event.extend(events)
+        self.created.extend(created)
+        self.week.extend(weeks)
+        self.volunteer.extend(volunteer)
+        self.klass.extend(classes)
+        self._count(people, created, weeks, classes)
+
+        newest = int(created.max())
+        if newest > self.high_water:
+            self.high_water = newest
+            self.ids_at_mark = set()
+        self.ids_at_mark.update(i for i, t in zip(at_mark, created.tolist()) if t == newest)
+        return len(people)
+
+    def _count(self, people, created, weeks, classes):
+        """Fold a batch of rows into the running aggregates."""
+        for name, (_, fill) in self.PERSON.items():
+            self.per_person[name].resize(len(self.person_ids), fill)
+        agg = {name: g.values for name, g in self.per_person.items()}
+        np.add.at(agg["count"], people, 1)
+        np.add.at(agg["worship"], people[classes == WORSHIP], 1)
+        np.add.at(agg["serving"], people[classes == SERVING], 1)
+        np.minimum.at(agg["first"], people, created)
+        np.maximum.at(agg["last"], people, created)
+
+        low, high = int(weeks.min()), int(weeks.max())
+        if self.first_week is None:
+            self.first_week = low
+        elif low < self.first_week:
+            shift = self.first_week - low
+            for g in self.per_week.values():
+                g.data = np.concatenate([np.zeros(shift, dtype=np.int32), g.values])
+                g.size = len(g.data)
+            self.first_week = low
+        offsets = weeks - self.first_week
+        for name, mask in (("count", None), ("worship", classes == WORSHIP), ("serving", classes == SERVING)):
+            g = self.per_week[name]
+            g.resize(high - self.first_week + 1, 0)
+            np.add.at(g.values, offsets if mask is None else offsets[mask], 1)
+
+    def _rebuild_counts(self):
+        for name, (_, fill) in self.PERSON.items():
+            self.per_person[name].values[:] = fill
+        for g in self.per_week.values():
+            g.values[:] = 0
+        self._count(self.person.values, self.created.values, self.week.values, self.klass.values)
+
+    # --- Queries --------------------------------------------------------------
+
+    def check_in_counts(self, person_ids=None):
+        """{person id: check-ins}, for the given people or everyone; 0 for anyone never seen."""
+        counts = self.per_person["count"].values
+        if person_ids is None:
+            return dict(zip(self.person_ids, counts.tolist()))
+        return {i: int(counts[self.person_index[i]]) if i in self.person_index else 0 for i in person_ids}
+
+    def weekly_attendance(self):
+        """aggregateCheckInsByWeek over the whole history, plus the worship/serving split."""
+        if self.first_week is None:
+            return []
+        weeks = []
+        per_week = {name: g.values.tolist() for name, g in self.per_week.items()}
+        for offset, count in enumerate(per_week["count"]):
+            if not count:
+                continue
+            start = week_start(self.first_week + offset)
+            weeks.append({
+                "week": f"{start:%b} {start.day}",
+                "date": f"{start:%Y-%m-%d}",
+                "count": count,
+                "worship": per_week["worship"][offset],
+                "serving": per_week["serving"][offset],
+            })
+        return weeks
+
+    def window_counts(self, days=WINDOW_DAYS):
+        """
+        (worship, serving) per person over the `days` before the newest check-in.
+
+        The window is exact to the second, as the TypeScript's is, so it is
+        read from the check-in columns rather than the weekly totals.
+        """
+        n = len(self.person_ids)
+        if not len(self):
+            return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+        recent = self.created.values >= self.high_water - days * 24 * 3600
+        people = self.person.values[recent]
+        classes = self.klass.values[recent]
+        worship = np.bincount(people[classes == WORSHIP], minlength=n)
+        serving = np.bincount(people[classes == SERVING], minlength=n)
+        return worship, serving
+
+    def burnout_risk(self, names=None):
+        """
+        calculateBurnoutRisk: High before Medium, then most serving first.
+
+        `names` is {person id: name}, normally `student_names` of the
+        directory; as in the TypeScript, anyone not in it is left out.
+        """
+        worship, serving = self.window_counts()
+        rows = np.flatnonzero((serving >= BURNOUT_MIN_SERVING) & (worship <= BURNOUT_MEDIUM_MAX_WORSHIP))
+        candidates = []
+        for row in rows.tolist():
+            person_id = self.person_ids[row]
+            if names is not None and person_id not in names:
+                continue
+            candidates.append({
+                "personId": person_id,
+                "name": (names or {}).get(person_id),
+                "servingCount": int(serving[row]),
+                "worshipCount": int(worship[row]),
+                "riskLevel": "High" if worship[row] == 0 else "Medium",
+            })
+        return sorted(candidates, key=lambda c: (c["riskLevel"] != "High", -c["servingCount"]))
+
+    def recruitment_candidates(self, people, today=None):
+        """
+        calculateRecruitmentCandidates for a directory of person resources.
+
+        Tenure runs from a person's first check-in ever, which the store holds
+        for everyone, to the newest check-in.
+        """
+        directory = {}
+        children_by_household = {}
+        for person in people:
+            attrs = person.get("attributes") or {}
+            born = parse_birthdate(attrs.get("birthdate"))
+            if born is None:
+                continue  # transformPerson drops these
+            entry = {
+                "name": (attrs.get("name") or f"{attrs.get('first_name') or ''} {attrs.get('last_name') or ''}".strip()
+                         or "Unknown"),
+                "first_name": (attrs.get("first_name") or "").strip(),
+                "child": bool(attrs.get("child")),
+                "household": attrs.get("household_id"),
+                "born": born,
+            }
+            directory[person["id"]] = entry
+            if entry["child"] and entry["household"]:
+                children_by_household.setdefault(entry["household"], []).append(entry)
+        if not directory:
+            return []
+
+        ids = list(directory)
+        ages = ages_from_birthdates(np.array([directory[i]["born"] for i in ids], dtype=np.int64), today)
+        for i, age in zip(ids, ages.tolist()):
+            directory[i]["age"] = age
+
+        worship, serving = self.window_counts()
+        first = self.per_person["first"].values
+        rows = np.flatnonzero((worship >= RECRUIT_MIN_WORSHIP) & (serving <= RECRUIT_MAX_SERVING))
+        candidates = []
+        for row in rows.tolist():
+            person_id = self.person_ids[row]
+            person = directory.get(person_id)
+            # isMinor: anything uncertain is treated as a child.
+            if person is None or person["child"] or person["age"] < 18 or person["age"] > 110:
+                continue
+            children = children_by_household.get(person["household"], []) if person["household"] else []
+            roles = []
+            if any(5 <= c["age"] <= 10 for c in children):
+                roles.append("Kids Ministry")
+            if any(11 <= c["age"] <= 18 for c in children):
+                roles.append("Student Ministry")
+            tenure = months_between(self.high_water, first[row])
+            score = int(worship[row]) * 10 + (20 if children else 0) + (10 if tenure > 6 else 0)
+            candidates.append({
+                "personId": person_id,
+                "name": person["name"],
+                "worshipCount": int(worship[row]),
+                "servingCount": int(serving[row]),
+                "score": score,
+                "isParent": bool(children),
+                "tenureMonths": tenure,
+                "potentialRoles": roles,
+                "childNames": [c["first_name"] for c in children],
+            })
+        return sorted(candidates, key=lambda c: -c["score"])
+
+    # --- Persistence ----------------------------------------------------------
+
+    def save(self, path, target):
+        columns = {
+            "checkins.person": self.person.values,
+            "checkins.event": self.event.values,
+            "checkins.created_at": self.created.values,
+            "checkins.week": self.week.values,
+            "checkins.volunteer": self.volunteer.values,
+            "people.id": StringColumn.from_list(self.person_ids),
+            "events.id": StringColumn.from_list(self.event_ids),
+            "events.class": self.event_class.values,
+        }
+        meta = {
+            "target": target,
+            "saved_at": time.time(),
+            "high_water": self.high_water,
+            "ids_at_mark": sorted(self.ids_at_mark),
+        }
+        write_columns(path, columns, meta)
+
+    @classmethod
+    def load(cls, path):
+        """A store read back from `save`; the aggregates are rebuilt in one pass."""
+        meta, columns = read_columns(path)
+        store = cls()
+        store.person_ids = columns["people.id"].to_list()
+        store.person_index = {p: i for i, p in enumerate(store.person_ids)}
+        store.event_ids = columns["events.id"].to_list()
+        store.event_index = {e: i for i, e in enumerate(store.event_ids)}
+        store.event_class = Growable(np.int8, columns["events.class"])
+        store.person = Growable(np.int32, columns["checkins.person"])
+        store.event = Growable(np.int32, columns["checkins.event"])
+        store.created = Growable(np.int64, columns["checkins.created_at"])
+        store.week = Growable(np.int32, columns["checkins.week"])
+        store.volunteer = Growable(bool, columns["checkins.volunteer"])
+        store.klass = Growable(np.int8, store._classes(store.event.values, store.volunteer.values))
+        store.high_water = meta["high_water"]
+        store.ids_at_mark = set(meta["ids_at_mark"])
+        if len(store):
+            store._count(store.person.values, store.created.values, store.week.values, store.klass.values)
+        return store
+
+
+def student_names(people):
+    """
+    {person id: name} for the people `transformPerson` keeps, those with a
+    valid birthdate, named the way it names them.
+    """
+    names = {}
+    for person in people:
+        attrs = person.get("attributes") or {}
+        if parse_birthdate(attrs.get("birthdate")) is None:
+            continue
+        names[person["id"]] = (attrs.get("name")
+                               or f"{attrs.get('first_name') or ''} {attrs.get('last_name') or ''}".strip()
+                               or "Unknown")
+    return names
+
+
+def store_path(target=API_TARGET):
+    key = hashlib.sha1(target.rstrip("/").encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{key}.checkins.locus")
+
+
+def refresh(target=API_TARGET, full=False, session=None, concurrency=DEFAULT_CONCURRENCY):
+    """Bring the target's check-in store up to date and return (store, new check-ins)."""
+    target = target.rstrip("/")
+    path = store_path(target)
+    store = None
+    if not full and os.path.exists(path):
+        try:
+            store = CheckInStore.load(path)
+        except (ValueError, KeyError):
+            store = None
+    store = store or CheckInStore()
+    session = session or make_session(concurrency)
+
+    # Events first, so new check-ins are classified as they arrive.
+    store.set_events(fetch_events(session, target))
+    since = format_timestamp(store.high_water)
+    added = store.add(fetch_check_ins(session, target, since, concurrency))
+    store.save(path, target)
+    return store, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check-in analytics over the whole history.")
+    add_source_arguments(parser)
+    parser.add_argument("--full", action="store_true", help="ignore the saved store and pull every check-in")
+    parser.add_argument("--check-ins", metavar="NDJSON",
+                        help="read check-ins from a file instead of the API (with --events)")
+    parser.add_argument("--events", metavar="NDJSON", help="events for --check-ins")
+    parser.add_argument("--report", choices=["summary", "weekly", "burnout", "recruitment", "counts"],
+                        default="summary")
+    parser.add_argument("--person", action="append", help="with --report counts, only these person ids")
+    args = parser.parse_args()
+    with metrics.run("checkin_analytics", args):
+        report(args)
+
+
+def store_from_args(args):
+    """(store, new check-ins) from --check-ins and --events, or the saved store refreshed from the API."""
+    if args.check_ins:
+        store = CheckInStore()
+        store.set_events(iter_ndjson(args.events) if args.events else [])
+        return store, store.add(iter_ndjson(args.check_ins))
+    return refresh(args.target, full=args.full, concurrency=args.concurrency)
+
+
+def report(args):
+    """Load the store as `args` says and print the report it asks for."""
+    started = time.perf_counter()
+    store, added = store_from_args(args)
+    elapsed = time.perf_counter() - started
+
+    if args.report == "summary":
+        weeks = store.weekly_attendance()
+        print(f"{len(store):,} check-ins ({added:,} new) for {len(store.person_ids):,} people "
+              f"over {len(weeks)} weeks, newest {format_timestamp(store.high_water)}; {elapsed:.2f}s")
+        for w in weeks[-8:]:
+            print(f"  {w['date']}  {w['count']:7d}  worship {w['worship']:7d}  serving {w['serving']:7d}")
+        return
+
+    with metrics.span("analysis"):
+        if args.report == "weekly":
+            result = store.weekly_attendance()
+        elif args.report == "counts":
+            result = store.check_in_counts(args.person)
+        elif args.report == "burnout":
+            people = people_from_args(args)
+            result = store.burnout_risk(student_names(people))
+        else:
+            result = store.recruitment_candidates(people_from_args(args))
+    with metrics.span("output"):
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
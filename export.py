@@ -0,0 +1,658 @@
+import argparse
+import gzip
+import json
+import operator
+import os
+import re
+import sys
+import time
+import zlib
+from datetime import date
+from itertools import islice
+
+import numpy as np
+
+import metrics
+from check_api import add_source_arguments, iter_ndjson, make_session, people_from_args, table_from_args
+from checkin_analytics import CLASS_NAMES, SERVING, classify_event, store_from_args, student_names
+from find_duplicates import detect_duplicates
+from people_table import StringColumn, format_date, parse_birthdate, parse_timestamp
+from snapshot import fetch_check_ins, fetch_events
+from snapshot import refresh as refresh_snapshot
+
+# Directory, check-in and report exports that stream to disk, for the sizes
+# where `downloadCSV` in src/utils/export.ts runs out of road.
+#
+# downloadCSV builds every row, then the whole CSV string, then a Blob. Here
+# records become rows as they are read, rows failing --where are dropped and
+# the rest cut down to --columns on the spot, and they are written BATCH_ROWS
+# at a time, so memory holds one batch however big the export. Reports are the
+# exception: burnout, recruitment and duplicates need all their input before
+# the first row comes out, but what they write is small.
+#
+# Every dataset has a schema of typed columns. In rows, dates are YYYYMMDD and
+# timestamps epoch seconds, as in the snapshot, and None is null. The writers
+# render them:
+#
+#   csv      as downloadCSV writes it: every field quoted, nulls empty, lists
+#            and objects as JSON, lines joined by "\n" with none at the end,
+#            and nothing at all for no rows. Report columns are the
+#            dashboard's own, so a report CSV matches the one its Export
+#            button saves.
+#   ndjson   one JSON object per row.
+#   columns  a column file (see ColumnFile). Each batch is a row group and each
+#            column of it is compressed on its own, so a reader inflates only
+#            the columns it asks for.
+#
+# CSV and NDJSON are gzipped when the output name ends in .gz.
+
+BATCH_ROWS = 65536
+# zlib level for column chunks and gzipped text: 1 keeps up with the disk and
+# still gets most of the ratio on columns this repetitive.
+COMPRESSION = 1
+
+STR, INT, FLOAT, BOOL, DATE, TIMESTAMP, JSON = "str", "int", "float", "bool", "date", "timestamp", "json"
+
+
+# --- Datasets ----------------------------------------------------------------
+
+
+PEOPLE = (
+    ("id", STR), ("name", STR), ("first_name", STR), ("last_name", STR), ("child", BOOL), ("grade", INT),
+    ("household_id", STR), ("birthdate", DATE), ("age", INT), ("anniversary", DATE),
+    ("created_at", TIMESTAMP), ("updated_at", TIMESTAMP), ("background_check_expires_at", TIMESTAMP),
+    ("email", STR), ("phone", STR), ("street", STR), ("city", STR), ("state", STR), ("zip", STR),
+)
+CONTACTS = (
+    ("person_id", STR), ("kind", STR), ("value", STR), ("city", STR), ("state", STR), ("zip", STR),
+    ("location", STR), ("primary", BOOL),
+)
+CHECK_INS = (
+    ("id", STR), ("person_id", STR), ("event_id", STR), ("event", STR), ("kind", STR), ("class", STR),
+    ("created_at", TIMESTAMP),
+)
+WEEKLY = (("week", STR), ("date", DATE), ("count", INT), ("worship", INT), ("serving", INT))
+# BurnoutReport.tsx's export.
+BURNOUT = (("ID", STR), ("Name", STR), ("Risk Level", STR), ("Serving Count", INT), ("Worship Count", INT))
+RECRUITMENT = (
+    ("personId", STR), ("name", STR), ("worshipCount", INT), ("servingCount", INT), ("score", INT),
+    ("isParent", BOOL), ("tenureMonths", INT), ("potentialRoles", JSON), ("childNames", JSON),
+)
+# DuplicatesReport.tsx's export.
+DUPLICATES = (
+    ("Group ID", STR), ("Match Criteria", STR), ("Person ID", STR), ("Name", STR), ("Email", STR), ("Phone", STR),
+)
+
+# (kind, attribute, the field exported as `value`)
+CONTACT_KINDS = (("email", "email_addresses", "address"), ("phone", "phone_numbers", "number"),
+                 ("address", "addresses", "street"))
+
+
+def _seconds(value):
+    seconds = parse_timestamp(value)
+    return None if seconds < 0 else seconds
+
+
+def people_rows(people, today=None):
+    """A PEOPLE row per person resource: the display name and age as `transformPerson` has them."""
+    today = today or date.today()
+    today_ymd = today.year * 10000 + today.month * 100 + today.day
+    for person in people:
+        attrs = person.get("attributes") or {}
+        first, last = attrs.get("first_name"), attrs.get("last_name")
+        born = parse_birthdate(attrs.get("birthdate"))
+        grade = attrs.get("grade")
+        email = (attrs.get("email_addresses") or [{}])[0]
+        phone = (attrs.get("phone_numbers") or [{}])[0]
+        address = (attrs.get("addresses") or [{}])[0]
+        yield (
+            person["id"],
+            attrs.get("name") or f"{first or ''} {last or ''}".strip() or "Unknown",
+            first, last,
+            bool(attrs.get("child")),
+            grade if type(grade) is int else None,
+            attrs.get("household_id") or None,
+            born,
+            None if born is None else (today_ymd - born) // 10000,
+            parse_birthdate(attrs.get("anniversary")),
+            _seconds(attrs.get("created_at")),
+            _seconds(attrs.get("updated_at")),
+            _seconds(attrs.get("background_check_expires_at")),
+            email.get("address"), phone.get("number"),
+            address.get("street"), address.get("city"), address.get("state"), address.get("zip"),
+        )
+
+
+def contact_rows(people):
+    """A CONTACTS row per email, phone and address, the first of each kind marked primary."""
+    for person in people:
+        attrs = person.get("attributes") or {}
+        for kind, attribute, field in CONTACT_KINDS:
+            for i, record in enumerate(attrs.get(attribute) or []):
+                yield (person["id"], kind, record.get(field), record.get("city"), record.get("state"),
+                       record.get("zip"), record.get("location"), i == 0)
+
+
+def check_in_rows(check_ins, events):
+    """A CHECK_INS row per check-in, classed the way `calculateBurnoutRisk` counts it."""
+    names = {e["id"]: (e.get("attributes") or {}).get("name") for e in events}
+    classes = {event_id: classify_event(name) for event_id, name in names.items()}
+    unknown = classify_event(None)
+    for c in check_ins:
+        attrs = c.get("attributes") or {}
+        rels = c.get("relationships") or {}
+        event = ((rels.get("event") or {}).get("data") or {}).get("id")
+        kind = attrs.get("kind")
+        klass = SERVING if kind == "Volunteer" else classes.get(event, unknown)
+        yield (c["id"], ((rels.get("person") or {}).get("data") or {}).get("id"), event, names.get(event), kind,
+               CLASS_NAMES[klass], _seconds(attrs.get("created_at")))
+
+
+def check_ins_from_args(args):
+    """(check-ins, events) from --check-ins, the snapshot or the API; the check-ins stream."""
+    if args.check_ins:
+        return iter_ndjson(args.check_ins), list(iter_ndjson(args.events)) if args.events else []
+    target = args.target.rstrip("/")
+    if args.snapshot:
+        snap = refresh_snapshot(target, concurrency=args.concurrency)
+        return snap.iter_check_ins(), snap.events
+    session = make_session(args.concurrency)
+    return fetch_check_ins(session, target, None, args.concurrency), fetch_events(session, target)
+
+
+def _weekly(args):
+    store, _ = store_from_args(args)
+    for w in store.weekly_attendance():
+        yield w["week"], parse_birthdate(w["date"]), w["count"], w["worship"], w["serving"]
+
+
+def _burnout(args):
+    store, _ = store_from_args(args)
+    for c in store.burnout_risk(student_names(people_from_args(args))):
+        yield c["personId"], c["name"], c["riskLevel"], c["servingCount"], c["worshipCount"]
+
+
+def _recruitment(args):
+    store, _ = store_from_args(args)
+    for c in store.recruitment_candidates(people_from_args(args)):
+        yield tuple(c[name] for name, _ in RECRUITMENT)
+
+
+def _duplicates(args):
+    for group in detect_duplicates(table_from_args(args)):
+        for s in group["students"]:
+            yield group["id"], group["criteria"], s["id"], s["name"], s["email"] or "N/A", s["phoneNumber"] or "N/A"
+
+
+# name: (schema, rows from parsed arguments)
+DATASETS = {
+    "people": (PEOPLE, lambda args: people_rows(people_from_args(args))),
+    "contacts": (CONTACTS, lambda args: contact_rows(people_from_args(args))),
+    "check-ins": (CHECK_INS, lambda args: check_in_rows(*check_ins_from_args(args))),
+    "weekly": (WEEKLY, _weekly),
+    "burnout": (BURNOUT, _burnout),
+    "recruitment": (RECRUITMENT, _recruitment),
+    "duplicates": (DUPLICATES, _duplicates),
+}
+
+
+# --- Projection and filtering --------------------------------------------------
+
+
+OPERATORS = {"=": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+             ">": operator.gt, ">=": operator.ge}
+CONDITION = re.compile(r"^\s*(.+?)\s*(!=|<=|>=|=|<|>)\s*(.*?)\s*$")
+
+
+def parse_value(kind, text):
+    """A --where operand as a row value of type `kind`; empty means null."""
+    if text == "":
+        return None
+    if kind == STR:
+        return text
+    if kind == INT:
+        return int(text)
+    if kind == FLOAT:
+        return float(text)
+    if kind == BOOL:
+        if text.lower() not in ("true", "false"):
+            raise ValueError(f"expected true or false, not {text!r}")
+        return text.lower() == "true"
+    if kind == DATE:
+        value = parse_birthdate(text)
+    elif kind == TIMESTAMP:
+        value = _seconds(text)
+    else:
+        raise ValueError("JSON columns cannot be filtered on")
+    if value is None:
+        raise ValueError(f"{text!r} is not a {kind}")
+    return value
+
+
+def compile_where(schema, conditions):
+    """
+    One predicate over full rows for `--where` conditions, all of which must hold.
+
+    A condition is `column OP value` with OP one of = != < <= > >=, compared as
+    the column's type. An empty value is null: `email=` keeps rows without one
+    and `email!=` rows with one. Null never passes an ordering comparison.
+    """
+    index = {name: (i, kind) for i, (name, kind) in enumerate(schema)}
+    tests = []
+    for condition in conditions:
+        match = CONDITION.match(condition)
+        if not match:
+            raise ValueError(f"cannot read condition {condition!r}")
+        name, op, text = match.groups()
+        if name not in index:
+            raise ValueError(f"no column {name!r}; the columns are {', '.join(index)}")
+        i, kind = index[name]
+        try:
+            value = parse_value(kind, text)
+        except ValueError as e:
+            raise ValueError(f"{condition!r}: {e}") from None
+        if value is None and op not in ("=", "!="):
+            raise ValueError(f"{condition!r}: null can only be compared with = or !=")
+        compare = OPERATORS[op]
+        if value is None:
+            tests.append((i, (lambda v: v is None) if op == "=" else (lambda v: v is not None)))
+        else:
+            tests.append((i, lambda v, compare=compare, value=value: v is not None and compare(v, value)))
+
+    if not tests:
+        return None
+    if len(tests) == 1:
+        (i, test), = tests
+        return lambda row: test(row[i])
+    return lambda row: all(test(row[i]) for i, test in tests)
+
+
+def project(schema, columns):
+    """Indices into `schema` of the named columns, in the order named."""
+    names = [name for name, _ in schema]
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise ValueError(f"no column {', '.join(map(repr, missing))}; the columns are {', '.join(names)}")
+    return [names.index(c) for c in columns]
+
+
+def select(rows, keep=None, indices=None):
+    """`rows` passing `keep`, cut down to the columns at `indices`, still as a stream."""
+    if keep:
+        rows = filter(keep, rows)
+    if indices is not None:
+        rows = (tuple(row[i] for i in indices) for row in rows)
+    return rows
+
+
+# --- Writers -------------------------------------------------------------------
+
+
+def _js_number(value):
+    """A float as JavaScript's String() writes it: no trailing .0."""
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _timestamps(values):
+    """`format_timestamp` over a whole column, in one NumPy call."""
+    seconds = np.array([0 if v is None else v for v in values], dtype="datetime64[s]")
+    text = np.datetime_as_string(seconds, unit="s").tolist()
+    return [None if v is None else f"{t}Z" for v, t in zip(values, text)]
+
+
+def _each(render):
+    return lambda values: [None if v is None else render(v) for v in values]
+
+
+# How text formats render a column of each type, where Python's own str() would differ.
+TEXT = {BOOL: _each(lambda v: "true" if v else "false"), FLOAT: _each(_js_number), DATE: _each(format_date),
+        TIMESTAMP: _timestamps, JSON: _each(_json)}
+
+
+def _render(schema, rows, kinds):
+    """`rows` with the columns of the given kinds rendered as text; None stays None."""
+    columns = list(zip(*rows))
+    for i, (_, kind) in enumerate(schema):
+        if kind in kinds:
+            columns[i] = TEXT[kind](columns[i])
+    return zip(*columns)
+
+
+def _csv_line(values):
+    """One CSV line as downloadCSV builds it: every field quoted, None as ""."""
+    return ",".join('"' + ("" if v is None else str(v)).replace('"', '""') + '"' for v in values)
+
+
+class CsvWriter:
+    """
+    Rows as downloadCSV writes them, header first.
+
+    downloadCSV joins its lines with "\n" and ends without one, and writes
+    nothing at all when there are no rows, header included; so does this.
+    """
+
+    def __init__(self, f, schema):
+        self.f = f
+        self.schema = schema
+        self.started = False
+
+    def write(self, rows):
+        lines = [_csv_line(row) for row in _render(self.schema, rows, TEXT)]
+        if not self.started:
+            lines.insert(0, _csv_line(name for name, _ in self.schema))
+        self.f.write(("\n" if self.started else "") + "\n".join(lines))
+        self.started = True
+
+    def close(self):
+        pass
+
+
+class NdjsonWriter:
+    """One JSON object per row; dates and timestamps as the API writes them."""
+
+    def __init__(self, f, schema):
+        self.f = f
+        self.schema = schema
+        self.names = [name for name, _ in schema]
+
+    def write(self, rows):
+        names = self.names
+        self.f.write("".join(_json(dict(zip(names, row))) + "\n"
+                             for row in _render(self.schema, rows, (DATE, TIMESTAMP))))
+
+    def close(self):
+        pass
+
+
+# --- Column file format ----------------------------------------------------------
+#
+#   MAGIC | row group | row group | ... | footer (JSON) | footer length (uint64) | MAGIC
+#
+# The footer holds the schema and, for every row group, each column's chunks
+# as [offset, length]. Strings and JSON are a `data` chunk of UTF-8 end to end
+# and an `offsets` chunk of int64 bounds, as in a StringColumn; other types are
+# one `values` chunk, stored as STORAGE says with null slots filled. A column
+# with nulls in the group adds a `nulls` bitmap. Every chunk is its own zlib
+# stream. The footer comes last so the file is written in one forward pass.
+
+MAGIC = b"LOCUSCOL"
+FORMAT_VERSION = 1
+
+# type: (dtype, fill for null slots)
+STORAGE = {INT: (np.int64, 0), FLOAT: (np.float64, np.nan), BOOL: (np.bool_, False),
+           DATE: (np.int32, 0), TIMESTAMP: (np.int64, -1)}
+
+
+class ColumnWriter:
+    """Writes each batch as a row group as it comes; `close` writes the footer."""
+
+    def __init__(self, f, schema, meta=None):
+        self.f = f
+        self.schema = schema
+        self.meta = meta or {}
+        self.groups = []
+        self.rows = 0
+        f.write(MAGIC)
+        self.position = len(MAGIC)
+
+    def _chunk(self, array):
+        data = zlib.compress(np.ascontiguousarray(array).tobytes(), COMPRESSION)
+        self.f.write(data)
+        span = [self.position, len(data)]
+        self.position += len(data)
+        return span
+
+    def write(self, rows):
+        if not rows:
+            return
+        group = {"rows": len(rows), "columns": {}}
+        for (name, kind), values in zip(self.schema, zip(*rows)):
+            nulls = [v is None for v in values] if None in values else None
+            chunks = {}
+            if kind in (STR, JSON):
+                if kind == JSON:
+                    values = [None if v is None else _json(v) for v in values]
+                column = StringColumn.from_list(values)
+                chunks["data"] = self._chunk(column.data)
+                chunks["offsets"] = self._chunk(column.offsets)
+            else:
+                dtype, fill = STORAGE[kind]
+                if nulls:
+                    values = [fill if v is None else v for v in values]
+                chunks["values"] = self._chunk(np.array(values, dtype=dtype))
+            if nulls:
+                chunks["nulls"] = self._chunk(np.packbits(nulls))
+            group["columns"][name] = chunks
+        self.groups.append(group)
+        self.rows += len(rows)
+
+    def close(self):
+        footer = json.dumps({"version": FORMAT_VERSION, "schema": self.schema, "rows": self.rows,
+                             "meta": self.meta, "groups": self.groups}).encode()
+        self.f.write(footer)
+        self.f.write(np.uint64(len(footer)).tobytes())
+        self.f.write(MAGIC)
+
+
+class ColumnFile:
+    """
+    A column file opened for reading.
+
+    Opening reads the footer only. `iter_batches` and `read` fetch and inflate
+    just the chunks of the columns asked for; the rest of the file is never
+    read. Numbers, booleans, dates and timestamps come back as NumPy masked
+    arrays (masked where null), strings as StringColumns, where a null reads
+    back as "" as it does in the snapshot, and JSON as decoded values.
+    `iter_rows` gives rows in the exporter's own form, nulls as None.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a Locus column file")
+            f.seek(-(8 + len(MAGIC)), os.SEEK_END)
+            tail = f.read()
+            if tail[8:] != MAGIC:
+                raise ValueError(f"{path} is incomplete: it has no footer")
+            length = int(np.frombuffer(tail[:8], dtype=np.uint64)[0])
+            f.seek(-(8 + len(MAGIC) + length), os.SEEK_END)
+            footer = json.loads(f.read(length))
+        if footer["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {footer['version']}, expected {FORMAT_VERSION}")
+        self.schema = [tuple(column) for column in footer["schema"]]
+        self.types = dict(self.schema)
+        self.meta = footer["meta"]
+        self.groups = footer["groups"]
+        self.rows = footer["rows"]
+
+    def __len__(self):
+        return self.rows
+
+    def _names(self, columns):
+        if columns is None:
+            return [name for name, _ in self.schema]
+        missing = [c for c in columns if c not in self.types]
+        if missing:
+            raise KeyError(f"{self.path} has no column {', '.join(map(repr, missing))}")
+        return list(columns)
+
+    @staticmethod
+    def _inflate(f, span, dtype):
+        f.seek(span[0])
+        return np.frombuffer(zlib.decompress(f.read(span[1])), dtype=dtype)
+
+    def _decode(self, f, group, name):
+        """(values, nulls) for one column of one row group; nulls is None when there are none."""
+        chunks = group["columns"][name]
+        kind = self.types[name]
+        nulls = None
+        if "nulls" in chunks:
+            nulls = np.unpackbits(self._inflate(f, chunks["nulls"], np.uint8), count=group["rows"]).astype(bool)
+        if kind in (STR, JSON):
+            values = StringColumn(self._inflate(f, chunks["data"], np.uint8),
+                                  self._inflate(f, chunks["offsets"], np.int64))
+        else:
+            values = self._inflate(f, chunks["values"], STORAGE[kind][0])
+        return values, nulls
+
+    def _batches(self, columns):
+        names = self._names(columns)
+        with open(self.path, "rb") as f:
+            for group in self.groups:
+                yield names, {name: self._decode(f, group, name) for name in names}
+
+    def _present(self, name, values, nulls):
+        kind = self.types[name]
+        if kind == STR:
+            return values
+        if kind == JSON:
+            return [None if nulls is not None and nulls[i] else json.loads(v)
+                    for i, v in enumerate(values.to_list())]
+        return np.ma.masked_array(values, mask=np.ma.nomask if nulls is None else nulls)
+
+    def iter_batches(self, columns=None):
+        """{column: values} for each row group in turn."""
+        for names, decoded in self._batches(columns):
+            yield {name: self._present(name, *decoded[name]) for name in names}
+
+    def read(self, columns=None):
+        """{column: values} for the whole file."""
+        names = self._names(columns)
+        parts = {name: [] for name in names}
+        for batch in self.iter_batches(names):
+            for name in names:
+                parts[name].append(batch[name])
+        result = {}
+        for name in names:
+            kind, pieces = self.types[name], parts[name]
+            if kind == STR:
+                result[name] = _concat_strings(pieces)
+            elif kind == JSON:
+                result[name] = [v for piece in pieces for v in piece]
+            elif pieces:
+                result[name] = np.ma.concatenate(pieces)
+            else:
+                result[name] = np.ma.masked_array(np.empty(0, dtype=STORAGE[kind][0]))
+        return result
+
+    def iter_rows(self, columns=None):
+        """Rows as tuples, in the form the datasets produce them."""
+        for names, decoded in self._batches(columns):
+            lists = []
+            for name in names:
+                values, nulls = decoded[name]
+                kind = self.types[name]
+                if kind == JSON:
+                    values = [json.loads(v) if v else None for v in values.to_list()]
+                elif kind == STR:
+                    values = values.to_list()
+                else:
+                    values = values.tolist()
+                if nulls is not None:
+                    values = [None if null else v for v, null in zip(values, nulls.tolist())]
+                lists.append(values)
+            yield from zip(*lists)
+
+
+def _concat_strings(pieces):
+    if not pieces:
+        return StringColumn(np.empty(0, dtype=np.uint8), np.zeros(1, dtype=np.int64))
+    starts = np.cumsum([0] + [len(p.data) for p in pieces[:-1]])
+    offsets = np.concatenate([pieces[0].offsets[:1]] + [p.offsets[1:] + s for p, s in zip(pieces, starts)])
+    return StringColumn(np.concatenate([p.data for p in pieces]), offsets)
+
+
+# --- Export --------------------------------------------------------------------
+
+
+FORMATS = {"csv": CsvWriter, "ndjson": NdjsonWriter, "columns": ColumnWriter}
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".cols": "columns"}
+
+
+def format_for(path):
+    """The format an output name implies, or None."""
+    if not path:
+        return None
+    stem = path[:-3] if path.endswith(".gz") else path
+    return EXTENSIONS.get(os.path.splitext(stem)[1])
+
+
+def open_output(path, fmt):
+    if fmt == "columns":
+        return open(path, "wb")
+    if path is None:
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", compresslevel=COMPRESSION, newline="")
+    return open(path, "w", newline="")
+
+
+def write_batches(rows, writer, batch_rows=BATCH_ROWS):
+    """Pull `rows` a batch at a time and hand each to `writer`; how many rows there were."""
+    count = 0
+    while True:
+        with metrics.span("load"):
+            batch = list(islice(rows, batch_rows))
+        if not batch:
+            return count
+        with metrics.span("output"):
+            writer.write(batch)
+        count += len(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export directory, check-in or report data as a stream.")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    add_source_arguments(parser)
+    parser.add_argument("--check-ins", metavar="NDJSON",
+                        help="read check-ins from a file instead of the API (with --events)")
+    parser.add_argument("--events", metavar="NDJSON", help="events for --check-ins")
+    parser.add_argument("--full", action="store_true",
+                        help="for reports, ignore the saved check-in store and pull every check-in")
+    parser.add_argument("--format", choices=list(FORMATS),
+                        help="default: from the output name's extension, else csv")
+    parser.add_argument("--output", help="write here instead of stdout; .gz compresses CSV and NDJSON")
+    parser.add_argument("--columns", help="comma-separated columns to keep, in this order")
+    parser.add_argument("--where", action="append", default=[], metavar="CONDITION",
+                        help="keep rows where COLUMN OP VALUE holds, OP one of = != < <= > >=; repeatable")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="rows per batch and row group")
+    parser.add_argument("--list-columns", action="store_true", help="print the dataset's columns and exit")
+    args = parser.parse_args()
+
+    schema, source = DATASETS[args.dataset]
+    if args.list_columns:
+        for name, kind in schema:
+            print(f"{name:30s} {kind}")
+        sys.exit(0)
+    fmt = args.format or format_for(args.output) or "csv"
+    if fmt == "columns" and not args.output:
+        parser.error("--format columns needs --output")
+    try:
+        keep = compile_where(schema, args.where)
+        indices = project(schema, args.columns.split(",")) if args.columns else None
+    except ValueError as e:
+        parser.error(str(e))
+    selected = schema if indices is None else tuple(schema[i] for i in indices)
+
+    started = time.perf_counter()
+    with metrics.run("export", args):
+        out = open_output(args.output, fmt)
+        try:
+            writer = FORMATS[fmt](out, selected)
+            count = write_batches(select(source(args), keep, indices), writer, args.batch_rows)
+            with metrics.span("output"):
+                writer.close()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elapsed = time.perf_counter() - started
+
+    if args.output:
+        size = os.path.getsize(args.output)
+        print(f"{count:,} {args.dataset} rows to {args.output} ({fmt}, {size / 1024 / 1024:.1f} MiB) "
+              f"in {elapsed:.2f}s", file=sys.stderr)
@@ -0,0 +1,321 @@
+import re
+from datetime import date
+
+import numpy as np
+
+from people_table import PersonTable, parse_birthdate
+
+# The household rules of `analyzeFamilies` in src/utils/family.ts, run over a
+# whole directory at once. Messages and thresholds match the TypeScript so a
+# finding reads the same in the report as it does in the Family Audit modal.
+
+SPOUSE_GAP_YEARS = 40
+MIN_PARENT_GAP_YEARS = 15
+
+# Fill for a household with no parent (or no child), far enough outside any real
+# age that it can never trip a threshold, and small enough not to overflow.
+NO_AGE = 1 << 20
+
+NON_DIGIT = re.compile(r"\D")
+
+
+def ages_from_birthdates(birthdates, today=None):
+    """
+    Whole years between each YYYYMMDD and today.
+
+    Subtracting two YYYYMMDD integers and dropping the last four digits is
+    exactly date-fns' `differenceInYears`: the month/day part only borrows a
+    year when this year's birthday has not come round yet.
+    """
+    today = today or date.today()
+    today_ymd = today.year * 10000 + today.month * 100 + today.day
+    return (today_ymd - birthdates) // 10000
+
+
+class HouseholdColumns:
+    """
+    The people `analyzeFamilies` sees, one column per field.
+
+    Built in a single pass. Households are interned to dense integer ids in the
+    order they first appear, so per-household aggregates are plain array
+    indexing. Only people with a parseable birthdate are kept, as
+    `transformPerson` drops the rest before the TypeScript audit ever runs.
+    """
+
+    def __init__(self, people, today=None):
+        household_index = {}
+        self.household_ids = []
+        self.ids = []
+        self.names = []
+        self.last_names = []
+        self.emails = []
+        self.phones = []
+        self.addresses = []
+
+        households = []
+        children = []
+        birthdates = []
+
+        for person in people:
+            attrs = person.get("attributes") or {}
+            born = parse_birthdate(attrs.get("birthdate"))
+            if born is None:
+                continue
+
+            hid = attrs.get("household_id")
+            if hid:
+                h = household_index.get(hid)
+                if h is None:
+                    h = household_index[hid] = len(self.household_ids)
+                    self.household_ids.append(hid)
+            else:
+                h = -1
+
+            first = attrs.get("first_name") or ""
+            last = attrs.get("last_name") or ""
+            emails = attrs.get("email_addresses") or []
+            phones = attrs.get("phone_numbers") or []
+            addresses = attrs.get("addresses") or []
+
+            self.ids.append(person.get("id"))
+            self.names.append(attrs.get("name") or f"{first} {last}".strip() or "Unknown")
+            self.last_names.append(last.strip())
+            self.emails.append(emails[0].get("address") if emails else None)
+            self.phones.append(phones[0].get("number") if phones else None)
+            self.addresses.append(addresses[0] if addresses else None)
+            households.append(h)
+            children.append(bool(attrs.get("child")))
+            birthdates.append(born)
+
+        self.household = np.array(households, dtype=np.int32)
+        self.is_child = np.array(children, dtype=bool)
+        self.birthdate = np.array(birthdates, dtype=np.int32)
+        self.age = ages_from_birthdates(self.birthdate, today).astype(np.int16)
+
+    @classmethod
+    def from_table(cls, table, today=None):
+        """The same columns taken from a PersonTable, without a pass over dicts."""
+        cols = cls.__new__(cls)
+        rows = np.flatnonzero(table.birthdate > 0)
+
+        # Renumber households densely in the order they first appear among the kept rows.
+        household = table.household[rows]
+        present = household >= 0
+        codes, first_seen = np.unique(household[present], return_index=True)
+        codes = codes[np.argsort(first_seen)]
+        renumber = np.full(len(table.households) + 1, -1, dtype=np.int32)
+        renumber[codes] = np.arange(len(codes), dtype=np.int32)
+        cols.household = renumber[household]
+        cols.household_ids = [table.households[c] for c in codes.tolist()]
+
+        cols.ids = table.id.take(rows)
+        cols.names = table.display_names(rows)
+        cols.last_names = [(name or "").strip() for name in table.strings.decode(table.last_name[rows])]
+        cols.emails = table.primary("emails", "address", rows)
+        cols.phones = table.primary("phones", "number", rows)
+        cols.addresses = table.primary_records("addresses", rows)
+        cols.is_child = table.child[rows]
+        cols.birthdate = table.birthdate[rows]
+        cols.age = ages_from_birthdates(cols.birthdate, today).astype(np.int16)
+        return cols
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _household_extremes(cols, mask, n_households, fill, reducer):
+    out = np.full(n_households, fill, dtype=np.int32)
+    reducer.at(out, cols.household[mask], cols.age[mask])
+    return out
+
+
+def _members_by_household(cols, flagged):
+    """Row indices of every member of the flagged households, in directory order."""
+    wanted = np.zeros(len(cols.household_ids), dtype=bool)
+    wanted[flagged] = True
+    rows = np.flatnonzero((cols.household >= 0) & wanted[np.maximum(cols.household, 0)])
+    members = {}
+    for row in rows.tolist():
+        members.setdefault(int(cols.household[row]), []).append(row)
+    return members
+
+
+def _family_name(cols, rows):
+    parents = [r for r in rows if not cols.is_child[r]]
+    if parents:
+        return cols.names[parents[0]].split(" ")[-1] or "Family"
+    return cols.last_names[rows[0]] or "Family"
+
+
+def _household_issues(cols):
+    n = len(cols.household_ids)
+    if n == 0:
+        return []
+
+    in_household = cols.household >= 0
+    parent = in_household & ~cols.is_child
+    child = in_household & cols.is_child
+
+    parent_count = np.bincount(cols.household[parent], minlength=n)
+    youngest_parent = _household_extremes(cols, parent, n, NO_AGE, np.minimum)
+    oldest_parent = _household_extremes(cols, parent, n, -NO_AGE, np.maximum)
+    oldest_child = _household_extremes(cols, child, n, -NO_AGE, np.maximum)
+
+    # Every parent/child pair is fine exactly when the youngest parent is still
+    # at least 15 years older than the oldest child, so one comparison per
+    # household replaces the pairwise loop. Only households that fail it are
+    # expanded back into pairs below.
+    pair_flag = (parent_count > 0) & (youngest_parent - oldest_child < MIN_PARENT_GAP_YEARS)
+    spouse_flag = (parent_count == 2) & (oldest_parent - youngest_parent > SPOUSE_GAP_YEARS)
+
+    flagged = np.flatnonzero(pair_flag | spouse_flag)
+    members = _members_by_household(cols, flagged)
+
+    issues = []
+    for h in flagged.tolist():
+        rows = members[h]
+        hid = cols.household_ids[h]
+        family_name = _family_name(cols, rows)
+        member_ids = [cols.ids[r] for r in rows]
+        parents = [r for r in rows if not cols.is_child[r]]
+        children = [r for r in rows if cols.is_child[r]]
+
+        if spouse_flag[h]:
+            p1, p2 = parents
+            gap = abs(int(cols.age[p1]) - int(cols.age[p2]))
+            issues.append({
+                "type": "Critical",
+                "message": f"Large age gap ({gap}y) between Spouses: "
+                           f"{cols.names[p1]} ({cols.age[p1]}) & {cols.names[p2]} ({cols.age[p2]})",
+                "householdId": hid,
+                "familyName": family_name,
+                "members": member_ids,
+            })
+
+        if not pair_flag[h] or len(rows) < 2:
+            continue
+        for c in children:
+            for p in parents:
+                gap = int(cols.age[p]) - int(cols.age[c])
+                if gap < 0:
+                    issues.append({
+                        "type": "Critical",
+                        "message": f"Child ({cols.names[c]}, {cols.age[c]}) is older than "
+                                   f"Parent ({cols.names[p]}, {cols.age[p]})",
+                        "householdId": hid,
+                        "familyName": family_name,
+                        "members": member_ids,
+                        "fixType": "Swap",
+                        "studentId": cols.ids[c],
+                        "parentId": cols.ids[p],
+                        "studentName": cols.names[c],
+                        "parentName": cols.names[p],
+                    })
+                elif gap < MIN_PARENT_GAP_YEARS:
+                    issues.append({
+                        "type": "Warning",
+                        "message": f"Small age gap ({gap}y) between Parent ({cols.names[p]}, {cols.age[p]}) "
+                                   f"and Child ({cols.names[c]}, {cols.age[c]})",
+                        "householdId": hid,
+                        "familyName": family_name,
+                        "members": member_ids,
+                    })
+    return issues
+
+
+def _address_key(address):
+    if not address:
+        return None
+    # A missing field renders as "undefined" in the TypeScript key, so it does
+    # here too; an all-blank key is skipped.
+    street, city, zip_code = address.get("street"), address.get("city"), address.get("zip")
+    key = (f"{'undefined' if street is None else street}|"
+           f"{'undefined' if city is None else city}|"
+           f"{'undefined' if zip_code is None else zip_code}").lower()
+    return key if key.replace("|", "").strip() else None
+
+
+def _phone_key(phone):
+    if not phone:
+        return None
+    digits = NON_DIGIT.sub("", phone)
+    return digits if len(digits) >= 10 else None
+
+
+def _shared_keys(keys, household):
+    """
+    (key, [household, …]) for every key held by more than one household.
+
+    Keys are interned to integers and each (key, household) pair packed into one
+    int64, so deduplicating pairs and counting households per key is a sort
+    rather than a dict of sets.
+    """
+    index = {}
+    codes = np.fromiter((-1 if k is None else index.setdefault(k, len(index)) for k in keys),
+                        dtype=np.int64, count=len(keys))
+    mask = (codes >= 0) & (household >= 0)
+    if not mask.any():
+        return []
+    width = int(household.max()) + 1
+    pairs = np.sort(codes[mask] * width + household[mask])
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    pair_keys, pair_households = np.divmod(pairs, width)
+    starts = np.flatnonzero(np.r_[True, pair_keys[1:] != pair_keys[:-1]])
+    counts = np.diff(np.r_[starts, len(pairs)])
+
+    names = list(index)
+    return [(names[pair_keys[s]], pair_households[s:s + n].tolist())
+            for s, n in zip(starts.tolist(), counts.tolist()) if n > 1]
+
+
+def _split_household_issues(cols):
+    """Households that share an address, email or phone with another household."""
+    shared = [("Address", key, hs) for key, hs in
+              _shared_keys([_address_key(a) for a in cols.addresses], cols.household)]
+    shared += [("Email", key, hs) for key, hs in
+               _shared_keys([e.lower() if e else None for e in cols.emails], cols.household)]
+    shared += [("Phone", key, hs) for key, hs in
+               _shared_keys([_phone_key(p) for p in cols.phones], cols.household)]
+    if not shared:
+        return []
+
+    members = _members_by_household(cols, sorted({h for _, _, hs in shared for h in hs}))
+    issues = []
+    for kind, key, hs in shared:
+        names = []
+        for h in hs:
+            rows = members[h]
+            parents = [r for r in rows if not cols.is_child[r]]
+            name = cols.last_names[parents[0]] if parents else (cols.last_names[rows[0]] or "Unknown")
+            if name not in names:
+                names.append(name)
+        issues.append({
+            "type": "Warning",
+            "message": f"Potential Split Household: {len(hs)} households share {kind} ({key})",
+            "householdId": ", ".join(cols.household_ids[h] for h in hs),
+            "familyName": " & ".join(names),
+            "members": [cols.ids[r] for h in hs for r in members[h]],
+        })
+    return issues
+
+
+def household_columns(people, today=None):
+    """HouseholdColumns for a PersonTable or person resources; ones already built pass through."""
+    if isinstance(people, HouseholdColumns):
+        return people
+    if isinstance(people, PersonTable):
+        return HouseholdColumns.from_table(people, today)
+    return HouseholdColumns(people, today)
+
+
+def analyze_families(people, today=None):
+    """
+    Every `FamilyIssue` for a directory, as plain dicts.
+
+    `people` is a PersonTable, or any iterable of PCO person resources with
+    contacts flattened onto them, such as `check_api.iter_people()`. `members`
+    carries person ids rather than whole records so the result stays small
+    enough to serialise.
+    """
+    cols = household_columns(people, today)
+    return _household_issues(cols) + _split_household_issues(cols)
@@ -0,0 +1,335 @@
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+
+import metrics
+from check_api import add_source_arguments, table_from_args
+from people_table import PersonTable
+
+# `detectDuplicates` from src/utils/duplicates.ts, for directories too big to
+# compare in the browser.
+#
+# The exact rules are unchanged: same name and email, same name and phone, and
+# the same or a similar name at the same street and ZIP. What changes is how
+# candidates are found. Every person is indexed once by normalised phone, email
+# local part and address, and pairs are only compared inside one of those
+# blocks. A block small enough to compare exhaustively is; a large one (an
+# apartment block, the church office address on every newcomer card) is split
+# further by name, so a pair is only compared if it shares a phonetic key or
+# enough trigrams to possibly be within two edits.
+#
+# By default the criteria are the TypeScript's four, so the groups are the ones
+# DuplicatesReport shows. --fuzzy-contacts adds two more in the same wording: a
+# similar name on the same phone number, and a similar name on the same email
+# mailbox (the part before the @, so a typo'd domain still matches).
+
+EMAIL_MATCH = "Name & Email Match"
+PHONE_MATCH = "Name & Phone Match"
+SAME_ADDRESS = "Same Name & Address"
+SIMILAR_ADDRESS = "Similar Name & Same Address"
+SIMILAR_PHONE = "Similar Name & Same Phone"
+SIMILAR_EMAIL = "Similar Name & Same Email"
+
+# Full-name distance the fuzzy rule allows, and the share of the longer first
+# name a typo may touch. Both as in duplicates.ts.
+MAX_NAME_DISTANCE = 2
+MAX_FIRST_NAME_RATIO = 0.4
+
+# Blocks up to this size are compared pair by pair, exactly as the TypeScript
+# does; past it, only name-keyed candidates are.
+EXHAUSTIVE_BLOCK = 32
+
+NON_DIGIT = re.compile(r"\D")
+WHITESPACE = re.compile(r"\s+")
+
+SOUNDEX_CODES = {c: d for letters, d in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                                         ("l", "4"), ("mn", "5"), ("r", "6"))
+                 for c in letters}
+
+
+def bounded_levenshtein(a, b, limit):
+    """
+    Edit distance between `a` and `b` if it is at most `limit`, else `limit + 1`.
+
+    Only the diagonal band `limit` cells either side is filled, and the scan
+    stops as soon as a whole row exceeds the limit, so a clear mismatch costs a
+    row or two rather than the full matrix.
+    """
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > limit:
+        return limit + 1
+    if not a:
+        return len(b)
+
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        ca = a[i - 1]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < over else over
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    return previous[len(b)]
+
+
+def soundex(word):
+    """American Soundex, or an empty string for a word with no letters."""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    last = SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES.get(c, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def trigrams(name):
+    padded = f"  {name}  "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class Candidate:
+    """
+    What the rules read about one person, normalised once.
+
+    Only the blocking keys are kept; the phonetic key and trigrams are worked
+    out the first time a large block needs them, and the record a group shows
+    is read back from the table by `row` once the groups are known.
+    """
+
+    __slots__ = ("row", "id", "name", "raw_name", "first", "email", "mailbox", "phone", "address_key",
+                 "_phonetic", "grams")
+
+    def __init__(self, row, person_id, raw_name, email, phone, street, zip_code):
+        self.row = row
+        self.id = person_id
+        self.raw_name = raw_name
+        self.name = self.raw_name.lower().strip()
+        self.first = WHITESPACE.split(self.name)[0] if self.name else ""
+        self.email = email.lower().strip() if email else None
+        self.mailbox = self.email.split("@")[0] if self.email and "@" in self.email else None
+        digits = NON_DIGIT.sub("", phone) if phone else ""
+        self.phone = digits if len(digits) >= 10 else None
+        self.address_key = f"{street.lower().strip()}|{zip_code.strip()}" if street and zip_code else None
+        self._phonetic = None
+        self.grams = None
+
+    @property
+    def phonetic(self):
+        if self._phonetic is None:
+            self._phonetic = " ".join(soundex(part) for part in self.name.split())
+        return self._phonetic
+
+
+def candidates_from_table(table):
+    """
+    A Candidate for every student of a PersonTable.
+
+    Rows without a birthdate are left out: transformPerson drops them before
+    DuplicatesReport calls detectDuplicates, so the app never groups them.
+    """
+    rows = np.flatnonzero(table.birthdate > 0)
+    columns = zip(rows.tolist(), table.id.take(rows), table.display_names(rows),
+                  table.primary("emails", "address", rows), table.primary("phones", "number", rows),
+                  table.primary("addresses", "street", rows), table.primary("addresses", "zip", rows))
+    return [Candidate(*values) for values in columns]
+
+
+def student_records(table, rows):
+    """{row: the fields the merge UI shows} for the given rows."""
+    rows = np.array(sorted(rows), dtype=np.int64)
+    columns = zip(rows.tolist(), table.id.take(rows), table.display_names(rows),
+                  table.primary("emails", "address", rows), table.primary("phones", "number", rows),
+                  table.primary_records("addresses", rows), table.households.decode(table.household[rows]))
+    return {row: {"id": person_id, "name": name, "email": email, "phoneNumber": phone, "address": address,
+                  "householdId": household}
+            for row, person_id, name, email, phone, address, household in columns}
+
+
+def names_match(a, b):
+    """
+    The fuzzy rule from duplicates.ts: (matched, full-name distance).
+
+    Within two edits overall, and the first names either equal or differing in
+    no more than 40% of the longer one, so "Ava" and "Mia" stay siblings.
+    """
+    distance = bounded_levenshtein(a.name, b.name, MAX_NAME_DISTANCE)
+    if distance == 0:
+        return True, 0
+    if distance > MAX_NAME_DISTANCE:
+        return False, distance
+    longest = max(len(a.first), len(b.first))
+    if longest == 0:
+        return False, distance
+    allowed = int(longest * MAX_FIRST_NAME_RATIO + 1e-9)
+    first_distance = bounded_levenshtein(a.first, b.first, allowed)
+    return first_distance <= allowed, distance
+
+
+def _could_be_close(a, b):
+    """
+    Trigram count filter: can these names be within MAX_NAME_DISTANCE edits?
+
+    Each edit destroys at most three padded trigrams, so strings within k edits
+    share at least max(len) + 2 - 3k of them. Failing that bound rules the pair
+    out without ever running the edit distance.
+    """
+    if abs(len(a.name) - len(b.name)) > MAX_NAME_DISTANCE:
+        return False
+    if a.grams is None:
+        a.grams = trigrams(a.name)
+    if b.grams is None:
+        b.grams = trigrams(b.name)
+    shared = sum((a.grams & b.grams).values())
+    return shared >= max(len(a.name), len(b.name)) + 2 - 3 * MAX_NAME_DISTANCE
+
+
+def block_pairs(members):
+    """Index pairs within one block worth running the name rule on."""
+    if len(members) <= EXHAUSTIVE_BLOCK:
+        yield from combinations(range(len(members)), 2)
+        return
+
+    seen = set()
+    by_sound = {}
+    for i, m in enumerate(members):
+        by_sound.setdefault(m.phonetic, []).append(i)
+    for rows in by_sound.values():
+        for pair in combinations(rows, 2):
+            seen.add(pair)
+            yield pair
+
+    by_gram = {}
+    for i, m in enumerate(members):
+        if m.grams is None:
+            m.grams = trigrams(m.name)
+        for gram in m.grams:
+            by_gram.setdefault(gram, []).append(i)
+    for i, m in enumerate(members):
+        partners = Counter()
+        for gram, count in m.grams.items():
+            for j in by_gram[gram]:
+                if j > i:
+                    partners[j] += min(count, members[j].grams[gram])
+        threshold = len(m.name) + 2 - 3 * MAX_NAME_DISTANCE
+        for j, count in partners.items():
+            if count >= threshold and (i, j) not in seen and _could_be_close(m, members[j]):
+                yield i, j
+
+
+def detect_duplicates(people, fuzzy_contacts=False):
+    """
+    `DuplicateGroup`s for a directory, as JSON-ready dicts.
+
+    `people` is a PersonTable or an iterable of person resources; as in the
+    app, only people with a valid birthdate are compared. Each group is
+    `{"id", "criteria", "students"}` with the same ids and criteria
+    `detectDuplicates` produces; `students` carries the fields the merge UI
+    shows rather than a whole Student. `fuzzy_contacts` adds the two criteria
+    the TypeScript does not have.
+    """
+    table = people if isinstance(people, PersonTable) else PersonTable(people)
+    candidates = candidates_from_table(table)
+
+    name_email, name_phone, by_address, by_phone, by_mailbox = {}, {}, {}, {}, {}
+    for c in candidates:
+        if c.email:
+            name_email.setdefault(f"{c.name}|{c.email}", []).append(c)
+        if c.phone:
+            name_phone.setdefault(f"{c.name}|{c.phone}", []).append(c)
+            by_phone.setdefault(c.phone, []).append(c)
+        if c.mailbox:
+            by_mailbox.setdefault(c.mailbox, []).append(c)
+        if c.address_key:
+            by_address.setdefault(c.address_key, []).append(c)
+
+    groups = []
+    grouped = set()
+
+    def add(members, criteria):
+        key = ",".join(sorted(m.id for m in members))
+        if key in grouped:
+            return
+        grouped.add(key)
+        groups.append({"id": f"dup_{key}", "criteria": criteria,
+                       "students": [m.row for m in members]})
+
+    for index, criteria in ((name_email, EMAIL_MATCH), (name_phone, PHONE_MATCH)):
+        for members in index.values():
+            if len(members) > 1:
+                add(members, criteria)
+
+    fuzzy_blocks = [(by_address, SAME_ADDRESS, SIMILAR_ADDRESS)]
+    if fuzzy_contacts:
+        fuzzy_blocks += [(by_phone, None, SIMILAR_PHONE), (by_mailbox, None, SIMILAR_EMAIL)]
+
+    for index, exact, similar in fuzzy_blocks:
+        for members in index.values():
+            if len(members) < 2:
+                continue
+            for i, j in block_pairs(members):
+                a, b = members[i], members[j]
+                matched, distance = names_match(a, b)
+                if not matched:
+                    continue
+                criteria = exact if distance == 0 else similar
+                # Same name on the same phone or email is already an exact
+                # match above; the contact blocks only add the near misses.
+                if criteria:
+                    add([a, b], criteria)
+
+    records = student_records(table, {row for g in groups for row in g["students"]})
+    for group in groups:
+        group["students"] = [records[row] for row in group["students"]]
+    return groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find likely duplicate people in the directory.")
+    add_source_arguments(parser)
+    parser.add_argument("--fuzzy-contacts", action="store_true",
+                        help="also group similar names on one phone number or email mailbox, "
+                             "which duplicates.ts does not")
+    parser.add_argument("--output", help="write the groups here instead of stdout")
+    args = parser.parse_args()
+
+    with metrics.run("find_duplicates", args):
+        with metrics.span("analysis"):
+            groups = detect_duplicates(table_from_args(args), fuzzy_contacts=args.fuzzy_contacts)
+        with metrics.span("output"):
+            out = open(args.output, "w") if args.output else sys.stdout
+            json.dump(groups, out, indent=2)
+            out.write("\n")
+    if args.output:
+        out.close()
+        counts = Counter(g["criteria"] for g in groups)
+        for criteria, count in counts.most_common():
+            print(f"{count:6d}  {criteria}")
@@ -1,7 +1,21 @@
+import argparse
+import csv
 import json
+import timeit
+from collections import Counter
 
-# A script to generate a compact representation of ZIP SCF (first 3 digits) to Area Code mappings.
+# A script to generate dense lookup tables keyed by ZIP SCF (first 3 digits): the
+# most common Area Code, and the major City/State, for each prefix.
 # Realistically, SCFs map to multiple area codes (overlays), but we will pick the primary/historical one.
+#
+# Both tables come out of one build in the same shape: the distinct values, each
+# stored once, and a 1000-slot array indexing into them, so a lookup is two
+# array reads with nothing to unpack at startup. The TypeScript goes to
+# src/utils/areaCodes.ts and src/utils/zipCodes.ts; the same tables go to
+# zip_lookup.py for the Python batch tools.
+#
+# The mappings below are the built-in defaults. Pass --area-codes and/or --zips
+# to build from a CSV or NDJSON dataset instead (see read_records).
 
 # This is a representative sample mapping.
 # For a full implementation, we'd use a large dataset, but to be "robust" we'll generate a sizable one.
@@ -161,54 +175,342 @@ data = {
     "991": "509", "992": "509", "993": "509", "994": "509",
     # AK
     "995": "907", "996": "907", "997": "907", "998": "907", "999": "907",
+}
 
-    # Default fallback for tests
-    "123": "555"
+# Major City/State for a prefix, used for Zip Code Enrichment to auto-fill address details.
+ZIP_PLACES = {
+    "100": ("New York", "NY"),
+    "900": ("Los Angeles", "CA"),
+    "606": ("Chicago", "IL"),
+    "770": ("Houston", "TX"),
+    "850": ("Phoenix", "AZ"),
+    "191": ("Philadelphia", "PA"),
+    "782": ("San Antonio", "TX"),
+    "921": ("San Diego", "CA"),
+    "752": ("Dallas", "TX"),
+    "787": ("Austin", "TX"),
+    "322": ("Jacksonville", "FL"),
+    "951": ("San Jose", "CA"),
+    "761": ("Fort Worth", "TX"),
+    "432": ("Columbus", "OH"),
+    "282": ("Charlotte", "NC"),
+    "462": ("Indianapolis", "IN"),
+    "941": ("San Francisco", "CA"),
+    "981": ("Seattle", "WA"),
+    "802": ("Denver", "CO"),
+    "200": ("Washington", "DC"),
+    "021": ("Boston", "MA"),
+    "372": ("Nashville", "TN"),
+    "891": ("Las Vegas", "NV"),
+    "482": ("Detroit", "MI"),
+    "972": ("Portland", "OR"),
+    "381": ("Memphis", "TN"),
+    "402": ("Louisville", "KY"),
+    "532": ("Milwaukee", "WI"),
+    "212": ("Baltimore", "MD"),
+    "303": ("Atlanta", "GA"),
+    "641": ("Kansas City", "MO"),
+    "331": ("Miami", "FL"),
 }
 
-# Group prefixes by Area Code to save space
-grouped = {}
-for prefix, ac in data.items():
-    if ac not in grouped:
-        grouped[ac] = []
-    grouped[ac].append(prefix)
+SLOTS = 1000
 
-# We will construct a compressed format: a single string per area code
-# "213": "900", "310": "902|903|904" etc.
+AREA_CODES_TS = "src/utils/areaCodes.ts"
+ZIP_CODES_TS = "src/utils/zipCodes.ts"
+LOOKUP_PY = "zip_lookup.py"
 
-content = """// A comprehensive mapping of 3-digit ZIP Code prefixes (SCFs) to their most common Area Code.
-// This is used as a fallback for 7-digit phone numbers when a ZIP code is available.
 
-const COMPRESSED_MAPPING: Record<string, string> = {
-"""
-for ac, prefixes in grouped.items():
-    content += f"  '{ac}': '{'|'.join(prefixes)}',\n"
+def read_records(path):
+    """
+    Stream rows from a CSV (with a header) or NDJSON file as dicts.
 
-content += """};
+    Rows name their key as `prefix` (3 digits) or `zip` (5 digits, reduced to
+    its prefix). Area-code rows carry `area_code`; ZIP rows carry `city` and
+    `state`.
+    """
+    with open(path, newline="") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
 
-let uncompressedMapping: Record<string, string> | null = null;
 
-const getUncompressedMapping = (): Record<string, string> => {
-  if (uncompressedMapping) return uncompressedMapping;
+def prefix_of(row):
+    key = str(row.get("prefix") or row.get("zip") or "").strip()
+    if not key.isdigit():
+        return None
+    if len(key) == 4:
+        # New England ZIPs lose their leading zero in spreadsheets.
+        key = key.zfill(5)
+    return key[:3] if len(key) in (3, 5) else None
 
-  uncompressedMapping = {};
-  for (const [areaCode, prefixesStr] of Object.entries(COMPRESSED_MAPPING)) {
-    const prefixes = prefixesStr.split('|');
-    for (const prefix of prefixes) {
-      uncompressedMapping[prefix] = areaCode;
-    }
-  }
 
-  return uncompressedMapping;
+def majority_by_prefix(rows, value_of):
+    """
+    The most common value per prefix.
+
+    A 5-digit dataset lists every ZIP, so a prefix sees many rows and usually
+    more than one value; the one most ZIPs agree on wins, ties to the first
+    seen. Memory is bounded by the 1000 prefixes, not by the rows.
+    """
+    votes = {}
+    for row in rows:
+        prefix = prefix_of(row)
+        value = value_of(row)
+        if prefix and value:
+            votes.setdefault(prefix, Counter())[value] += 1
+    return {prefix: counter.most_common(1)[0][0] for prefix, counter in votes.items()}
+
+
+def dense_table(mapping):
+    """
+    (values, slots): the distinct values, each stored once, and a 1000-slot list
+    where slot `int(prefix)` holds 1 + that prefix's value index, or 0.
+    """
+    values, index = [], {}
+    slots = [0] * SLOTS
+    for prefix in sorted(mapping):
+        value = mapping[prefix]
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        slots[int(prefix)] = index[value] + 1
+    return values, slots
+
+
+def slot_array_type(values):
+    return "Uint8Array" if len(values) < 256 else "Uint16Array"
+
+
+def format_slots(slots, indent):
+    return "\n".join(indent + ", ".join(str(s) for s in slots[i:i + 25]) + ","
+                     for i in range(0, len(slots), 25))
+
+
+def ts_string(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+AREA_CODES_TEMPLATE = """// Generated by generate_area_codes.py; edit the script, not this file.
+//
+// The most common Area Code for each 3-digit ZIP Code prefix (SCF).
+// This is used as a fallback for 7-digit phone numbers when a ZIP code is available.
+//
+// A ZIP's prefix is its slot in AREA_CODE_SLOTS, which holds 1 + an index into
+// AREA_CODES (0 means no mapping). A lookup is two array reads; there is no
+// table to build on first use.
+
+const AREA_CODES: readonly string[] = [
+%(values)s
+];
+
+const AREA_CODE_SLOTS = new %(array)s([
+%(slots)s
+]);
+
+/** The slot for a ZIP's 3-digit prefix, or -1 when it does not start with three digits. */
+export const zipPrefixSlot = (zip: string): number => {
+  const a = zip.charCodeAt(0) - 48;
+  const b = zip.charCodeAt(1) - 48;
+  const c = zip.charCodeAt(2) - 48;
+  if (!(a >= 0 && a <= 9 && b >= 0 && b <= 9 && c >= 0 && c <= 9)) return -1;
+  return a * 100 + b * 10 + c;
 };
 
 export const getAreaCodeFromZip = (zip: string): string | null => {
   if (!zip || zip.length < 3) return null;
-  const prefix = zip.substring(0, 3);
-  const mapping = getUncompressedMapping();
-  return mapping[prefix] || null;
+  const slot = zipPrefixSlot(zip);
+  if (slot < 0) return null;
+  const entry = AREA_CODE_SLOTS[slot];
+  return entry ? AREA_CODES[entry - 1] : null;
 };
 """
 
-with open("src/utils/areaCodes.ts", "w") as f:
-    f.write(content)
+ZIP_CODES_TEMPLATE = """// Generated by generate_area_codes.py; edit the script, not this file.
+//
+// The major City/State for each 3-digit ZIP Code prefix.
+// Used for Zip Code Enrichment to auto-fill address details.
+
+import { zipPrefixSlot } from './areaCodes';
+
+export interface LocationData {
+  city: string;
+  state: string;
+}
+
+const PLACES: readonly LocationData[] = [
+%(values)s
+];
+
+// Slot = the ZIP's 3-digit prefix; value = 1 + an index into PLACES, or 0.
+const PLACE_SLOTS = new %(array)s([
+%(slots)s
+]);
+
+export const enrichZipCode = (zip: string): LocationData | null => {
+  if (!zip || zip.length < 3) return null;
+  const slot = zipPrefixSlot(zip);
+  if (slot < 0) return null;
+  const entry = PLACE_SLOTS[slot];
+  return entry ? PLACES[entry - 1] : null;
+};
+
+export const enrichZipCodeAsync = async (zip: string): Promise<LocationData | null> => {
+  if (!zip || zip.length !== 5) return null;
+
+  try {
+    const response = await fetch(`https://api.zippopotam.us/us/${zip}`);
+    if (!response.ok) {
+      return null;
+    }
+
+    const data = await response.json();
+    if (data.places && data.places.length > 0) {
+      return {
+        city: data.places[0]['place name'],
+        state: data.places[0]['state abbreviation']
+      };
+    }
+    return null;
+  } catch (error) {
+    return null;
+  }
+};
+"""
+
+LOOKUP_TEMPLATE = '''# Generated by generate_area_codes.py; edit the script, not this file.
+#
+# The same ZIP-prefix tables as src/utils/areaCodes.ts and src/utils/zipCodes.ts,
+# for the Python batch tools. Slot = the ZIP's 3-digit prefix; value = 1 + an
+# index into the value tuple, or 0 for no mapping.
+
+AREA_CODES = (
+%(area_values)s
+)
+
+AREA_CODE_SLOTS = (
+%(area_slots)s
+)
+
+PLACES = (
+%(place_values)s
+)
+
+PLACE_SLOTS = (
+%(place_slots)s
+)
+
+
+def zip_prefix_slot(zip_code):
+    """The slot for a ZIP's 3-digit prefix, or -1 when it does not start with three digits."""
+    prefix = zip_code[:3]
+    if len(prefix) != 3 or not prefix.isascii() or not prefix.isdigit():
+        return -1
+    return int(prefix)
+
+
+def area_code_from_zip(zip_code):
+    if not zip_code or len(zip_code) < 3:
+        return None
+    slot = zip_prefix_slot(zip_code)
+    if slot < 0:
+        return None
+    entry = AREA_CODE_SLOTS[slot]
+    return AREA_CODES[entry - 1] if entry else None
+
+
+def enrich_zip_code(zip_code):
+    """(city, state) for a ZIP's prefix, or None."""
+    if not zip_code or len(zip_code) < 3:
+        return None
+    slot = zip_prefix_slot(zip_code)
+    if slot < 0:
+        return None
+    entry = PLACE_SLOTS[slot]
+    return PLACES[entry - 1] if entry else None
+'''
+
+
+def render_area_codes_ts(values, slots):
+    return AREA_CODES_TEMPLATE % {
+        "values": "\n".join(f"  {ts_string(v)}," for v in values),
+        "array": slot_array_type(values),
+        "slots": format_slots(slots, "  "),
+    }
+
+
+def render_zip_codes_ts(values, slots):
+    return ZIP_CODES_TEMPLATE % {
+        "values": "\n".join(f"  {{ city: {ts_string(city)}, state: {ts_string(state)} }},"
+                            for city, state in values),
+        "array": slot_array_type(values),
+        "slots": format_slots(slots, "  "),
+    }
+
+
+def render_lookup_py(area_values, area_slots, place_values, place_slots):
+    return LOOKUP_TEMPLATE % {
+        "area_values": "\n".join(f"    {v!r}," for v in area_values),
+        "area_slots": format_slots(area_slots, "    "),
+        "place_values": "\n".join(f"    {v!r}," for v in place_values),
+        "place_slots": format_slots(place_slots, "    "),
+    }
+
+
+def report(outputs, area_values, place_values, lookup_module):
+    """Print what was written and how fast the Python lookups run."""
+    print(f"{len(area_values)} area codes, {len(place_values)} places, {SLOTS} slots each")
+    for path, content in outputs:
+        print(f"  {path}: {len(content.encode()):,} bytes")
+
+    namespace = {}
+    exec(compile(lookup_module, LOOKUP_PY, "exec"), namespace)
+    zips = [f"{i:03d}01" for i in range(SLOTS)]
+    runs = 50
+    for name in ("area_code_from_zip", "enrich_zip_code"):
+        fn = namespace[name]
+        seconds = timeit.timeit(lambda: [fn(z) for z in zips], number=runs)
+        print(f"  {name}: {seconds / (runs * len(zips)) * 1e9:.0f} ns per lookup")
+
+
+def area_code_of(row):
+    return str(row.get("area_code") or "").strip() or None
+
+
+def place_of(row):
+    city = (row.get("city") or "").strip()
+    state = (row.get("state") or "").strip().upper()
+    return (city, state) if city and state else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the ZIP-prefix lookup tables.")
+    parser.add_argument("--area-codes", metavar="FILE",
+                        help="CSV/NDJSON of prefix or zip, and area_code (default: the built-in map)")
+    parser.add_argument("--zips", metavar="FILE",
+                        help="CSV/NDJSON of prefix or zip, city and state (default: the built-in map)")
+    args = parser.parse_args()
+
+    area_map = majority_by_prefix(read_records(args.area_codes), area_code_of) if args.area_codes else data
+    place_map = majority_by_prefix(read_records(args.zips), place_of) if args.zips else ZIP_PLACES
+
+    area_values, area_slots = dense_table(area_map)
+    place_values, place_slots = dense_table(place_map)
+    lookup_module = render_lookup_py(area_values, area_slots, place_values, place_slots)
+
+    outputs = [
+        (AREA_CODES_TS, render_area_codes_ts(area_values, area_slots)),
+        (ZIP_CODES_TS, render_zip_codes_ts(place_values, place_slots)),
+        (LOOKUP_PY, lookup_module),
+    ]
+    for path, content in outputs:
+        with open(path, "w") as f:
+            f.write(content)
+
+    report(outputs, area_values, place_values, lookup_module)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from zip_lookup import PLACE_SLOTS, PLACES, area_code_from_zip
+
+# A script to generate a synthetic directory at production sizes: people in
+# households with contacts, the events of mock-api/data.js, and a year of weekly
+# check-ins. The same seed and end date always give the same directory, byte for
+# byte, so a benchmark run can be repeated against exactly the same data.
+#
+# Everything streams. People are written as they are made; check-ins are drawn a
+# week at a time from a compact per-person attendance profile, so a 500k-person
+# directory with millions of check-ins never sits in memory.
+#
+# Output is NDJSON (people.ndjson, events.ndjson, check_ins.ndjson), which
+# check_api.py --input and the other tools read, or chunked JS modules with an
+# index.js exporting `people`, `events` and `checkIns` like data.js, for the mock
+# API to serve:
+#
+#   python generate_directory.py --people 100000 --format js --output /tmp/dir100k
+#   MOCK_DATA=/tmp/dir100k/index.js node mock-api/server.js
+#
+# The mock API holds the whole directory as JS objects, and a year of check-ins
+# for 100k people (4.2M of them) does not fit in Node's default heap. Unless
+# --weeks says otherwise, JS output keeps to the weeks that fit in JS_CHECK_INS.
+
+DEFAULT_PEOPLE = 1000
+DEFAULT_SEED = 1
+DEFAULT_WEEKS = 52
+JS_CHUNK = 50000
+JS_CHECK_INS = 1000000
+# Check-ins per person per week at the default rates, to size --weeks for JS.
+CHECK_INS_PER_WEEK = 0.8
+
+# The anomalies the tools look for, as a share of households (child_older,
+# spouse_gap, split_household, missing_zip) or of adults (bad_phone, bad_email,
+# duplicate). Defaults follow data.js where it has one.
+ANOMALY_RATES = {
+    "child_older": 0.05,
+    "spouse_gap": 0.05,
+    "split_household": 0.05,
+    "missing_zip": 0.05,
+    "bad_phone": 0.15,
+    "bad_email": 0.05,
+    "duplicate": 0.02,
+}
+
+# Share of households that are newcomers, who only start attending part way
+# through the year and mostly drift off again (the funnel in data.js).
+NEWCOMER_RATE = 0.05
+
+EVENTS = [
+    {"id": "1", "type": "Event", "attributes": {"name": "Friday Night Live", "frequency": "weekly"}},
+    {"id": "2", "type": "Event", "attributes": {"name": "Sunday Kids Church", "frequency": "weekly"}},
+    {"id": "3", "type": "Event", "attributes": {"name": "Sunday Worship Service", "frequency": "weekly"}},
+    {"id": "4", "type": "Event", "attributes": {"name": "Kids Ministry Team", "frequency": "weekly"}},
+    {"id": "5", "type": "Event", "attributes": {"name": "Greeter Team", "frequency": "weekly"}},
+]
+
+# (event id, day offset from Sunday, hour, minute, jitter in minutes, kind)
+FRIDAY_KIDS = ("1", 5, 19, 0, 15, "Regular")
+SUNDAY_KIDS = ("2", 0, 10, 0, 20, "Regular")
+WORSHIP = ("3", 0, 9, 0, 15, "Regular")
+SERVING = {4: ("4", 0, 8, 30, 10, "Volunteer"), 5: ("5", 0, 8, 30, 10, "Volunteer")}
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+    "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore",
+    "Jackson", "Martin", "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+    "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres",
+    "Nguyen", "Hill", "Flores", "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell",
+    "Mitchell", "Carter", "Roberts", "Gomez", "Phillips", "Evans", "Turner", "Diaz", "Parker",
+    "Cruz", "Edwards", "Collins", "Reyes", "Stewart", "Morris", "Morales", "Murphy", "Cook",
+    "Rogers", "Gutierrez", "Ortiz", "Morgan", "Cooper", "Peterson", "Bailey", "Reed", "Kelly",
+    "Howard", "Ramos", "Kim", "Cox", "Ward", "Richardson", "Watson", "Brooks", "Chavez", "Wood",
+    "James", "Bennett", "Gray", "Mendoza", "Ruiz", "Hughes", "Price", "Alvarez", "Castillo",
+    "Sanders", "Patel", "Myers", "Long", "Ross", "Foster", "Jimenez", "McDonald", "MacLeod",
+]
+FEMALE_NAMES = [
+    "Emma", "Olivia", "Ava", "Isabella", "Sophia", "Charlotte", "Mia", "Amelia", "Harper", "Evelyn",
+    "Abigail", "Emily", "Elizabeth", "Sofia", "Avery", "Ella", "Scarlett", "Grace", "Chloe",
+    "Victoria", "Riley", "Aria", "Lily", "Aubrey", "Zoey", "Penelope", "Lillian", "Addison",
+    "Layla", "Natalie", "Camila", "Hannah", "Brooklyn", "Zoe", "Nora", "Leah", "Savannah",
+    "Audrey", "Claire", "Eleanor", "Skylar", "Ellie", "Samantha", "Stella", "Paisley", "Violet",
+    "Mila", "Allison", "Alexa", "Anna", "Linda", "Sarah", "Maria", "Susan", "Karen", "Nancy",
+]
+MALE_NAMES = [
+    "Liam", "Noah", "Oliver", "Elijah", "William", "James", "Benjamin", "Lucas", "Henry", "Alexander",
+    "Mason", "Michael", "Ethan", "Daniel", "Jacob", "Logan", "Jackson", "Levi", "Sebastian",
+    "Mateo", "Jack", "Owen", "Theodore", "Aiden", "Samuel", "Joseph", "John", "David", "Wyatt",
+    "Matthew", "Luke", "Asher", "Carter", "Julian", "Grayson", "Leo", "Jayden", "Gabriel",
+    "Isaac", "Lincoln", "Anthony", "Hudson", "Dylan", "Ezra", "Thomas", "Charles", "Christopher",
+    "Jaxon", "Maverick", "Josiah", "Isaiah", "Andrew", "Mark", "Robert", "Richard", "Paul",
+]
+STREETS = [
+    "Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Pine Ct", "Elm St", "Washington Blvd",
+    "Lake Rd", "Hill St", "Park Ave", "Sunset Blvd", "River Rd", "Church St", "Walnut St",
+    "Highland Ave", "Forest Dr", "Meadow Ln", "Spring St", "Willow Way", "Chestnut St",
+]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "icloud.com", "hotmail.com", "comcast.net"]
+# Typos fixEmail in hygiene.ts is meant to catch.
+EMAIL_TYPOS = ["gmial.com", "gmailcom", "yaho.com", "hotmial.com", "outlok.com", "icloud"]
+
+# Every ZIP prefix that has a known city, with its city and state.
+ZIP_AREAS = [(f"{slot:03d}", PLACES[entry - 1]) for slot, entry in enumerate(PLACE_SLOTS) if entry]
+
+# Attendance profile kinds.
+ADULT, CHILD, NEWCOMER, ABSENT = 0, 1, 2, 3
+
+
+def last_sunday(day):
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def iso(moment):
+    return moment.isoformat(timespec="seconds")
+
+
+class Roster:
+    """
+    What the check-in draw needs about each person, one compact column each.
+
+    Profiles are recorded as people are generated and read back a week at a
+    time, so the person dicts themselves are never kept.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.kind = []
+        self.attend = []
+        self.serve = []
+        self.team = []
+        self.first_week = []
+        self.visits = []
+
+    def add(self, person_id, kind, attend=0.0, serve=0.0, team=0, first_week=0, visits=0):
+        self.ids.append(person_id)
+        self.kind.append(kind)
+        self.attend.append(attend)
+        self.serve.append(serve)
+        self.team.append(team)
+        self.first_week.append(first_week)
+        self.visits.append(visits)
+
+    def freeze(self):
+        self.kind = np.array(self.kind, dtype=np.int8)
+        self.attend = np.array(self.attend, dtype=np.float32)
+        self.serve = np.array(self.serve, dtype=np.float32)
+        self.team = np.array(self.team, dtype=np.int8)
+        self.first_week = np.array(self.first_week, dtype=np.int16)
+        self.visits = np.array(self.visits, dtype=np.int16)
+
+
+def make_phone(rng, area_code, malformed):
+    line = f"{rng.randint(200, 999)}{rng.randint(0, 9999):04d}"
+    if not malformed:
+        return f"+1{area_code}{line}"
+    return rng.choice([
+        f"{area_code}-{line[:3]}-{line[3:]}",  # 10 digits, not E.164
+        f"({area_code}) {line[:3]}-{line[3:]}",
+        f"{area_code}.{line[:3]}.{line[3:]}",
+        f"{line[:3]}-{line[3:]}",  # 7 digits; the ZIP supplies the area code
+        f"{line[:3]}-{line[3:5]}",  # too short to fix
+    ])
+
+
+def make_email(rng, first, last, malformed):
+    local = f"{first.lower()}.{last.lower()}{rng.randint(1, 999)}"
+    if not malformed:
+        return f"{local}@{rng.choice(EMAIL_DOMAINS)}"
+    return rng.choice([local, f"{local}@{rng.choice(EMAIL_TYPOS)}", f" {local.upper()}@gmail.com"])
+
+
+def misspell(rng, name):
+    """The name with one letter of the first name changed, or unchanged half the time."""
+    first, _, rest = name.partition(" ")
+    if len(first) < 4 or rng.random() < 0.5:
+        return name
+    i = rng.randrange(1, len(first))
+    first = first[:i] + rng.choice("aeiourstln") + first[i + 1:]
+    return f"{first} {rest}"
+
+
+def background_check(rng, end):
+    """An expiry date as data.js spreads them: 5% within 30 days, 5% lapsed, half valid, the rest none."""
+    r = rng.random()
+    if r < 0.05:
+        days = rng.randint(1, 30)
+    elif r < 0.10:
+        days = -rng.randint(1, 100)
+    elif r < 0.60:
+        days = rng.randint(31, 365)
+    else:
+        return None
+    return iso(datetime.combine(end + timedelta(days=days), datetime.min.time(), timezone.utc))
+
+
+def generate_people(rng, count, end, weeks, rates, roster, stats):
+    """
+    Yield `count` person resources, shaped like data.js's, household by household.
+
+    Household ids are the first adult's id, as in data.js. Every person is also
+    added to `roster` with the attendance profile check-ins are drawn from.
+    """
+    start = end - timedelta(weeks=weeks)
+    next_id = 1
+    made = 0
+
+    while made < count:
+        last = rng.choice(LAST_NAMES)
+        household_id = str(next_id)
+        prefix, (city, state) = rng.choice(ZIP_AREAS)
+        zip_code = f"{prefix}{rng.randint(0, 99):02d}"
+        area_code = area_code_from_zip(zip_code) or "555"
+        missing_zip = rng.random() < rates["missing_zip"]
+        address = {
+            "street": f"{rng.randint(100, 9999)} {rng.choice(STREETS)}",
+            "city": city,
+            "state": state,
+            "zip": "" if missing_zip else zip_code,
+            "location": "Home",
+        }
+        newcomer = rng.random() < NEWCOMER_RATE
+        adult_count = rng.randint(1, 2)
+        child_count = 0 if newcomer else rng.choice([0, 0, 1, 2, 2, 3, 4])
+        # Families attend together, so one household propensity, nudged per person.
+        household_attend = rng.betavariate(2.5, 1.5)
+        first_week = rng.randint(0, max(weeks - 4, 0)) if newcomer else 0
+        visits = rng.choice([1, 1, 1, 1, 2, 2, 2, 3, 3, rng.randint(4, 8)]) if newcomer else 0
+        anniversary = (f"{rng.randint(1985, end.year - 1)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                       if adult_count == 2 else None)
+        created = datetime.combine(start + timedelta(weeks=first_week), datetime.min.time(), timezone.utc) \
+            if newcomer else datetime(rng.randint(2005, end.year - 1), rng.randint(1, 12), 1, tzinfo=timezone.utc)
+        updated = datetime.combine(end - timedelta(days=rng.randint(0, 365)), datetime.min.time(),
+                                   timezone.utc) + timedelta(seconds=rng.randint(0, 86399))
+        updated = max(updated, created)
+
+        adult_years = [end.year - rng.randint(25, 65) for _ in range(adult_count)]
+        if adult_count == 2 and rng.random() < rates["spouse_gap"]:
+            adult_years[1] = adult_years[0] - rng.randint(41, 50)
+            stats["spouse_gap"] += 1
+        child_years = [end.year - rng.randint(1, 17) for _ in range(child_count)]
+        if child_count and rng.random() < rates["child_older"]:
+            adult_years[0], child_years[0] = child_years[0], adult_years[0]
+            stats["child_older"] += 1
+        split = child_count and rng.random() < rates["split_household"]
+        stats["split_household"] += bool(split)
+        stats["missing_zip"] += missing_zip
+
+        household = []
+        for year in adult_years:
+            first = rng.choice(FEMALE_NAMES if rng.random() < 0.5 else MALE_NAMES)
+            person_id = str(next_id)
+            next_id += 1
+            bad_phone = rng.random() < rates["bad_phone"]
+            bad_email = rng.random() < rates["bad_email"]
+            stats["bad_phone"] += bad_phone
+            stats["bad_email"] += bad_email
+            background = background_check(rng, end)
+            household.append({
+                "id": person_id,
+                "type": "Person",
+                "attributes": {
+                    "first_name": first,
+                    "last_name": last,
+                    "name": f"{first} {last}",
+                    "child": False,
+                    "grade": None,
+                    "birthdate": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    "background_check_expires_at": background,
+                    "anniversary": anniversary,
+                    "phone_numbers": [{"location": "Mobile", "number": make_phone(rng, area_code, bad_phone)}],
+                    "email_addresses": [{"location": "Home", "address": make_email(rng, first, last, bad_email)}],
+                    "addresses": [address],
+                    "avatar": f"https://i.pravatar.cc/150?u={person_id}",
+                    "household_id": household_id,
+                    "created_at": iso(created),
+                    "updated_at": iso(updated),
+                },
+            })
+            if newcomer:
+                roster.add(person_id, NEWCOMER, first_week=first_week, visits=visits)
+            else:
+                serves = rng.random() < 0.3
+                roster.add(person_id, ADULT,
+                           attend=min(1.0, household_attend * rng.uniform(0.8, 1.2)),
+                           serve=rng.betavariate(4, 2) if serves else 0.0,
+                           team=rng.choice((4, 5)) if serves else 0)
+
+        for year in child_years:
+            first = rng.choice(FEMALE_NAMES if rng.random() < 0.5 else MALE_NAMES)
+            person_id = str(next_id)
+            next_id += 1
+            age = end.year - year
+            household.append({
+                "id": person_id,
+                "type": "Person",
+                "attributes": {
+                    "first_name": first,
+                    "last_name": last,
+                    "name": f"{first} {last}",
+                    "child": True,
+                    "grade": age - 5 if 5 <= age <= 17 else None,
+                    "birthdate": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                    "household_id": f"{household_id}-split" if split else household_id,
+                    "addresses": [address],
+                    "avatar": f"https://i.pravatar.cc/150?u={person_id}",
+                    "created_at": iso(created),
+                    "updated_at": iso(updated),
+                },
+            })
+            roster.add(person_id, CHILD, attend=min(1.0, household_attend * rng.uniform(0.9, 1.1)))
+
+        for person in household:
+            if made >= count:
+                return
+            yield person
+            made += 1
+
+            attrs = person["attributes"]
+            if attrs["child"] or made >= count or rng.random() >= rates["duplicate"]:
+                continue
+            # A second record for the same adult, as a visitor card typed in
+            # again: no household, the same address and one contact in common.
+            person_id = str(next_id)
+            next_id += 1
+            name = misspell(rng, attrs["name"])
+            shares_email = rng.random() < 0.5
+            duplicate = {
+                "id": person_id,
+                "type": "Person",
+                "attributes": {
+                    "first_name": name.split(" ")[0],
+                    "last_name": attrs["last_name"],
+                    "name": name,
+                    "child": False,
+                    "grade": None,
+                    "birthdate": attrs["birthdate"],
+                    "phone_numbers": [] if shares_email else attrs["phone_numbers"],
+                    "email_addresses": attrs["email_addresses"] if shares_email else [],
+                    "addresses": attrs["addresses"],
+                    "avatar": f"https://i.pravatar.cc/150?u={person_id}",
+                    "household_id": None,
+                    "created_at": attrs["updated_at"],
+                    "updated_at": attrs["updated_at"],
+                },
+            }
+            roster.add(person_id, ABSENT)
+            stats["duplicate"] += 1
+            yield duplicate
+            made += 1
+
+
+def season(sunday):
+    """Attendance multiplier for a week: summer dips, Easter and Christmas peak."""
+    if sunday.month in (6, 7, 8):
+        return 0.8
+    if (sunday.month == 12 and 18 <= sunday.day <= 24) or (sunday.month == 4 and sunday.day <= 21):
+        return 1.15
+    return 1.0
+
+
+def generate_check_ins(seed, roster, end, weeks):
+    """
+    Yield check-ins oldest first, a week at a time, like data.js.
+
+    One week is skipped half way through, the retreat in data.js, so the
+    attendance charts have a gap to show.
+    """
+    draw = np.random.default_rng(seed)
+    start = last_sunday(end - timedelta(weeks=weeks))
+    retreat = weeks // 2
+    next_id = 1
+    ids = roster.ids
+    adults = roster.kind == ADULT
+    children = roster.kind == CHILD
+    newcomers = roster.kind == NEWCOMER
+    remaining = roster.visits.copy()
+
+    for week in range(weeks + 1):
+        sunday = start + timedelta(weeks=week)
+        if week == retreat or sunday > end:
+            continue
+        factor = season(sunday)
+        n = len(ids)
+
+        serving = adults & (draw.random(n) < roster.serve)
+        worship = adults & (draw.random(n) < roster.attend * factor)
+        # Newcomers come on consecutive Sundays from their first until their
+        # visits run out.
+        visiting = newcomers & (roster.first_week <= week) & (remaining > 0)
+        remaining[visiting] -= 1
+        worship |= visiting
+        sunday_kids = children & (draw.random(n) < roster.attend * factor * 0.9)
+        friday_kids = children & (draw.random(n) < roster.attend * factor * 0.6)
+
+        slots = [(np.flatnonzero(serving & (roster.team == team)), SERVING[team]) for team in SERVING]
+        slots += [(np.flatnonzero(worship), WORSHIP), (np.flatnonzero(sunday_kids), SUNDAY_KIDS),
+                  (np.flatnonzero(friday_kids), FRIDAY_KIDS)]
+        # Slots are drawn one event at a time; sort the week's batch so the
+        # stream, and the ids handed out along it, run oldest first.
+        batch = []
+        for rows, (event_id, day, hour, minute, jitter, kind) in slots:
+            base = datetime(sunday.year, sunday.month, sunday.day, hour, minute, tzinfo=timezone.utc) \
+                + timedelta(days=day)
+            if base.date() > end:
+                continue
+            offsets = draw.integers(-jitter, jitter + 1, size=len(rows))
+            for row, offset in zip(rows.tolist(), offsets.tolist()):
+                batch.append((base + timedelta(minutes=offset), row, event_id, kind))
+        batch.sort(key=lambda record: record[0])
+        for created_at, row, event_id, kind in batch:
+            yield {
+                "id": str(next_id),
+                "type": "CheckIn",
+                "attributes": {"created_at": iso(created_at), "kind": kind},
+                "relationships": {
+                    "person": {"data": {"type": "Person", "id": ids[row]}},
+                    "event": {"data": {"type": "Event", "id": event_id}},
+                },
+            }
+            next_id += 1
+
+
+def write_ndjson(directory, name, records):
+    """Write records one per line to `name`.ndjson; the files written."""
+    path = os.path.join(directory, f"{name}.ndjson")
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+    return [path]
+
+
+def write_js_chunks(directory, name, records):
+    """Write records as JS modules of JS_CHUNK each, `name`-0000.js onward; the files written."""
+    paths = []
+    f = None
+    in_chunk = 0
+    for record in records:
+        if f is None or in_chunk == JS_CHUNK:
+            if f:
+                f.write("];\n")
+                f.close()
+            paths.append(os.path.join(directory, f"{name}-{len(paths):04d}.js"))
+            f = open(paths[-1], "w")
+            f.write("export default [\n")
+            in_chunk = 0
+        f.write(json.dumps(record, separators=(",", ":")))
+        f.write(",\n")
+        in_chunk += 1
+    if f is None:
+        paths.append(os.path.join(directory, f"{name}-0000.js"))
+        f = open(paths[-1], "w")
+        f.write("export default [\n")
+    f.write("];\n")
+    f.close()
+    return paths
+
+
+def write_js_index(directory, chunks):
+    """index.js exporting what data.js exports, assembled from the chunks."""
+    lines = ["// Generated by generate_directory.py; regenerate rather than edit.", ""]
+    exports = []
+    for export, paths in chunks.items():
+        names = []
+        for path in paths:
+            names.append(f"{export}{len(names)}")
+            lines.append(f"import {names[-1]} from './{os.path.basename(path)}';")
+        exports.append(f"export const {export} = [].concat({', '.join(names)});")
+    path = os.path.join(directory, "index.js")
+    with open(path, "w") as f:
+        f.write("\n".join(lines + [""] + exports) + "\n")
+    return path
+
+
+def parse_rate(value):
+    name, sep, rate = value.partition("=")
+    if not sep or name not in ANOMALY_RATES:
+        raise argparse.ArgumentTypeError(f"expected NAME=RATE with NAME one of {', '.join(ANOMALY_RATES)}")
+    try:
+        rate = float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {rate}")
+    if not 0 <= rate <= 1:
+        raise argparse.ArgumentTypeError(f"rate must be between 0 and 1: {rate}")
+    return name, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic directory.")
+    parser.add_argument("--people", type=int, default=DEFAULT_PEOPLE, help="how many people (1k to 500k is typical)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--weeks", type=int, default=None,
+                        help=f"weeks of check-ins (default: {DEFAULT_WEEKS}, or as many as fit in "
+                             f"{JS_CHECK_INS:,} check-ins with --format js)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None,
+                        help="last day of check-ins, YYYY-MM-DD (default: the most recent Sunday); "
+                             "fix it for output that never changes")
+    parser.add_argument("--rate", action="append", type=parse_rate, default=[],
+                        help=f"override an anomaly rate, NAME=RATE; names: {', '.join(ANOMALY_RATES)}")
+    parser.add_argument("--format", choices=["ndjson", "js"], default="ndjson")
+    parser.add_argument("--output", required=True, help="directory to write into")
+    args = parser.parse_args()
+
+    rates = {**ANOMALY_RATES, **dict(args.rate)}
+    weeks = args.weeks
+    if weeks is None:
+        weeks = DEFAULT_WEEKS
+        if args.format == "js":
+            weeks = max(1, min(weeks, int(JS_CHECK_INS / (max(args.people, 1) * CHECK_INS_PER_WEEK))))
+    end = args.end or last_sunday(date.today())
+    os.makedirs(args.output, exist_ok=True)
+    write = write_ndjson if args.format == "ndjson" else write_js_chunks
+
+    started = time.perf_counter()
+    rng = random.Random(args.seed)
+    roster = Roster()
+    stats = dict.fromkeys(ANOMALY_RATES, 0)
+
+    counts = {}
+
+    def counted(name, records):
+        counts[name] = 0
+        for record in records:
+            counts[name] += 1
+            yield record
+
+    files = {
+        "people": write(args.output, "people",
+                        counted("people", generate_people(rng, args.people, end, weeks, rates, roster, stats))),
+        "events": write(args.output, "events", counted("events", EVENTS)),
+    }
+    roster.freeze()
+    files["checkIns" if args.format == "js" else "check_ins"] = write(
+        args.output, "checkIns" if args.format == "js" else "check_ins",
+        counted("check-ins", generate_check_ins(args.seed, roster, end, weeks)))
+    if args.format == "js":
+        files["index"] = [write_js_index(args.output, files)]
+
+    size = sum(os.path.getsize(p) for paths in files.values() for p in paths)
+    print(f"{counts['people']:,} people, {counts['events']} events, {counts['check-ins']:,} check-ins "
+          f"over {weeks} weeks through {end.isoformat()} (seed {args.seed})")
+    print("Anomalies: " + ", ".join(f"{name} {count:,}" for name, count in stats.items()))
+    print(f"Wrote {sum(len(p) for p in files.values())} file(s), {size / 1024 / 1024:.1f} MiB, "
+          f"to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
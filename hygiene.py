@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import metrics
+from check_api import add_source_arguments, people_from_args
+from find_duplicates import bounded_levenshtein
+from zip_lookup import area_code_from_zip
+
+# The rules in src/utils/hygiene.ts, for the whole directory at once instead of
+# one Review Mode card at a time.
+#
+# Each function below is the TypeScript one of the same name and gives the same
+# answer; hygiene.test.ts is the specification. Patterns are compiled with
+# re.ASCII where the JavaScript ones are ASCII-only (`\d`, `\b`), and `\Z`
+# stands in for a JavaScript `$`, which never matches before a final newline.
+#
+# The batch applies what Review Mode's "Fix All" applies, to the same primary
+# email, address and phone `transformPerson` reads, and writes each proposal in
+# the changeset shape apply_changes.py sends. Two differences: people without a
+# birthdate are included (Review Mode only ever sees people it can grade), and
+# an address is only proposed when its street actually changes.
+#
+# Work is split across processes in chunks; each process keeps its own
+# memoized domain corrections, which is where the time would otherwise go.
+
+UPPER_CASE_SUFFIXES = frozenset(["II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "MD", "DDS", "PHD"])
+MIXED_CASE_SUFFIXES = {s.lower(): s for s in ["Jr", "Sr", "Jr.", "Sr."]}
+NAME_DELIMITER = re.compile(r"([\s\-'])")
+HAS_LETTER = re.compile(r"[a-zA-Z]")
+
+KNOWN_DOMAINS = (
+    "gmail.com", "yahoo.com", "hotmail.com", "aol.com",
+    "outlook.com", "icloud.com", "msn.com", "live.com",
+    "me.com", "mac.com", "comcast.net", "sbcglobal.net",
+)
+# Real providers a letter away from a known one.
+VALID_PROVIDERS_TO_IGNORE = frozenset(["mail.com", "ymail.com", "mac.com", "me.com"])
+EMAIL = re.compile(r"[^\s@]+@[^\s@]+\.[^\s@]+")
+WHITESPACE = re.compile(r"\s+")
+
+ZIP = re.compile(r"\d{5}(-\d{4})?", re.ASCII)
+STREET_SUFFIXES = {
+    "st": "Street", "rd": "Road", "ave": "Avenue", "blvd": "Boulevard", "dr": "Drive",
+    "ln": "Lane", "ct": "Court", "pl": "Place", "ter": "Terrace", "cir": "Circle",
+}
+# One pass for all ten abbreviations: no expansion can create another's match.
+STREET_ABBREVIATION = re.compile(r"\b(" + "|".join(STREET_SUFFIXES) + r")\.?(?=\s|\Z)", re.ASCII | re.IGNORECASE)
+STREET_WORD = re.compile(r"\b(" + "|".join(STREET_SUFFIXES.values()) + r")\b", re.ASCII | re.IGNORECASE)
+
+E164_US = re.compile(r"\+1\d{10}", re.ASCII)
+NON_DIGIT = re.compile(r"\D", re.ASCII)
+
+RULES = ("name", "email", "address", "phone")
+CHUNK = 2000
+
+
+def detect_name_anomaly(name):
+    trimmed = (name or "").strip()
+    if not trimmed:
+        return False
+    all_upper = trimmed == trimmed.upper() and bool(HAS_LETTER.search(trimmed))
+    return all_upper or trimmed == trimmed.lower()
+
+
+def _fix_name_token(token):
+    if NAME_DELIMITER.fullmatch(token):
+        return token
+    upper = token.upper()
+    if upper in UPPER_CASE_SUFFIXES:
+        return upper
+    if token in MIXED_CASE_SUFFIXES:
+        return MIXED_CASE_SUFFIXES[token]
+    if token.startswith("mc") and len(token) > 2:
+        return "Mc" + token[2].upper() + token[3:]
+    if token.startswith("mac") and len(token) > 3:
+        return "Mac" + token[3].upper() + token[4:]
+    return token[:1].upper() + token[1:]
+
+
+def fix_name(name):
+    if not name:
+        return ""
+    return "".join(_fix_name_token(t) for t in NAME_DELIMITER.split(name.lower()))
+
+
+def validate_email(email):
+    return bool(email) and EMAIL.fullmatch(email) is not None
+
+
+def detect_email_anomaly(email):
+    return bool(email) and not validate_email(email)
+
+
+@lru_cache(maxsize=65536)
+def _fix_domain(domain, allow_fuzzy):
+    # Basic fallback for a missing period before com/net/org.
+    for tld in ("com", "net", "org"):
+        if domain.endswith(tld) and not domain.endswith("." + tld):
+            domain = domain[:-3] + "." + tld
+            break
+
+    # Fuzzy only past four characters, so aol.com is never "corrected", and
+    # never for a known provider or a regional TLD.
+    if not allow_fuzzy or len(domain) <= 4:
+        return domain
+    if domain in VALID_PROVIDERS_TO_IGNORE or len(domain.split(".")) > 2:
+        return domain
+    # A short domain may move one edit, a long one two (box.com is two from aol.com).
+    threshold = 1 if len(domain) <= 8 else 2
+    best, best_distance = domain, threshold + 1
+    for known in KNOWN_DOMAINS:
+        distance = bounded_levenshtein(domain, known, threshold)
+        if distance < best_distance:
+            best, best_distance = known, distance
+    return best
+
+
+def fix_email(email, allow_fuzzy=True):
+    if not email:
+        return ""
+    fixed = WHITESPACE.sub("", email.strip()).lower()
+    parts = fixed.split("@")
+    if len(parts) == 2:
+        fixed = f"{parts[0]}@{_fix_domain(parts[1], allow_fuzzy)}"
+    return fixed
+
+
+def validate_address(address):
+    if not address:
+        return False
+    if not all(address.get(k) for k in ("street", "city", "state", "zip")):
+        return False
+    return ZIP.fullmatch(address["zip"]) is not None
+
+
+def detect_address_anomaly(address):
+    return bool(address) and not validate_address(address)
+
+
+def fix_address(street):
+    if not street:
+        return ""
+    fixed = STREET_ABBREVIATION.sub(lambda m: STREET_SUFFIXES[m.group(1).lower()], street)
+    return STREET_WORD.sub(lambda m: m.group(0).capitalize(), fixed)
+
+
+def validate_phone(phone):
+    return bool(phone) and E164_US.fullmatch(phone) is not None
+
+
+def detect_phone_anomaly(phone):
+    return bool(phone) and not validate_phone(phone)
+
+
+def fix_phone(phone, zip_code=None):
+    if not phone:
+        return ""
+    digits = NON_DIGIT.sub("", phone)
+    if len(digits) == 7 and zip_code:
+        area_code = area_code_from_zip(zip_code)
+        if area_code:
+            return f"+1{area_code}{digits}"
+    if len(digits) == 10:
+        return f"+1{digits}"
+    if len(digits) == 11 and digits.startswith("1"):
+        return f"+{digits}"
+    return phone
+
+
+def propose(person, rules=RULES, fuzzy_domains=False):
+    """
+    The fix "Fix All" would make to one person resource: (change or None, rule hits).
+
+    A hit is counted when a rule changes something, and `<rule>.unfixed` when
+    it finds an anomaly it cannot repair.
+    """
+    attributes = person.get("attributes") or {}
+    first = (attributes.get("first_name") or "").strip()
+    last = (attributes.get("last_name") or "").strip()
+    display = attributes.get("name") or f"{first} {last}".strip() or "Unknown"
+    email = ((attributes.get("email_addresses") or [{}])[0] or {}).get("address")
+    address = (attributes.get("addresses") or [None])[0]
+    phone = ((attributes.get("phone_numbers") or [{}])[0] or {}).get("number")
+
+    update, original, hits = {}, {}, []
+
+    if "name" in rules and detect_name_anomaly(display):
+        fixed = fix_name(display).split(" ")
+        new_first, new_last = fixed[0], " ".join(fixed[1:])
+        if new_first != first:
+            update["first_name"], original["first_name"] = new_first, first
+        if new_last != last:
+            update["last_name"], original["last_name"] = new_last, last
+        hits.append("name" if new_first != first or new_last != last else "name.unfixed")
+
+    if "email" in rules and email:
+        anomaly = detect_email_anomaly(email)
+        if anomaly or fuzzy_domains:
+            fixed = fix_email(email, allow_fuzzy=fuzzy_domains)
+            if fixed != email and validate_email(fixed):
+                update["email_addresses"] = [{"address": fixed, "location": "Home"}]
+                original["email"] = email
+                hits.append("email" if anomaly else "email.domain")
+            elif anomaly:
+                hits.append("email.unfixed")
+
+    if "address" in rules and address and detect_address_anomaly(address):
+        street = fix_address(address.get("street"))
+        if street and street != address.get("street"):
+            fields = {k: address.get(k) for k in ("street", "city", "state", "zip")}
+            update["addresses"] = [{**fields, "street": street, "location": "Home"}]
+            original["street"] = address.get("street")
+            hits.append("address")
+        else:
+            hits.append("address.unfixed")
+
+    if "phone" in rules and phone and detect_phone_anomaly(phone):
+        fixed = fix_phone(phone, (address or {}).get("zip"))
+        if fixed != phone and validate_phone(fixed):
+            update["phone_numbers"] = [{"number": fixed, "location": "Mobile"}]
+            original["phone"] = phone
+            hits.append("phone.area_code" if len(NON_DIGIT.sub("", phone)) == 7 else "phone")
+        else:
+            hits.append("phone.unfixed")
+
+    if not update:
+        return None, hits
+    return {"id": person["id"], "attributes": update, "original": original}, hits
+
+
+def propose_chunk(people, rules=RULES, fuzzy_domains=False):
+    """Proposals for a list of people, and how often each rule fired."""
+    changes, hits = [], Counter()
+    for person in people:
+        change, fired = propose(person, rules, fuzzy_domains)
+        hits.update(fired)
+        if change:
+            changes.append(change)
+    return changes, hits
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def propose_all(people, rules=RULES, fuzzy_domains=False, workers=None):
+    """
+    Yield (changes, hits) per chunk of `people`, in input order.
+
+    With more than one worker, chunks go to a process pool, at most two per
+    worker in flight, so a streamed directory is never held whole.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunked(people, CHUNK):
+            yield propose_chunk(chunk, rules, fuzzy_domains)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = []
+        for chunk in chunked(people, CHUNK):
+            window.append(pool.submit(propose_chunk, chunk, rules, fuzzy_domains))
+            if len(window) >= 2 * workers:
+                yield window.pop(0).result()
+        while window:
+            yield window.pop(0).result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose hygiene.ts fixes for the whole directory.")
+    add_source_arguments(parser)
+    parser.add_argument("--rules", default=",".join(RULES),
+                        help=f"comma-separated rules to run (default: {','.join(RULES)})")
+    parser.add_argument("--fuzzy-domains", action="store_true",
+                        help="also correct well-formed emails whose domain is a typo of a known provider")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: one per CPU)")
+    parser.add_argument("--output", help="write the changeset here instead of stdout")
+    args = parser.parse_args()
+
+    rules = tuple(r.strip() for r in args.rules.split(",") if r.strip())
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        parser.error(f"unknown rule(s): {', '.join(sorted(unknown))}")
+
+    totals = Counter()
+    proposed = 0
+    with metrics.run("hygiene", args):
+        out = open(args.output, "w") if args.output else sys.stdout
+        for changes, hits in propose_all(people_from_args(args), rules, args.fuzzy_domains, args.workers):
+            totals.update(hits)
+            proposed += len(changes)
+            with metrics.span("output"):
+                for change in changes:
+                    out.write(json.dumps(change) + "\n")
+        if args.output:
+            out.close()
+
+    print(f"{proposed:,} people with proposed fixes", file=sys.stderr)
+    for rule, count in sorted(totals.items()):
+        print(f"{count:8d}  {rule}", file=sys.stderr)
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from check_api import API_TARGET, PEOPLE_INCLUDES, resolve_link
+
+# Replays what one Locus tab asks the API for, for many users at once, to see
+# what a shared pcomirror (or the mock) does when the whole staff logs in on
+# Sunday morning.
+#
+# A simulated user does what App.tsx and the reports do, in order:
+#
+#   1. checkApiVersion: one `per_page=1` probe.
+#   2. fetchAllPeople: five pages at a time, then "Load more" until the
+#      directory ends, pausing in between.
+#   3. The dashboard: events and fetchRecentCheckIns (up to 100 pages) together.
+#   4. Ghost Protocol: fetchCheckInCount for every ghost at once, the N+1.
+#
+# Each user has its own connection pool, capped like a browser's per-host pool,
+# and handles 429s the way src/utils/api.ts does: one backoff shared by all of
+# that user's requests, honouring Retry-After, up to three retries.
+
+PEOPLE_PAGE_BATCH = 5  # fetchAllPeople(auth, url, 5)
+CHECK_IN_PAGES = 100  # fetchRecentCheckIns default
+PER_PAGE = 100
+DEFAULT_GHOSTS = 70
+DEFAULT_USERS = 10
+DEFAULT_THINK = 1.0
+
+# Browsers open at most six connections to one host over HTTP/1.1.
+BROWSER_CONNECTIONS = 6
+MAX_RETRIES = 3
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+COUNT_PATH = re.compile(r"^/check-ins/v2/people/[^/]+$")
+
+
+def endpoint_of(url):
+    """The name a request is reported under."""
+    parts = urlsplit(url)
+    if parts.path == "/people/v2/people":
+        return "people (probe)" if "per_page=1&" in parts.query + "&" else "people"
+    if COUNT_PATH.match(parts.path):
+        return "check-in count"
+    return {"/check-ins/v2/check_ins": "check-ins", "/check-ins/v2/events": "events"}.get(parts.path, parts.path)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.throttled = 0
+        self.bytes = 0
+
+    def summary(self, seconds):
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else None
+
+        histogram = [0] * (len(BUCKETS_MS) + 1)
+        for ms in ordered:
+            histogram[bisect_left(BUCKETS_MS, ms)] += 1
+        return {
+            "requests": len(ordered),
+            "per_second": len(ordered) / seconds if seconds else 0.0,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "bytes": self.bytes,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": ordered[-1] if ordered else None,
+            "histogram": histogram,
+        }
+
+
+class SimulatedUser:
+    """One browser tab's worth of requests, sharing one pool and one backoff."""
+
+    def __init__(self, session, base, stats, rng):
+        self.session = session
+        self.base = base
+        self.stats = stats
+        self.rng = rng
+        self.backoff = None
+
+    async def get(self, url):
+        """GET and decode, recording every attempt; None when the request failed."""
+        url = resolve_link(self.base, url)
+        name = endpoint_of(url)
+        stats = self.stats.setdefault(name, EndpointStats())
+        for attempt in range(MAX_RETRIES + 1):
+            if self.backoff:
+                await self.backoff
+            started = time.perf_counter()
+            try:
+                async with self.session.get(url) as response:
+                    body = await response.read()
+                    stats.latencies.append((time.perf_counter() - started) * 1000)
+                    # Wire size where the server says it; a compressed body is
+                    # smaller on the wire than once decoded.
+                    stats.bytes += response.content_length or len(body)
+                    if response.status == 429 and attempt < MAX_RETRIES:
+                        stats.throttled += 1
+                        retry_after = response.headers.get("Retry-After", "")
+                        wait = int(retry_after) if retry_after.isdigit() else 2 ** attempt
+                        if not self.backoff:
+                            self.backoff = asyncio.ensure_future(self._back_off(wait))
+                        continue
+                    if response.status >= 400:
+                        stats.errors += 1
+                        stats.throttled += response.status == 429
+                        return None
+                    return json.loads(body)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                stats.latencies.append((time.perf_counter() - started) * 1000)
+                stats.errors += 1
+                return None
+        return None
+
+    async def _back_off(self, seconds):
+        await asyncio.sleep(seconds)
+        self.backoff = None
+
+    async def follow(self, url, max_pages):
+        """Pages from `url` along `links.next`: (pages, the next link or None)."""
+        pages = []
+        while url and len(pages) < max_pages:
+            page = await self.get(url)
+            if page is None:
+                return pages, None
+            pages.append(page)
+            url = (page.get("links") or {}).get("next")
+        return pages, url
+
+    async def think(self, mean):
+        if mean > 0:
+            await asyncio.sleep(self.rng.uniform(0, 2 * mean))
+
+    async def run(self, think, ghosts, max_people_pages):
+        await self.get("/people/v2/people?per_page=1")
+        await self.think(think)
+
+        ids = []
+        url = f"/people/v2/people?per_page={PER_PAGE}&include={PEOPLE_INCLUDES}"
+        fetched = 0
+        while url and fetched < max_people_pages:
+            pages, url = await self.follow(url, min(PEOPLE_PAGE_BATCH, max_people_pages - fetched))
+            fetched += len(pages)
+            ids += [p["id"] for page in pages for p in page.get("data", [])]
+            if url:
+                await self.think(think)  # "Load more"
+
+        await asyncio.gather(self.get("/check-ins/v2/events"),
+                             self.follow(f"/check-ins/v2/check_ins?per_page={PER_PAGE}", CHECK_IN_PAGES))
+        await self.think(think)
+
+        if ids and ghosts:
+            sample = self.rng.sample(ids, min(ghosts, len(ids)))
+            await asyncio.gather(*(self.get(f"/check-ins/v2/people/{i}") for i in sample))
+
+
+async def run_load(base, users, concurrency, think, ghosts, max_people_pages, connections, seed):
+    """Run `users` sessions, `concurrency` at a time: (per-endpoint stats, seconds taken)."""
+    stats = {}
+    gate = asyncio.Semaphore(concurrency)
+    # The same credentials check_api.make_session sends.
+    credentials = f"{os.environ.get('VITE_PCO_APP_ID', 'test')}:{os.environ.get('VITE_PCO_SECRET', 'test')}"
+    headers = {"Authorization": "Basic " + base64.b64encode(credentials.encode()).decode()}
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async def one(n):
+        async with gate:
+            connector = aiohttp.TCPConnector(limit_per_host=connections)
+            async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+                user = SimulatedUser(session, base, stats, random.Random(seed + n))
+                await user.run(think, ghosts, max_people_pages)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(users)))
+    return stats, time.perf_counter() - started
+
+
+def print_report(report):
+    print(f"\n{report['users']} users, {report['concurrency']} at a time, in {report['seconds']:.1f}s: "
+          f"{report['requests']:,} requests, {report['per_second']:.1f}/s")
+    print(f"\n{'endpoint':16s} {'reqs':>7s} {'req/s':>7s} {'err%':>6s} {'429%':>6s} {'MiB':>8s} "
+          f"{'p50':>7s} {'p95':>7s} {'p99':>7s} {'max':>7s}")
+    for name, s in report["endpoints"].items():
+        n = max(s["requests"], 1)
+        print(f"{name:16s} {s['requests']:7d} {s['per_second']:7.1f} {100 * s['errors'] / n:6.1f} "
+              f"{100 * s['throttled'] / n:6.1f} {s['bytes'] / 1024 / 1024:8.2f} "
+              f"{s['p50_ms'] or 0:7.0f} {s['p95_ms'] or 0:7.0f} {s['p99_ms'] or 0:7.0f} {s['max_ms'] or 0:7.0f}")
+
+    print("\nLatency histogram (ms)")
+    labels = [f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+    for name, s in report["endpoints"].items():
+        total = max(s["requests"], 1)
+        print(f"  {name}")
+        for label, count in zip(labels, s["histogram"]):
+            if count:
+                print(f"    {label:>7s} {count:7d} {'#' * max(1, round(40 * count / total))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay Locus's API request mix for many users at once.")
+    parser.add_argument("--target", default=API_TARGET, help="API origin (default: $VITE_API_TARGET)")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="simulated users in total")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="users active at once (default: all of them)")
+    parser.add_argument("--think", type=float, default=DEFAULT_THINK,
+                        help="mean seconds a user pauses between steps; 0 for none")
+    parser.add_argument("--ghosts", type=int, default=DEFAULT_GHOSTS,
+                        help="check-in counts each user asks for in Ghost Protocol")
+    parser.add_argument("--max-people-pages", type=int, default=10 ** 9,
+                        help="stop loading people after this many pages (default: the whole directory)")
+    parser.add_argument("--connections", type=int, default=BROWSER_CONNECTIONS,
+                        help="connections each user may hold open to the API")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report here as JSON")
+    args = parser.parse_args()
+
+    concurrency = args.concurrency or args.users
+    stats, seconds = asyncio.run(run_load(args.target.rstrip("/"), args.users, concurrency, args.think,
+                                          args.ghosts, args.max_people_pages, args.connections, args.seed))
+    endpoints = {name: s.summary(seconds) for name, s in sorted(stats.items())}
+    requests = sum(s["requests"] for s in endpoints.values())
+    report = {
+        "target": args.target,
+        "users": args.users,
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "requests": requests,
+        "per_second": requests / seconds if seconds else 0.0,
+        "histogram_buckets_ms": BUCKETS_MS,
+        "endpoints": endpoints,
+    }
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
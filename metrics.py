@@ -0,0 +1,247 @@
+import cProfile
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# Opt-in timing for the Python tools: where a run spends its time, and what it
+# pulled from the API to do it.
+#
+# A phase is a named span. Spans nest, and each records both its total time
+# and its own time with the spans inside it taken out, so "analysis" that pulls
+# people through a generator does not also claim the HTTP time spent fetching
+# them. Spans on the prefetcher's worker threads are counted per thread, so the
+# phase totals can add up to more than the wall time.
+#
+# Everything is a no-op until `enable()` is called (the tools do that for
+# --metrics and --profile), apart from hooks: a registered hook sees every span
+# whether or not the summary is being kept.
+#
+# A new stage needs nothing more than
+#
+#     with metrics.span("analysis.groups"):
+#         ...
+#
+# or `@metrics.timed("analysis.groups")` on the function that does the work.
+
+PROFILE_DIR = "profiles"
+
+# Path segments that are record ids, folded out of endpoint names so
+# /people/v2/people/123/emails and /people/v2/people/456/emails report together.
+# PCO ids are numeric; the mock's contact ids are `<person>-<collection>-<n>`.
+ID_SEGMENT = re.compile(r"/(?:\d[^/]*|[0-9a-f]{8}-[0-9a-f-]{27})(?=/|$)")
+
+_lock = threading.Lock()
+_local = threading.local()
+_enabled = False
+_hooks = []
+_state = {}
+
+
+def _reset():
+    _state.update(started=time.perf_counter(), started_at=time.time(), phases={}, endpoints={}, error=None)
+
+
+_reset()
+
+
+def enable():
+    """Start collecting, from a clean slate."""
+    global _enabled
+    _reset()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def add_hook(hook):
+    """Call `hook(name, seconds)` as every span ends; returns the hook, for `remove_hook`."""
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+@contextmanager
+def span(name):
+    """Time the block as phase `name`."""
+    if not _enabled and not _hooks:
+        yield
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = [0.0]  # time spent in spans nested inside this one
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # The innermost span names the failure; the outer ones it unwinds
+        # through leave it alone.
+        if not hasattr(e, "metrics_phase"):
+            e.metrics_phase = name
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        stack.pop()
+        if stack:
+            stack[-1][0] += seconds
+        record_span(name, seconds, seconds - frame[0])
+
+
+def timed(name):
+    """Decorator form of `span`."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_span(name, seconds, own_seconds=None):
+    if _enabled:
+        with _lock:
+            phase = _state["phases"].setdefault(name, {"count": 0, "seconds": 0.0, "own_seconds": 0.0})
+            phase["count"] += 1
+            phase["seconds"] += seconds
+            phase["own_seconds"] += seconds if own_seconds is None else own_seconds
+    for hook in _hooks:
+        hook(name, seconds)
+
+
+def endpoint_name(url):
+    path = re.sub(r"^[a-z]+://[^/]+", "", url).split("?", 1)[0]
+    return ID_SEGMENT.sub("/:id", path) or "/"
+
+
+def record_request(url, nbytes, seconds, status=None):
+    """One HTTP response: its endpoint, body size and time to arrive."""
+    if not _enabled:
+        return
+    with _lock:
+        endpoint = _state["endpoints"].setdefault(endpoint_name(url), {
+            "requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0})
+        endpoint["requests"] += 1
+        endpoint["bytes"] += nbytes
+        endpoint["seconds"] += seconds
+        if status is not None and status >= 400:
+            endpoint["errors"] += 1
+
+
+def describe_error(error):
+    """`Type: message`, and the phase it happened in when a span saw it."""
+    phase = getattr(error, "metrics_phase", None)
+    return f"{type(error).__name__}: {error}" + (f" (during {phase})" if phase else "")
+
+
+def record_error(error):
+    """Keep the failure, with the phase it happened in and its traceback, for the report."""
+    if not _enabled:
+        return
+    with _lock:
+        _state["error"] = {
+            "type": type(error).__name__,
+            "message": str(error),
+            "phase": getattr(error, "metrics_phase", None),
+            "traceback": traceback.format_exception(type(error), error, error.__traceback__),
+        }
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def report(tool=None):
+    """The run so far as a JSON-ready dict."""
+    with _lock:
+        return {
+            "tool": tool,
+            "started_at": datetime.fromtimestamp(_state["started_at"], timezone.utc).isoformat(),
+            "seconds": time.perf_counter() - _state["started"],
+            "peak_rss_bytes": peak_rss_bytes(),
+            "phases": json.loads(json.dumps(_state["phases"])),
+            "endpoints": json.loads(json.dumps(_state["endpoints"])),
+            "error": _state["error"],
+        }
+
+
+def print_summary(data, file=sys.stderr):
+    print(f"\n{data['tool'] or 'run'}: {data['seconds']:.2f}s, peak RSS "
+          f"{data['peak_rss_bytes'] / 1024 / 1024:.0f} MiB", file=file)
+    if data["phases"]:
+        print(f"  {'phase':24s} {'calls':>8s} {'own s':>9s} {'total s':>9s}", file=file)
+        for name, p in sorted(data["phases"].items(), key=lambda kv: -kv[1]["own_seconds"]):
+            print(f"  {name:24s} {p['count']:8d} {p['own_seconds']:9.3f} {p['seconds']:9.3f}", file=file)
+    if data["endpoints"]:
+        print(f"  {'endpoint':40s} {'reqs':>7s} {'KiB':>10s} {'s':>8s}", file=file)
+        for name, e in sorted(data["endpoints"].items()):
+            print(f"  {name:40s} {e['requests']:7d} {e['bytes'] / 1024:10.0f} {e['seconds']:8.3f}", file=file)
+    if data["error"]:
+        error = data["error"]
+        print(f"  failed{' during ' + error['phase'] if error['phase'] else ''}: "
+              f"{error['type']}: {error['message']}", file=file)
+
+
+def add_arguments(parser):
+    parser.add_argument("--metrics", action="store_true",
+                        help="print per-phase timings, per-endpoint traffic and peak RSS to stderr")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                        help=f"also write cProfile stats and a JSON metrics file to DIR (default: {PROFILE_DIR})")
+
+
+@contextmanager
+def run(tool, args):
+    """
+    Instrument a tool's run as `add_arguments` asked.
+
+    With --profile, DIR gets `<tool>-<timestamp>.pstats` (open it with
+    `python -m pstats`) and `<tool>-<timestamp>.json`, the metrics report.
+    """
+    profile_dir = getattr(args, "profile", None)
+    if not (getattr(args, "metrics", False) or profile_dir):
+        yield
+        return
+
+    enable()
+    profiler = cProfile.Profile() if profile_dir else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    except BaseException as e:
+        record_error(e)
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        data = report(tool)
+        disable()
+        print_summary(data)
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            stem = os.path.join(profile_dir, f"{tool}-{datetime.now():%Y%m%d-%H%M%S}")
+            profiler.dump_stats(f"{stem}.pstats")
+            with open(f"{stem}.json", "w") as f:
+                json.dump(data, f, indent=2)
+            print(f"  profile: {stem}.pstats, metrics: {stem}.json", file=sys.stderr)
@@ -1,7 +1,13 @@
 import express from 'express';
 import cors from 'cors';
-import { people, events, checkIns } from './data.js';
-import { fileURLToPath } from 'url';
+import { fileURLToPath, pathToFileURL } from 'url';
+import path from 'path';
+
+// `MOCK_DATA` swaps the seed set for a generated directory (see
+// generate_directory.py), so the app can be run against production sizes.
+const { people, events, checkIns } = process.env.MOCK_DATA
+  ? await import(pathToFileURL(path.resolve(process.env.MOCK_DATA)).href)
+  : await import('./data.js');
 
 export const app = express();
 
@@ -31,18 +37,21 @@ app.use(express.json({ type: ['application/json', 'application/vnd.api+json'] })
 
 // In-memory store (copy of seed data)
 // We export this or provide a reset function for testing if needed
-let db = {
-  people: JSON.parse(JSON.stringify(people)),
-  events: JSON.parse(JSON.stringify(events)),
-  checkIns: JSON.parse(JSON.stringify(checkIns)).reverse(), // Newest first
-};
+//
+// People are edited in place, so each store gets its own deep copy. Check-ins
+// and events are only ever read: copying the arrays is enough, and a generated
+// directory has around a million check-ins, too many to clone on every reset
+// (or to round-trip through one JSON string, which outgrows V8's string limit).
+const seedDb = () => ({
+  people: structuredClone(people),
+  events: events.slice(),
+  checkIns: checkIns.slice().reverse(), // Newest first
+});
+
+let db = seedDb();
 
 export const resetDb = () => {
-  db = {
-    people: JSON.parse(JSON.stringify(people)),
-    events: JSON.parse(JSON.stringify(events)),
-    checkIns: JSON.parse(JSON.stringify(checkIns)),
-  };
+  db = seedDb();
 };
 
 // Generic Pagination Helper
@@ -0,0 +1,495 @@
+import argparse
+import json
+import os
+import re
+import time
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+import metrics
+
+# The directory as a table of columns rather than a list of JSON:API dicts.
+#
+# A person resource costs a dict per record, another per contact, every key
+# string again, and dates kept as text. Here each field is one NumPy column, so
+# a 500k-person directory with its contacts is a few dozen arrays and a scan is
+# a vectorized expression:
+#
+#   table = PersonTable.from_ndjson("people.ndjson")
+#   adults = (table.birthdate > 0) & ~table.child
+#   smiths = table.last_name == table.strings.code_of("Smith")
+#
+# Strings come in two kinds. Ones that repeat (first and last names, cities,
+# states, ZIPs, contact locations) are interned in one StringPool and stored as
+# int32 codes, -1 for none. Ones that are nearly all distinct (ids, full names,
+# email addresses, phone numbers, streets) would gain nothing from interning and
+# are packed end to end as UTF-8 in a StringColumn, where an empty value and a
+# missing one read back the same. A full name that is just the first and last
+# name is not stored a second time.
+#
+# Dates are integers: calendar dates as YYYYMMDD (0 for none), timestamps as
+# epoch seconds (-1 for none). Households are interned to dense ids, in the
+# order they are first seen, with their PCO ids in `households`.
+#
+# Contacts live in side tables, one per kind, with their rows in person order;
+# person i's emails are rows `emails.offsets[i]` to `emails.offsets[i + 1]`.
+#
+# Tables are built in one streaming pass, from person resources with contacts
+# folded in (NDJSON, `check_api.iter_people()`), or straight from API pages with
+# their `included[]` sideloads, resolved the way `flatten_included` does
+# without building the flattened dicts. Attributes outside the columns below
+# are not kept.
+
+BIRTHDATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+INTERNED, PACKED = "interned", "packed"
+
+DATES = ("birthdate", "anniversary")
+TIMESTAMPS = ("created_at", "updated_at", "background_check_expires_at")
+# (table, attribute, sideload type, relationship, {field: kind})
+CONTACTS = (
+    ("emails", "email_addresses", "Email", "emails",
+     {"address": PACKED, "location": INTERNED}),
+    ("phones", "phone_numbers", "PhoneNumber", "phone_numbers",
+     {"number": PACKED, "location": INTERNED}),
+    ("addresses", "addresses", "Address", "addresses",
+     {"street": PACKED, "city": INTERNED, "state": INTERNED, "zip": INTERNED, "location": INTERNED}),
+)
+
+NO_GRADE = -128
+
+
+def parse_birthdate(value):
+    """`YYYY-MM-DD…` as the integer YYYYMMDD, or None when it is not a date."""
+    if not value:
+        return None
+    match = BIRTHDATE.match(value)
+    if not match:
+        return None
+    y, m, d = (int(g) for g in match.groups())
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        return None
+    return y * 10000 + m * 100 + d
+
+
+def parse_timestamp(value):
+    """ISO-8601 as epoch seconds, or -1 when absent or unreadable."""
+    if not value:
+        return -1
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return -1
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_timestamp(seconds):
+    if seconds < 0:
+        return None
+    return datetime.fromtimestamp(int(seconds), timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def format_date(ymd):
+    return f"{ymd // 10000:04d}-{ymd // 100 % 100:02d}-{ymd % 100:02d}" if ymd else None
+
+
+class StringColumn:
+    """UTF-8 strings packed end to end, with n+1 byte offsets marking each one."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_list(cls, values):
+        values = [v or "" for v in values]
+        text = "".join(values)
+        data = text.encode()
+        # All ASCII, as most batches are: character lengths are byte lengths.
+        lengths = list(map(len, values)) if len(data) == len(text) else [len(v.encode()) for v in values]
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.frombuffer(data, dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+    def to_list(self):
+        blob = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        return [blob[a:b].decode() for a, b in zip(bounds, bounds[1:])]
+
+    def take(self, rows):
+        """The strings at `rows`, an integer array, as a list."""
+        blob = self.data.tobytes()
+        return [blob[a:b].decode() for a, b in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+
+    def select(self, rows):
+        """The strings at `rows`, an integer array, as a new StringColumn; nothing is decoded."""
+        starts = self.offsets[rows].astype(np.int64)
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        gather = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], lengths)
+        return StringColumn(self.data[gather], offsets)
+
+    @classmethod
+    def concat(cls, columns):
+        """Several StringColumns end to end as one."""
+        offsets, base = [], 0
+        for column in columns:
+            offsets.append(column.offsets[:-1].astype(np.int64) + base)
+            base += int(column.offsets[-1])
+        offsets.append(np.array([base], dtype=np.int64))
+        return cls(np.concatenate([c.data for c in columns]), np.concatenate(offsets))
+
+
+class StringPool:
+    """Distinct strings, each stored once; rows hold its int32 code."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, code):
+        return self.values[code] if code >= 0 else None
+
+    def intern(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code_of(self, value):
+        """The code for `value`, or -2, which no row holds, when it never occurs."""
+        return -1 if value is None else self.codes.get(value, -2)
+
+    def decode(self, codes):
+        """A list of strings (None for -1) for an array of codes."""
+        values = self.values
+        return [values[c] if c >= 0 else None for c in codes.tolist()]
+
+    @property
+    def nbytes(self):
+        # The strings as UTF-8; Python's own overhead per string is not counted.
+        return sum(len(v.encode()) for v in self.values)
+
+
+class _Packer:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def add(self, value):
+        if value:
+            self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def finish(self):
+        return StringColumn(np.frombuffer(self.data, dtype=np.uint8), _narrow(self.offsets))
+
+
+def _narrow(offsets):
+    """An `array("q")` of offsets as int32 when they fit, which they do short of 2 GiB of text."""
+    wide = np.frombuffer(offsets, dtype=np.int64)
+    return wide.astype(np.int32) if wide[-1] < 2**31 else wide
+
+
+class ContactTable:
+    """One kind of contact record, rows grouped by person; `offsets` has one entry per person plus one."""
+
+    __slots__ = ("offsets", "columns")
+
+    def __init__(self, offsets, columns):
+        self.offsets = offsets
+        self.columns = columns
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def owners(self):
+        """The person row each record belongs to."""
+        return np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), self.counts())
+
+    def first(self):
+        """Per person, the row of their first record (the one the app treats as primary), or -1."""
+        starts = self.offsets[:-1]
+        return np.where(self.counts() > 0, starts, -1)
+
+
+class _Builder:
+    """Accumulates rows in growable arrays; `finish` turns them into a PersonTable."""
+
+    def __init__(self):
+        self.strings = StringPool()
+        self.households = StringPool()
+        self.ids = _Packer()
+        self.names = _Packer()
+        self.first_names = array("i")
+        self.last_names = array("i")
+        self.child = array("b")
+        self.grade = array("b")
+        self.household = array("i")
+        self.dates = {a: array("i") for a in DATES}
+        self.timestamps = {a: array("q") for a in TIMESTAMPS}
+        self.contacts = {}
+        for table, _, _, _, fields in CONTACTS:
+            packed = [(f, _Packer()) for f, kind in fields.items() if kind == PACKED]
+            interned = [(f, array("i")) for f, kind in fields.items() if kind == INTERNED]
+            self.contacts[table] = (array("q", [0]), packed, interned)
+
+    def add(self, person_id, attrs, sideloads=None, household_id=None):
+        """
+        One person. `sideloads` maps a contact table to the records PCO sent in
+        `included[]`, used only when the attributes do not carry that contact.
+        """
+        intern = self.strings.intern
+        first, last, name = attrs.get("first_name"), attrs.get("last_name"), attrs.get("name")
+        if first and last and name == f"{first} {last}" and name == name.strip():
+            name = None  # rebuilt from first and last on the way out
+        self.ids.add(person_id)
+        self.names.add(name)
+        self.first_names.append(intern(first))
+        self.last_names.append(intern(last))
+        self.child.append(bool(attrs.get("child")))
+        grade = attrs.get("grade")
+        self.grade.append(grade if isinstance(grade, int) and -127 <= grade <= 127 else NO_GRADE)
+        self.household.append(self.households.intern(attrs.get("household_id") or household_id))
+        for attribute, column in self.dates.items():
+            column.append(parse_birthdate(attrs.get(attribute)) or 0)
+        for attribute, column in self.timestamps.items():
+            column.append(parse_timestamp(attrs.get(attribute)))
+
+        for table, attribute, _, _, _ in CONTACTS:
+            records = attrs.get(attribute)
+            if records is None and sideloads:
+                records = sideloads.get(table)
+            offsets, packed, interned = self.contacts[table]
+            if not records:
+                offsets.append(offsets[-1])
+                continue
+            for record in records:
+                for field, column in packed:
+                    column.add(record.get(field))
+                for field, column in interned:
+                    column.append(intern(record.get(field)))
+            offsets.append(offsets[-1] + len(records))
+
+    def add_page(self, page):
+        """Every person on an API page, contacts and household taken from `included[]` where needed."""
+        by_id = {(r["type"], r["id"]): r for r in page.get("included") or []}
+        for person in page.get("data", []):
+            rels = person.get("relationships") or {}
+            sideloads, household_id = {}, None
+            if by_id:
+                for table, _, kind, rel, _ in CONTACTS:
+                    refs = _refs(rels, rel)
+                    sideloads[table] = [by_id[(kind, r["id"])]["attributes"] for r in refs
+                                        if (kind, r["id"]) in by_id]
+                households = [r["id"] for r in _refs(rels, "households") if ("Household", r["id"]) in by_id]
+                household_id = households[0] if households else None
+            self.add(person.get("id"), person.get("attributes") or {}, sideloads, household_id)
+
+    def finish(self, table):
+        def ints(column, dtype):
+            return np.frombuffer(column, dtype=dtype) if len(column) else np.zeros(0, dtype=dtype)
+
+        table.strings = self.strings
+        table.households = self.households
+        table.id = self.ids.finish()
+        table.name = self.names.finish()
+        table.first_name = ints(self.first_names, np.int32)
+        table.last_name = ints(self.last_names, np.int32)
+        table.child = ints(self.child, np.int8).astype(bool)
+        table.grade = ints(self.grade, np.int8)
+        table.household = ints(self.household, np.int32)
+        table.birthdate = ints(self.dates["birthdate"], np.int32)
+        table.anniversary = ints(self.dates["anniversary"], np.int32)
+        table.created_at = ints(self.timestamps["created_at"], np.int64)
+        table.updated_at = ints(self.timestamps["updated_at"], np.int64)
+        table.background_check_expires_at = ints(self.timestamps["background_check_expires_at"], np.int64)
+        for name, _, _, _, fields in CONTACTS:
+            offsets, packed, interned = self.contacts[name]
+            finished = {**{f: c.finish() for f, c in packed}, **{f: ints(c, np.int32) for f, c in interned}}
+            columns = {f: finished[f] for f in fields}
+            setattr(table, name, ContactTable(_narrow(offsets), columns))
+        return table
+
+
+def _refs(rels, name):
+    data = (rels.get(name) or {}).get("data")
+    if not data:
+        return []
+    return data if isinstance(data, list) else [data]
+
+
+class PersonTable:
+    """
+    A directory of people, one NumPy column per field; see the top of the module.
+
+    Build one with `PersonTable(people)` from person resources, or with
+    `from_pages` / `from_ndjson`. `person(i)` and `iter_people()` turn rows back
+    into resources for code that still wants dicts.
+    """
+
+    __slots__ = ("strings", "households", "id", "name", "first_name", "last_name", "child", "grade",
+                 "household", "birthdate", "anniversary", "created_at", "updated_at",
+                 "background_check_expires_at", "emails", "phones", "addresses")
+
+    def __init__(self, people=()):
+        builder = _Builder()
+        for person in people:
+            builder.add(person.get("id"), person.get("attributes") or {})
+        builder.finish(self)
+
+    @classmethod
+    @metrics.timed("load")
+    def from_pages(cls, pages):
+        """From `check_api.iter_pages` output (or any JSON:API people pages), sideloads and all."""
+        builder = _Builder()
+        for page in pages:
+            builder.add_page(page)
+        return builder.finish(cls.__new__(cls))
+
+    @classmethod
+    @metrics.timed("load")
+    def from_ndjson(cls, path):
+        """From a file of person resources, one per line, as generate_directory.py writes them."""
+        builder = _Builder()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    person = json.loads(line)
+                    builder.add(person.get("id"), person.get("attributes") or {})
+        return builder.finish(cls.__new__(cls))
+
+    def __len__(self):
+        return len(self.id)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns and the distinct strings."""
+        total = self.strings.nbytes + self.households.nbytes
+        for name in self.__slots__[2:]:
+            column = getattr(self, name)
+            if isinstance(column, ContactTable):
+                total += column.offsets.nbytes + sum(c.nbytes for c in column.columns.values())
+            else:
+                total += column.nbytes
+        return total
+
+    def display_names(self, rows=None):
+        """
+        What `transformPerson` calls the person: `name`, else first and last,
+        else "Unknown". For every row, or for `rows`.
+        """
+        rows = np.arange(len(self)) if rows is None else rows
+        firsts = self.strings.decode(self.first_name[rows])
+        lasts = self.strings.decode(self.last_name[rows])
+        return [name or f"{first or ''} {last or ''}".strip() or "Unknown"
+                for name, first, last in zip(self.name.take(rows), firsts, lasts)]
+
+    def _values(self, column, records):
+        if isinstance(column, StringColumn):
+            return [v or None for v in column.take(records)]
+        return self.strings.decode(column[records])
+
+    def _first_records(self, table, rows):
+        first = getattr(self, table).first()
+        if rows is not None:
+            first = first[rows]
+        held = first >= 0
+        return first[held], held.tolist()
+
+    def primary(self, table, field, rows=None):
+        """`field` of each person's first `table` record, or None; for every row, or for `rows`."""
+        records, held = self._first_records(table, rows)
+        found = iter(self._values(getattr(self, table)[field], records))
+        return [next(found) if h else None for h in held]
+
+    def primary_records(self, table, rows=None):
+        """Each person's first `table` record as a dict, or None; for every row, or for `rows`."""
+        records, held = self._first_records(table, rows)
+        columns = getattr(self, table).columns
+        values = [self._values(c, records) for c in columns.values()]
+        found = iter([dict(zip(columns, v)) for v in zip(*values)])
+        return [next(found) if h else None for h in held]
+
+    def contacts(self, table, i):
+        """Person `i`'s `table` records as dicts, in the API's shape."""
+        contacts = getattr(self, table)
+        records = []
+        for row in range(int(contacts.offsets[i]), int(contacts.offsets[i + 1])):
+            record = {}
+            for field, column in contacts.columns.items():
+                record[field] = (column[row] or None) if isinstance(column, StringColumn) \
+                    else self.strings[int(column[row])]
+            records.append(record)
+        return records
+
+    def person(self, i):
+        """Row `i` as a person resource, contacts folded in as `check_api.iter_people()` yields them."""
+        first, last = self.strings[int(self.first_name[i])], self.strings[int(self.last_name[i])]
+        attributes = {"name": self.name[i] or (f"{first} {last}" if first and last else None),
+                      "first_name": first,
+                      "last_name": last,
+                      "child": bool(self.child[i]),
+                      "grade": None if self.grade[i] == NO_GRADE else int(self.grade[i]),
+                      "household_id": self.households[int(self.household[i])]}
+        for attribute in DATES:
+            attributes[attribute] = format_date(int(getattr(self, attribute)[i]))
+        for attribute in TIMESTAMPS:
+            attributes[attribute] = format_timestamp(int(getattr(self, attribute)[i]))
+        for table, attribute, _, _, _ in CONTACTS:
+            attributes[attribute] = self.contacts(table, i)
+        return {"id": self.id[i], "type": "Person", "attributes": attributes}
+
+    def iter_people(self):
+        for i in range(len(self)):
+            yield self.person(i)
+
+
+if __name__ == "__main__":
+    # Reading people goes through check_api, which imports this module.
+    from check_api import add_source_arguments, table_from_args
+
+    parser = argparse.ArgumentParser(description="Load the directory into a PersonTable and report its size.")
+    add_source_arguments(parser)
+    args = parser.parse_args()
+
+    with metrics.run("people_table", args):
+        started = time.perf_counter()
+        table = table_from_args(args)
+        seconds = time.perf_counter() - started
+
+    print(f"{len(table):,} people loaded in {seconds:.2f}s")
+    print(f"{len(table.emails):,} emails, {len(table.phones):,} phones, {len(table.addresses):,} addresses, "
+          f"{len(table.households):,} households, {len(table.strings):,} distinct interned strings")
+    print(f"{table.nbytes / 1e6:,.1f} MB in columns", end="")
+    if args.input:
+        size = os.path.getsize(args.input)
+        print(f", {table.nbytes / size:.1%} of the {size / 1e6:,.1f} MB of NDJSON", end="")
+    print(f"; peak RSS {metrics.peak_rss_bytes() / 1e6:,.0f} MB")
@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import metrics
+from check_api import add_source_arguments, table_from_args
+from family_audit import ages_from_birthdates
+from people_table import format_date
+
+# `sortIntoGroups` from src/utils/sorter.ts, for congregations too big to sort
+# in a browser tab.
+#
+# The problem is the same: adult households are placed whole into k groups,
+# and an assignment is scored by `evaluateFitness`, the squared distance of
+# every group's size and average age from the congregation's, size weighted
+# 1.5 and an empty group charged ten times the target size squared. Households
+# come from the directory exactly as `buildHouseholds` forms them.
+#
+# The search differs. The genetic algorithm keeps the TypeScript's operators
+# (tournament of two, uniform crossover, 10% mutation, one elite) but scores
+# the whole generation at once: every chromosome's group totals are one
+# bincount over the population matrix. It is only a starting point. Local
+# search then moves single households to whichever group improves the score
+# most, and swaps pairs across groups, until neither helps. A move only
+# changes two groups' terms, so each household is priced against all k groups
+# in one vector operation instead of rescoring the assignment.
+#
+# Several restarts (four unless --restarts says otherwise, never tied to the
+# CPU count) run in a process pool and the best wins. Restart i draws
+# from a generator seeded with (--seed, i), so a run is repeatable whatever
+# the number of workers, as long as it finishes inside --time-budget; when the
+# budget cuts a run short, the result depends on how far it got.
+
+POPULATION = 100
+GENERATIONS = 500
+MUTATION_RATE = 0.1
+SIZE_WEIGHT = 1.5
+EMPTY_PENALTY = 10
+ADULT_AGE = 18
+MAX_AGE = 110
+
+DEFAULT_TIME_BUDGET = 10.0
+# Fixed rather than one per CPU, so the same --seed gives the same groups on
+# any machine and with any --workers.
+DEFAULT_RESTARTS = 4
+# Share of each restart's time the genetic algorithm may use before local search.
+GA_SHARE = 0.25
+# Partners tried per household in a swap pass.
+SWAP_SAMPLE = 64
+EPSILON = 1e-9
+
+
+class Households:
+    """
+    `buildHouseholds` over a PersonTable: adults only, one entry per household,
+    individuals without one on their own, in the order each first appears.
+    """
+
+    def __init__(self, table, today=None):
+        age = ages_from_birthdates(table.birthdate.astype(np.int64), today)
+        adult = (table.birthdate > 0) & ~table.child & (age >= ADULT_AGE) & (age <= MAX_AGE)
+        rows = np.flatnonzero(adult)
+
+        household = table.household[rows].astype(np.int64)
+        # `householdId || ...`: an empty id is no household either.
+        alone = (household < 0) | (household == table.households.code_of(""))
+        key = np.where(alone, len(table.households) + rows, household)
+        unique, first_seen, inverse = np.unique(key, return_index=True, return_inverse=True)
+        order = np.argsort(first_seen)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        index = rank[inverse]
+
+        self.table = table
+        self.size = np.bincount(index, minlength=len(unique)).astype(np.float64)
+        self.age_sum = np.bincount(index, weights=age[rows], minlength=len(unique))
+        members = np.argsort(index, kind="stable")
+        self.rows = rows[members]
+        self.ages = age[rows][members]
+        self.offsets = np.concatenate([[0], np.cumsum(self.size).astype(np.int64)])
+        self.keys = []
+        for code, row in zip(unique[order].tolist(), rows[first_seen[order]].tolist()):
+            self.keys.append(table.households[code] if code < len(table.households)
+                             else f"individual-{table.id[row]}")
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def group_penalty(sizes, age_sums, target_size, target_age):
+    """Each group's share of `-evaluateFitness`; works on any shape of group totals."""
+    filled = sizes > 0
+    average = np.where(filled, age_sums / np.where(filled, sizes, 1), target_age)
+    size_term = np.where(filled, (sizes - target_size) ** 2, target_size ** 2 * EMPTY_PENALTY)
+    return SIZE_WEIGHT * size_term + (average - target_age) ** 2
+
+
+def fitness(assignment, size, age_sum, k, target_size, target_age):
+    """`evaluateFitness` for one assignment of households to groups."""
+    sizes = np.bincount(assignment, weights=size, minlength=k)
+    age_sums = np.bincount(assignment, weights=age_sum, minlength=k)
+    return -float(group_penalty(sizes, age_sums, target_size, target_age).sum())
+
+
+class Population:
+    """The fitness of every chromosome in a generation, from one bincount per total."""
+
+    def __init__(self, size, age_sum, k, count, target_size, target_age):
+        self.k = k
+        self.base = (np.arange(count, dtype=np.int64) * k)[:, None]
+        self.size = np.tile(size, count)
+        self.age_sum = np.tile(age_sum, count)
+        self.target = (target_size, target_age)
+
+    def fitness(self, population):
+        n = len(population) * self.k
+        flat = (population + self.base).ravel()
+        sizes = np.bincount(flat, weights=self.size, minlength=n).reshape(-1, self.k)
+        age_sums = np.bincount(flat, weights=self.age_sum, minlength=n).reshape(-1, self.k)
+        return -group_penalty(sizes, age_sums, *self.target).sum(axis=1)
+
+
+def evolve(size, age_sum, k, target_size, target_age, rng, deadline,
+           generations=GENERATIONS, population_size=POPULATION):
+    """The genetic algorithm of `sortIntoGroups`, a generation at a time: its best chromosome."""
+    n = len(size)
+    scorer = Population(size, age_sum, k, population_size, target_size, target_age)
+    population = rng.integers(k, size=(population_size, n), dtype=np.int32)
+    best, best_fitness = population[0].copy(), -np.inf
+    for _ in range(generations):
+        scores = scorer.fitness(population)
+        i = int(np.argmax(scores))
+        if scores[i] > best_fitness:
+            best, best_fitness = population[i].copy(), scores[i]
+        if time.monotonic() > deadline:
+            break
+
+        def tournament():
+            t1 = rng.integers(population_size, size=population_size - 1)
+            t2 = rng.integers(population_size, size=population_size - 1)
+            return population[np.where(scores[t1] > scores[t2], t1, t2)]
+
+        p1, p2 = tournament(), tournament()
+        children = np.where(rng.random(p1.shape, dtype=np.float32) > 0.5, p1, p2)
+        mutated = rng.random(children.shape, dtype=np.float32) < MUTATION_RATE
+        children[mutated] = rng.integers(k, size=int(mutated.sum()), dtype=np.int32)
+        population = np.vstack([best[None, :], children])
+    return best
+
+
+def improve(assignment, size, age_sum, k, target_size, target_age, rng, deadline):
+    """
+    Local search from `assignment`, in place: best single moves, then sampled
+    swaps, repeated until a full round finds nothing or time runs out.
+    """
+    n = len(assignment)
+    sizes = np.bincount(assignment, weights=size, minlength=k)
+    age_sums = np.bincount(assignment, weights=age_sum, minlength=k)
+    penalty = group_penalty(sizes, age_sums, target_size, target_age)
+
+    def apply(h, to):
+        source = assignment[h]
+        for group, sign in ((source, -1), (to, 1)):
+            sizes[group] += sign * size[h]
+            age_sums[group] += sign * age_sum[h]
+            penalty[group] = group_penalty(sizes[group], age_sums[group], target_size, target_age)
+        assignment[h] = to
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for step, h in enumerate(rng.permutation(n).tolist()):
+            if step % 256 == 0 and time.monotonic() > deadline:
+                return assignment
+            source = assignment[h]
+            leave = group_penalty(sizes[source] - size[h], age_sums[source] - age_sum[h],
+                                  target_size, target_age) - penalty[source]
+            delta = group_penalty(sizes + size[h], age_sums + age_sum[h], target_size, target_age) - penalty + leave
+            delta[source] = 0
+            to = int(np.argmin(delta))
+            if delta[to] < -EPSILON:
+                apply(h, to)
+                improved = True
+
+        for step, h in enumerate(rng.permutation(n).tolist()):
+            if step % 256 == 0 and time.monotonic() > deadline:
+                return assignment
+            partners = rng.integers(n, size=min(SWAP_SAMPLE, n))
+            a, b = assignment[h], assignment[partners]
+            shift = size[partners] - size[h]
+            age_shift = age_sum[partners] - age_sum[h]
+            delta = (group_penalty(sizes[a] + shift, age_sums[a] + age_shift, target_size, target_age) - penalty[a]
+                     + group_penalty(sizes[b] - shift, age_sums[b] - age_shift, target_size, target_age)
+                     - penalty[b])
+            delta[b == a] = 0
+            best = int(np.argmin(delta))
+            if delta[best] < -EPSILON:
+                j = int(partners[best])
+                other = assignment[j]
+                apply(j, a)
+                apply(h, other)
+                improved = True
+    return assignment
+
+
+def _restart(size, age_sum, k, seed, restart, deadline, generations, population_size):
+    """One independent run: (fitness, restart, assignment)."""
+    target_size = size.sum() / k
+    target_age = age_sum.sum() / size.sum()
+    rng = np.random.default_rng([seed, restart])
+    started = time.time()
+    # Deadlines are wall-clock so restarts queued behind others share one budget.
+    ga_deadline = time.monotonic() + max(deadline - started, 0) * GA_SHARE
+    assignment = evolve(size, age_sum, k, target_size, target_age, rng, ga_deadline, generations, population_size)
+    ls_deadline = time.monotonic() + max(deadline - time.time(), 0)
+    improve(assignment, size, age_sum, k, target_size, target_age, rng, ls_deadline)
+    return fitness(assignment, size, age_sum, k, target_size, target_age), restart, assignment
+
+
+def solve(households, k, seed=0, restarts=DEFAULT_RESTARTS, workers=None, time_budget=DEFAULT_TIME_BUDGET,
+          generations=GENERATIONS, population_size=POPULATION):
+    """The best assignment of households to `k` groups over all restarts: (fitness, assignment)."""
+    workers = workers or os.cpu_count() or 1
+    deadline = time.time() + time_budget
+    args = [(households.size, households.age_sum, k, seed, i, deadline, generations, population_size)
+            for i in range(restarts)]
+    if workers == 1 or restarts == 1:
+        results = [_restart(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, restarts)) as pool:
+            results = list(pool.map(_restart, *zip(*args)))
+    best_fitness, _, assignment = max(results, key=lambda r: (r[0], -r[1]))
+    return best_fitness, assignment
+
+
+def build_groups(households, assignment, k):
+    """
+    `SmallGroup`s as `sortIntoGroups` returns them: members in household
+    order, each with the Student fields the group view shows.
+    """
+    table = households.table
+    rows = households.rows
+    names = table.display_names(rows)
+    firsts = table.strings.decode(table.first_name[rows])
+    lasts = table.strings.decode(table.last_name[rows])
+    household_ids = table.households.decode(table.household[rows])
+    member_group = np.repeat(assignment, np.diff(households.offsets))
+
+    groups = [{"id": g, "members": [], "size": 0, "averageAge": 0} for g in range(k)]
+    for i, (g, row, age) in enumerate(zip(member_group.tolist(), rows.tolist(), households.ages.tolist())):
+        groups[g]["members"].append({
+            "id": table.id[row],
+            "name": names[i],
+            "firstName": (firsts[i] or "").strip(),
+            "lastName": (lasts[i] or "").strip(),
+            "birthdate": format_date(int(table.birthdate[row])),
+            "age": int(age),
+            "isChild": False,
+            "householdId": household_ids[i] or None,
+        })
+    for group in groups:
+        group["size"] = len(group["members"])
+        if group["size"]:
+            group["averageAge"] = sum(m["age"] for m in group["members"]) / group["size"]
+    return groups
+
+
+def sort_into_groups(table, group_count, today=None, **options):
+    """
+    `sortIntoGroups` for a PersonTable: (groups, fitness), with the same edge
+    cases. `options` go to `solve`.
+    """
+    if group_count <= 0:
+        return [], None
+    households = Households(table, today)
+    if len(households) == 0:
+        return [{"id": g, "members": [], "size": 0, "averageAge": 0} for g in range(group_count)], None
+    k = min(group_count, len(households))
+    score, assignment = solve(households, k, **options)
+    return build_groups(households, assignment, k), score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sort adult households into balanced small groups.")
+    add_source_arguments(parser)
+    parser.add_argument("--groups", type=int, required=True, help="how many groups")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET,
+                        help="seconds the search may take, all restarts together")
+    parser.add_argument("--restarts", type=int, default=DEFAULT_RESTARTS,
+                        help=f"independent runs (default: {DEFAULT_RESTARTS})")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: one per CPU)")
+    parser.add_argument("--generations", type=int, default=GENERATIONS,
+                        help="genetic algorithm generations before local search")
+    parser.add_argument("--output", help="write the groups here instead of stdout")
+    args = parser.parse_args()
+
+    with metrics.run("small_groups", args):
+        table = table_from_args(args)
+        started = time.perf_counter()
+        with metrics.span("analysis"):
+            groups, score = sort_into_groups(table, args.groups, seed=args.seed, restarts=args.restarts,
+                                             workers=args.workers, time_budget=args.time_budget,
+                                             generations=args.generations)
+        elapsed = time.perf_counter() - started
+        with metrics.span("output"):
+            out = open(args.output, "w") if args.output else sys.stdout
+            json.dump(groups, out, indent=2)
+            out.write("\n")
+            if args.output:
+                out.close()
+
+    filled = [g for g in groups if g["size"]]
+    if filled:
+        sizes = [g["size"] for g in groups]
+        ages = [g["averageAge"] for g in filled]
+        print(f"{sum(sizes):,} adults in {len(groups)} groups in {elapsed:.2f}s; fitness {score:.2f}", file=sys.stderr)
+        print(f"  size {min(sizes)}-{max(sizes)}, average age {min(ages):.1f}-{max(ages):.1f}", file=sys.stderr)
@@ -0,0 +1,490 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+import metrics
+from check_api import (API_TARGET, DEFAULT_CONCURRENCY, PEOPLE_INCLUDES, PER_PAGE,
+                       flatten_included, iter_pages, make_session)
+from people_table import StringColumn, format_timestamp, parse_birthdate, parse_timestamp
+
+# A local copy of the last directory pull, so an audit does not have to spend
+# pcomirror's rate budget (or PCO's, for check-ins) every time it runs.
+#
+# One file per API target. Each table is stored column by column, and each
+# column is a raw NumPy buffer at a fixed offset in the file, so opening a
+# snapshot is one mmap and a JSON header: nothing is decoded until it is read.
+#
+# Refreshes are incremental. People come back by `updated_at` and check-ins by
+# `created_at`, starting from the newest value already held, and only those are
+# decoded: they are patched into the mapped columns by id, people in place and
+# new check-ins in front, and the file is written again only if something did
+# change. Deletions cannot be seen that way, so the directory's `total_count` is
+# checked afterwards and a mismatch triggers a full pull of people. Events are
+# fetched again only when a new check-in names one the snapshot does not hold.
+#
+# Contacts ride along with their person. PCO does not always bump a person's
+# `updated_at` when only an email or phone changes, so run with --full now and
+# then if contact details matter to the audit.
+
+CACHE_DIR = os.environ.get("LOCUS_CACHE_DIR", ".locus-cache")
+
+MAGIC = b"LOCUSNAP"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+PERSON_FIELDS = ("name", "first_name", "last_name", "household_id")
+EMAIL_FIELDS = ("address", "location")
+PHONE_FIELDS = ("number", "location")
+ADDRESS_FIELDS = ("street", "city", "state", "zip", "location")
+CONTACTS = (
+    ("emails", "email_addresses", EMAIL_FIELDS),
+    ("phones", "phone_numbers", PHONE_FIELDS),
+    ("addresses", "addresses", ADDRESS_FIELDS),
+)
+
+
+def snapshot_path(target=API_TARGET):
+    key = hashlib.sha1(target.rstrip("/").encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{key}.locus")
+
+
+# --- Column file format -------------------------------------------------------
+
+
+@metrics.timed("output")
+def write_columns(path, columns, meta):
+    """
+    Write named columns to one file, atomically.
+
+    `columns` maps a name to a NumPy array or a StringColumn. The header records
+    every buffer's dtype, offset and length; the buffers follow, 64-byte aligned
+    so each can be viewed in place once the file is mapped.
+    """
+    buffers = []
+    for name, column in columns.items():
+        if isinstance(column, StringColumn):
+            buffers.append((f"{name}:data", np.ascontiguousarray(column.data)))
+            buffers.append((f"{name}:offsets", np.ascontiguousarray(column.offsets)))
+        else:
+            buffers.append((name, np.ascontiguousarray(column)))
+
+    layout, position = {}, 0
+    for name, array in buffers:
+        layout[name] = {"dtype": array.dtype.str, "offset": position, "length": len(array)}
+        position += -(-array.nbytes // ALIGN) * ALIGN
+
+    header = json.dumps({"meta": meta, "columns": layout}).encode()
+    preamble = len(MAGIC) + 4 + 8
+    body_start = -(-(preamble + len(header)) // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(FORMAT_VERSION).tobytes())
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, array in buffers:
+            f.seek(body_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(body_start + position)
+    os.replace(tmp, path)
+
+
+@metrics.timed("load")
+def read_columns(path):
+    """Map a column file and return (meta, {name: array or StringColumn}) views into it."""
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if raw[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError(f"{path} is not a Locus snapshot")
+    version = int(raw[8:12].view(np.uint32)[0])
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+    header_len = int(raw[12:20].view(np.uint64)[0])
+    header = json.loads(raw[20:20 + header_len].tobytes())
+    body_start = -(-(20 + header_len) // ALIGN) * ALIGN
+
+    buffers = {}
+    for name, spec in header["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        start = body_start + spec["offset"]
+        buffers[name] = raw[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+    columns = {}
+    for name, array in buffers.items():
+        if name.endswith(":offsets"):
+            continue
+        if name.endswith(":data"):
+            base = name[:-len(":data")]
+            columns[base] = StringColumn(array, buffers[f"{base}:offsets"])
+        else:
+            columns[name] = array
+    return header["meta"], columns
+
+
+# --- Snapshot ----------------------------------------------------------------
+
+
+class Snapshot:
+    """
+    The last pull for one API target: people with their contacts, and check-ins.
+
+    Columns are views into the mapped file and strings decode on access, so
+    opening one costs a header read however big the directory is.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta, self.columns = read_columns(path)
+        self.events = self.meta.get("events", [])
+
+    def __len__(self):
+        return len(self.columns["people.id"])
+
+    def table_columns(self, *prefixes):
+        """The columns of the named tables, keyed by their full names."""
+        return {k: v for k, v in self.columns.items() if k.split(".", 1)[0] in prefixes}
+
+    def table(self, prefix):
+        prefix = f"{prefix}."
+        return {k[len(prefix):]: v for k, v in self.columns.items() if k.startswith(prefix)}
+
+    def iter_people(self):
+        """Person resources shaped like `check_api.iter_people()` yields them."""
+        people = self.table("people")
+        strings = {f: people[f].to_list() for f in ("id", *PERSON_FIELDS, "extra")}
+        birthdate = people["birthdate"].tolist()
+        child = people["child"].tolist()
+        updated = people["updated_at"].tolist()
+        contacts = {name: self._contacts_by_person(name, fields) for name, _, fields in CONTACTS}
+
+        for i, person_id in enumerate(strings["id"]):
+            attributes = json.loads(strings["extra"][i]) if strings["extra"][i] else {}
+            for f in PERSON_FIELDS:
+                if strings[f][i]:
+                    attributes[f] = strings[f][i]
+            attributes["child"] = bool(child[i])
+            if birthdate[i]:
+                b = birthdate[i]
+                attributes["birthdate"] = f"{b // 10000:04d}-{b // 100 % 100:02d}-{b % 100:02d}"
+            if updated[i] >= 0:
+                attributes["updated_at"] = format_timestamp(updated[i])
+            for name, attr, _ in CONTACTS:
+                if i in contacts[name]:
+                    attributes[attr] = contacts[name][i]
+            yield {"id": person_id, "type": "Person", "attributes": attributes}
+
+    def _contacts_by_person(self, name, fields):
+        table = self.table(name)
+        values = {f: table[f].to_list() for f in fields}
+        grouped = {}
+        for row, person in enumerate(table["person"].tolist()):
+            grouped.setdefault(person, []).append({f: values[f][row] or None for f in fields})
+        return grouped
+
+    def iter_check_ins(self):
+        """Check-in resources, newest first."""
+        table = self.table("checkins")
+        ids, people, events, kinds = (table[f].to_list() for f in ("id", "person_id", "event_id", "kind"))
+        created = table["created_at"].tolist()
+        for i, check_in_id in enumerate(ids):
+            yield {
+                "id": check_in_id,
+                "type": "CheckIn",
+                "attributes": {"created_at": format_timestamp(created[i]), "kind": kinds[i]},
+                "relationships": {
+                    "person": {"data": {"type": "Person", "id": people[i]}},
+                    "event": {"data": {"type": "Event", "id": events[i]}},
+                },
+            }
+
+
+def load(target=API_TARGET):
+    """The snapshot for a target, or None if there is none yet (or it is unreadable)."""
+    path = snapshot_path(target)
+    if not os.path.exists(path):
+        return None
+    try:
+        return Snapshot(path)
+    except (ValueError, KeyError):
+        return None
+
+
+# --- Building and refreshing --------------------------------------------------
+
+
+@metrics.timed("transform")
+def _person_columns(people):
+    people = list(people)
+    columns = {
+        "people.id": StringColumn.from_list([p["id"] for p in people]),
+        "people.child": np.array([bool(p["attributes"].get("child")) for p in people], dtype=bool),
+        "people.updated_at": np.array([parse_timestamp(p["attributes"].get("updated_at"))
+                                       for p in people], dtype=np.int64),
+    }
+    for f in PERSON_FIELDS:
+        columns[f"people.{f}"] = StringColumn.from_list([p["attributes"].get(f) for p in people])
+
+    birthdates, extras = [], []
+    reserved = {"child", "updated_at", *PERSON_FIELDS, *(attr for _, attr, _ in CONTACTS)}
+    for p in people:
+        attrs = p["attributes"]
+        born = parse_birthdate(attrs.get("birthdate"))
+        birthdates.append(born or 0)
+        extra = {k: v for k, v in attrs.items() if k not in reserved}
+        # A birthdate that does not parse is kept verbatim rather than lost.
+        if born is None and attrs.get("birthdate") is not None:
+            extra["birthdate"] = attrs["birthdate"]
+        extras.append(json.dumps(extra, separators=(",", ":")) if extra else "")
+    columns["people.birthdate"] = np.array(birthdates, dtype=np.int32)
+    columns["people.extra"] = StringColumn.from_list(extras)
+
+    for name, attr, fields in CONTACTS:
+        owners, values = [], {f: [] for f in fields}
+        for row, p in enumerate(people):
+            for record in p["attributes"].get(attr) or []:
+                owners.append(row)
+                for f in fields:
+                    values[f].append(record.get(f))
+        columns[f"{name}.person"] = np.array(owners, dtype=np.int32)
+        for f in fields:
+            columns[f"{name}.{f}"] = StringColumn.from_list(values[f])
+    return columns
+
+
+@metrics.timed("transform")
+def _check_in_columns(check_ins):
+    check_ins = list(check_ins)
+
+    def rel(c, name):
+        return ((c.get("relationships") or {}).get(name) or {}).get("data") or {}
+
+    return {
+        "checkins.id": StringColumn.from_list([c["id"] for c in check_ins]),
+        "checkins.person_id": StringColumn.from_list([rel(c, "person").get("id") for c in check_ins]),
+        "checkins.event_id": StringColumn.from_list([rel(c, "event").get("id") for c in check_ins]),
+        "checkins.kind": StringColumn.from_list([c["attributes"].get("kind") for c in check_ins]),
+        "checkins.created_at": np.array([parse_timestamp(c["attributes"].get("created_at"))
+                                         for c in check_ins], dtype=np.int64),
+    }
+
+
+def _high_water(seconds):
+    return format_timestamp(int(seconds.max())) if len(seconds) else None
+
+
+def _total_count(session, target, path):
+    page = next(iter_pages(session, path, {"per_page": 1}, base=target, concurrency=1))
+    return (page.get("meta") or {}).get("total_count")
+
+
+def _fetch_people(session, target, since, concurrency):
+    params = {"per_page": PER_PAGE, "include": PEOPLE_INCLUDES}
+    if since:
+        params["where[updated_at][gte]"] = since
+        params["order"] = "updated_at"
+    for page in iter_pages(session, "/people/v2/people", params, base=target,
+                           concurrency=concurrency):
+        yield from flatten_included(page)
+
+
+def fetch_check_ins(session, target, since, concurrency):
+    """
+    Check-ins newer than `since`, newest first.
+
+    Paging stops at the first page that runs, in order, past the high-water
+    mark, so a server that honours the ordering but not the filter still costs
+    only the pages that are actually new. A page that is not in order proves
+    nothing and paging carries on.
+    """
+    params = {"per_page": PER_PAGE, "order": "-created_at"}
+    if since:
+        params["where[created_at][gte]"] = since
+    cutoff = parse_timestamp(since)
+    for page in iter_pages(session, "/check-ins/v2/check_ins", params, base=target,
+                           concurrency=1 if since else concurrency):
+        data = page.get("data", [])
+        yield from data
+        if since and data:
+            stamps = [parse_timestamp(c["attributes"].get("created_at")) for c in data]
+            if stamps == sorted(stamps, reverse=True) and stamps[-1] < cutoff:
+                return
+
+
+def fetch_events(session, target):
+    events = []
+    for page in iter_pages(session, "/check-ins/v2/events", {"per_page": PER_PAGE},
+                           base=target, concurrency=1):
+        events.extend(page.get("data", []))
+    return events
+
+
+def _concat(a, b):
+    """Two columns of one kind end to end."""
+    if isinstance(a, StringColumn):
+        return StringColumn.concat([a, b])
+    return np.concatenate([a, b])
+
+
+def _select(column, rows):
+    """The values at `rows` as a column of the same kind."""
+    return column.select(rows) if isinstance(column, StringColumn) else column[rows]
+
+
+def _latest(records):
+    """One record per id, the last one fetched, in the order ids were first seen."""
+    return list({r["id"]: r for r in records}.values())
+
+
+@metrics.timed("transform")
+def _patch_people(current, changed):
+    """
+    The snapshot's people columns with `changed` applied: (columns, rows touched).
+
+    A person already held keeps their row and a new one is appended, so the
+    order stays the one the first full pull saw. People whose `updated_at` is
+    no newer than the copy held are the ones at the high-water mark coming
+    back again, and are skipped. Only `changed` is ever turned into dicts.
+    """
+    held = current.columns["people.updated_at"]
+    row_of = {person_id: row for row, person_id in enumerate(current.columns["people.id"].to_list())}
+    fresh = []
+    for p in _latest(changed):
+        row = row_of.get(p["id"])
+        if row is None or parse_timestamp(p["attributes"].get("updated_at")) > held[row]:
+            fresh.append(p)
+    if not fresh:
+        return None, 0
+
+    n = len(held)
+    order = np.arange(n)
+    appended = []
+    for j, p in enumerate(fresh):
+        row = row_of.get(p["id"])
+        if row is None:
+            appended.append(n + j)
+        else:
+            order[row] = n + j
+    order = np.concatenate([order, np.array(appended, dtype=order.dtype)])
+    # Where each row, old or fresh, lands; -1 for an old row replaced.
+    position = np.full(n + len(fresh), -1, dtype=np.int64)
+    position[order] = np.arange(len(order))
+
+    patch = _person_columns(fresh)
+    columns = {name: _select(_concat(current.columns[name], patch[name]), order)
+               for name in patch if name.startswith("people.")}
+    for name, _, fields in CONTACTS:
+        owner = position[_concat(current.columns[f"{name}.person"].astype(np.int64),
+                                 patch[f"{name}.person"].astype(np.int64) + n)]
+        kept = np.flatnonzero(owner >= 0)
+        rows = kept[np.argsort(owner[kept], kind="stable")]
+        columns[f"{name}.person"] = owner[rows].astype(np.int32)
+        for f in fields:
+            columns[f"{name}.{f}"] = _select(_concat(current.columns[f"{name}.{f}"], patch[f"{name}.{f}"]), rows)
+    return columns, len(fresh)
+
+
+@metrics.timed("transform")
+def _patch_check_ins(current, new_check_ins):
+    """
+    The snapshot's check-in columns with `new_check_ins` in front: (columns, rows added).
+
+    Everything held is at or before the high-water mark, so the new rows,
+    newest first, simply go ahead of it. Ones at or before the mark that the
+    server sent anyway (it ignored the filter, or they sit on the mark) are
+    already held.
+    """
+    created = current.columns["checkins.created_at"]
+    fresh = _latest(new_check_ins)
+    if len(created):
+        mark = int(created.max())
+        held = set(current.columns["checkins.id"].take(np.flatnonzero(created == mark)))
+        fresh = [c for c in fresh if c["id"] not in held
+                 and parse_timestamp(c["attributes"].get("created_at")) >= mark]
+    if not fresh:
+        return None, 0
+    # Newest first, as PCO pages them; not every server honours the ordering.
+    fresh.sort(key=lambda c: parse_timestamp(c["attributes"].get("created_at")), reverse=True)
+    patch = _check_in_columns(fresh)
+    return {name: _concat(patch[name], current.columns[name]) for name in patch}, len(fresh)
+
+
+def refresh(target=API_TARGET, full=False, session=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Bring the target's snapshot up to date and return it.
+
+    With no snapshot, an unreadable one, or `full`, everything is pulled.
+    Otherwise only records at or after each table's high-water mark are
+    fetched and patched into the existing columns. If the people no longer
+    match the server's count, something was deleted (or merged) upstream and
+    the people are pulled again in full. When nothing changed the snapshot
+    already mapped is returned as it is, and the file is not rewritten.
+    """
+    target = target.rstrip("/")
+    session = session or make_session(concurrency)
+    current = None if full else load(target)
+    stats = {"mode": "full" if current is None else "incremental"}
+
+    if current is None:
+        people = list(_fetch_people(session, target, None, concurrency))
+        check_ins = list(fetch_check_ins(session, target, None, concurrency))
+        # Newest first, as PCO pages them. Sorted here because not every server
+        # honours the ordering; ties keep the order they arrived in.
+        check_ins.sort(key=lambda c: parse_timestamp(c["attributes"].get("created_at")), reverse=True)
+        columns = {**_person_columns(people), **_check_in_columns(check_ins)}
+        events = fetch_events(session, target)
+    else:
+        people_since = _high_water(current.columns["people.updated_at"])
+        check_ins_since = _high_water(current.columns["checkins.created_at"])
+        changed = list(_fetch_people(session, target, people_since, concurrency))
+        new_check_ins = list(fetch_check_ins(session, target, check_ins_since, concurrency))
+
+        people_columns, people_changed = _patch_people(current, changed)
+        check_in_columns, check_ins_new = _patch_check_ins(current, new_check_ins)
+        stats.update(people_changed=people_changed, check_ins_new=check_ins_new)
+        held = len(current) if people_columns is None else len(people_columns["people.id"])
+        if _total_count(session, target, "/people/v2/people") != held:
+            stats["mode"] = "full (people count changed)"
+            people_columns = _person_columns(_fetch_people(session, target, None, concurrency))
+
+        # Events are a handful of rows that rarely change; fetch them again only
+        # when a new check-in names one the snapshot does not know.
+        events = current.events
+        known = {e["id"] for e in events}
+        if check_in_columns is not None and not known.issuperset(
+                check_in_columns["checkins.event_id"].take(np.arange(check_ins_new))):
+            events = fetch_events(session, target)
+
+        if people_columns is None and check_in_columns is None and events is current.events:
+            stats["mode"] = "unchanged"
+            current.meta["stats"] = stats
+            return current
+        columns = {**(people_columns or current.table_columns("people", *(n for n, _, _ in CONTACTS))),
+                   **(check_in_columns or current.table_columns("checkins"))}
+
+    meta = {"target": target, "refreshed_at": time.time(), "events": events, "stats": stats}
+    path = snapshot_path(target)
+    write_columns(path, columns, meta)
+    return Snapshot(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the local directory snapshot.")
+    parser.add_argument("--target", default=API_TARGET, help="API origin (default: $VITE_API_TARGET)")
+    parser.add_argument("--full", action="store_true", help="ignore the existing snapshot and pull everything")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with metrics.run("snapshot", args):
+        snap = refresh(args.target, full=args.full, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(snap.path)
+    print(f"{snap.path}: {len(snap)} people, {len(snap.columns['checkins.id'])} check-ins, "
+          f"{len(snap.events)} events, {size / 1024:.0f} KiB")
+    print(f"{snap.meta['stats']} in {elapsed:.2f}s")
@@ -1,262 +1,305 @@
-// A comprehensive mapping of 3-digit ZIP Code prefixes (SCFs) to their most common Area Code.
+// Generated by generate_area_codes.py; edit the script, not this file.
+//
+// The most common Area Code for each 3-digit ZIP Code prefix (SCF).
 // This is used as a fallback for 7-digit phone numbers when a ZIP code is available.
+//
+// A ZIP's prefix is its slot in AREA_CODE_SLOTS, which holds 1 + an index into
+// AREA_CODES (0 means no mapping). A lookup is two array reads; there is no
+// table to build on first use.
 
-const COMPRESSED_MAPPING: Record<string, string> = {
-  '413': '010|011|012|013',
-  '978': '014|018|019',
-  '508': '015|016|017|023|025|026|027',
-  '781': '020|024',
-  '617': '021|022',
-  '401': '028|029',
-  '603': '030|031|032|033|034|035|036|037|038',
-  '207': '039|040|041|042|043|044|045|046|047|048|049',
-  '802': '050|051|052|053|054|056|057|058|059',
-  '860': '060|061|062|063',
-  '203': '064|065|066|067|068|069',
-  '201': '070|073|076',
-  '973': '071|074|075|078|079',
-  '908': '072',
-  '732': '077|087|088|089',
-  '856': '080|081|083',
-  '609': '082|084|085|086',
-  '212': '100|101|102',
-  '718': '103|104|111|112|113|114|116',
-  '914': '105|106|107|108',
-  '845': '109|124|125|126|127',
-  '516': '110|115|118',
-  '631': '117|119',
-  '518': '120|121|122|123|128|129',
-  '315': '130|131|132|133|134|135|136',
-  '607': '137|138|139|148|149',
-  '716': '140|141|142|143|147',
-  '585': '144|145|146',
-  '724': '150|153|154|156|157|160|161',
-  '412': '151|152',
-  '814': '155|158|159|162|163|164|165|166|167|168',
-  '570': '169|177|178|179|182|183|184|185|186|187|188',
-  '717': '170|171|172|173|174|175|176',
-  '610': '180|181|190|193|194|195|196',
-  '215': '189|191|192',
-  '302': '197|198|199',
-  '202': '200|202|203|204|205',
-  '703': '201|220|221|222|223',
-  '301': '206|207|208|209|215|217',
-  '410': '210|211|212|214|216|218|219',
-  '540': '224|225|226|227|228|240|241|244',
-  '434': '229|239|245',
-  '804': '230|231|232|238',
-  '757': '233|234|235|236|237',
-  '276': '242|243|246',
-  '304': '247|248|249|250|251|252|253|254|255|256|257|258|259|260|261|262|263|264|265|266|267|268',
-  '336': '270|271|272|273|274',
-  '919': '275|276|277',
-  '252': '278|279',
-  '704': '280|281|282',
-  '910': '283|284|285',
-  '828': '286|287|288|289',
-  '803': '290|291|292|297|298',
-  '864': '293|296',
-  '843': '294|295|299',
-  '770': '300|301|302',
-  '404': '303',
-  '912': '304|313|314|315',
-  '706': '305|306|307|308|309',
-  '478': '310|311|312',
-  '229': '316|317|318|319',
-  '904': '320|322',
-  '386': '321',
-  '850': '323|324|325',
-  '352': '326|344|346',
-  '407': '327|328|347',
-  '321': '329',
-  '305': '330|331|332',
-  '954': '333',
-  '561': '334',
-  '813': '335|336',
-  '727': '337',
-  '863': '338',
-  '239': '339|341',
-  '941': '342',
-  '772': '349',
-  '205': '350|351|352|354|355|358|369',
-  '256': '356|357|359|362',
-  '334': '360|361|363|367|368',
-  '251': '364|365|366',
-  '615': '370|371|372',
-  '931': '373|374|384|385',
-  '865': '376|377|378|379',
-  '901': '380|381',
-  '731': '382|383',
-  '662': '386|387|388|389|397',
-  '601': '390|391|392|393|394|396',
-  '228': '395',
-  '502': '400|401|402',
-  '859': '403|404|405|410',
-  '606': '406|407|408|409|411|412|413|414|415|416|417|418|425|426',
-  '270': '420|421|422|423|424|427',
-  '614': '430|431|432',
-  '740': '433|437|438|439|456|457',
-  '419': '434|435|436|448|449|458',
-  '440': '440',
-  '216': '441',
-  '330': '442|443|444|445|446|447',
-  '513': '450|452',
-  '937': '451|453|454|455',
-  '317': '460|461|462',
-  '219': '463|464',
-  '574': '465|466',
-  '260': '467|468',
-  '765': '469|473|479',
-  '812': '470|471|472|474|475|476|477|478',
-  '248': '480|483',
-  '734': '481',
-  '313': '482',
-  '810': '484|485',
-  '989': '486|487',
-  '517': '488|489|492',
-  '269': '490|491',
-  '616': '493|494|495',
-  '231': '496|497',
-  '906': '498|499',
-  '515': '500|501|502|503|505',
-  '641': '504|508|525',
-  '319': '506|507|522|523|524|526',
-  '712': '510|511|512|513|514|515|516',
-  '563': '520|521|527|528',
-  '920': '530|541|542|543|549',
-  '262': '531|534',
-  '414': '532',
-  '608': '535|537|538|539|546',
-  '715': '540|544|545|547|548',
-  '651': '550|551',
-  '952': '553',
-  '612': '554',
-  '218': '556|557|558|564|565|566|567',
-  '507': '559|560|561',
-  '320': '562|563',
-  '605': '570|571|572|573|574|575|576|577',
-  '701': '580|581|582|583|584|585|586|587|588',
-  '406': '590|591|592|593|594|595|596|597|598|599',
-  '847': '600|602',
-  '630': '601|605',
-  '708': '603|604',
-  '312': '606',
-  '773': '607|608',
-  '815': '609|610|611|613',
-  '309': '612|614|615|616|617',
-  '217': '618|619|623|625|626|627',
-  '618': '620|622|624|628|629',
-  '636': '630|633',
-  '314': '631',
-  '573': '634|636|637|638|639|650|651|652|654|655',
-  '660': '635|644|645|646|647|653',
-  '816': '640|641',
-  '417': '648|656|657|658',
-  '913': '660|661|662',
-  '785': '664|665|666|669|674|675|676|677',
-  '620': '667|668|673|678|679',
-  '316': '670|671|672',
-  '402': '680|681|683|684|685|686|687',
-  '308': '688|689|690|691|692|693',
-  '504': '700|701',
-  '985': '703|704',
-  '337': '705|706',
-  '225': '707|708',
-  '318': '710|711|712|713|714',
-  '870': '716|717|718|723|724|725|726',
-  '501': '719|720|721|722',
-  '479': '727|728|729',
-  '405': '730|731|748',
-  '580': '734|735|736|737|738|739|746|747',
-  '918': '740|741|743|744|745|749',
-  '972': '750|751|754',
-  '214': '752|753',
-  '903': '755|756|757|758',
-  '936': '759',
-  '817': '760|761',
-  '940': '762|763',
-  '254': '764|765|766|767',
-  '325': '768|769|795|796',
-  '713': '770|772',
-  '281': '773|774',
-  '409': '775|776|777',
-  '979': '778|789',
-  '361': '779|783|784',
-  '830': '780|781|788',
-  '210': '782',
-  '956': '785',
-  '512': '786|787',
-  '806': '790|791|792|793|794',
-  '432': '797|798',
-  '915': '799',
-  '303': '800|801|802|803',
-  '970': '804|805|806|807|813|814|815|816',
-  '719': '808|809|810|811|812',
-  '307': '820|821|822|823|824|825|826|827|828|829|830|831',
-  '208': '832|833|834|835|836|837|838',
-  '801': '840|841|844|846',
-  '435': '843|845|847',
-  '623': '850|853',
-  '480': '852',
-  '520': '855|856|857',
-  '928': '859|860|863|864|865',
-  '505': '870|871|873|874|875',
-  '575': '877|878|879|880|881|882|883|884',
-  '702': '889|890|891',
-  '775': '893|894|895|897|898',
-  '213': '900',
-  '310': '902|903|904',
-  '562': '905|906|907|908',
-  '626': '910|911|917|918',
-  '818': '912|913|914|915|916',
-  '619': '919|921',
-  '760': '920|922',
-  '909': '923|924',
-  '951': '925',
-  '949': '926',
-  '714': '927|928',
-  '805': '930|931|934',
-  '559': '932|936|937|938',
-  '661': '933|935',
-  '831': '939',
-  '650': '940|943|944',
-  '415': '941|949',
-  '916': '942|956|957|958',
-  '510': '945|946|947|948',
-  '408': '950|951',
-  '209': '952|953',
-  '707': '954|955',
-  '530': '959|960|961',
-  '808': '967|968',
-  '503': '970|971|972|973',
-  '541': '974|975|976|977|978|979',
-  '206': '980|981',
-  '425': '982',
-  '253': '983|984',
-  '360': '985|986',
-  '509': '988|989|990|991|992|993|994',
-  '907': '995|996|997|998|999',
-};
-
-let uncompressedMapping: Record<string, string> | null = null;
-
-const getUncompressedMapping = (): Record<string, string> => {
-  if (uncompressedMapping) return uncompressedMapping;
+const AREA_CODES: readonly string[] = [
+  '413',
+  '978',
+  '508',
+  '781',
+  '617',
+  '401',
+  '603',
+  '207',
+  '802',
+  '860',
+  '203',
+  '201',
+  '973',
+  '908',
+  '732',
+  '856',
+  '609',
+  '212',
+  '718',
+  '914',
+  '845',
+  '516',
+  '631',
+  '518',
+  '315',
+  '607',
+  '716',
+  '585',
+  '724',
+  '412',
+  '814',
+  '570',
+  '717',
+  '610',
+  '215',
+  '302',
+  '202',
+  '703',
+  '301',
+  '410',
+  '540',
+  '434',
+  '804',
+  '757',
+  '276',
+  '304',
+  '336',
+  '919',
+  '252',
+  '704',
+  '910',
+  '828',
+  '803',
+  '864',
+  '843',
+  '770',
+  '404',
+  '912',
+  '706',
+  '478',
+  '229',
+  '904',
+  '386',
+  '850',
+  '352',
+  '407',
+  '321',
+  '305',
+  '954',
+  '561',
+  '813',
+  '727',
+  '863',
+  '239',
+  '941',
+  '772',
+  '205',
+  '256',
+  '334',
+  '251',
+  '615',
+  '931',
+  '865',
+  '901',
+  '731',
+  '662',
+  '601',
+  '228',
+  '502',
+  '859',
+  '606',
+  '270',
+  '614',
+  '740',
+  '419',
+  '440',
+  '216',
+  '330',
+  '513',
+  '937',
+  '317',
+  '219',
+  '574',
+  '260',
+  '765',
+  '812',
+  '248',
+  '734',
+  '313',
+  '810',
+  '989',
+  '517',
+  '269',
+  '616',
+  '231',
+  '906',
+  '515',
+  '641',
+  '319',
+  '712',
+  '563',
+  '920',
+  '262',
+  '414',
+  '608',
+  '715',
+  '651',
+  '952',
+  '612',
+  '218',
+  '507',
+  '320',
+  '605',
+  '701',
+  '406',
+  '847',
+  '630',
+  '708',
+  '312',
+  '773',
+  '815',
+  '309',
+  '217',
+  '618',
+  '636',
+  '314',
+  '573',
+  '660',
+  '816',
+  '417',
+  '913',
+  '785',
+  '620',
+  '316',
+  '402',
+  '308',
+  '504',
+  '985',
+  '337',
+  '225',
+  '318',
+  '870',
+  '501',
+  '479',
+  '405',
+  '580',
+  '918',
+  '972',
+  '214',
+  '903',
+  '936',
+  '817',
+  '940',
+  '254',
+  '325',
+  '713',
+  '281',
+  '409',
+  '979',
+  '361',
+  '830',
+  '210',
+  '956',
+  '512',
+  '806',
+  '432',
+  '915',
+  '303',
+  '970',
+  '719',
+  '307',
+  '208',
+  '801',
+  '435',
+  '623',
+  '480',
+  '520',
+  '928',
+  '505',
+  '575',
+  '702',
+  '775',
+  '213',
+  '310',
+  '562',
+  '626',
+  '818',
+  '619',
+  '760',
+  '909',
+  '951',
+  '949',
+  '714',
+  '805',
+  '559',
+  '661',
+  '831',
+  '650',
+  '415',
+  '916',
+  '510',
+  '408',
+  '209',
+  '707',
+  '530',
+  '808',
+  '503',
+  '541',
+  '206',
+  '425',
+  '253',
+  '360',
+  '509',
+  '907',
+];
 
-  uncompressedMapping = {};
-  for (const [areaCode, prefixesStr] of Object.entries(COMPRESSED_MAPPING)) {
-    const prefixes = prefixesStr.split('|');
-    for (const prefix of prefixes) {
-      uncompressedMapping[prefix] = areaCode;
-    }
-  }
+const AREA_CODE_SLOTS = new Uint8Array([
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 3, 3, 3, 2, 2, 4, 5, 5, 3, 4,
+  3, 3, 3, 6, 6, 7, 7, 7, 7, 7, 7, 7, 7, 7, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8,
+  9, 9, 9, 9, 9, 0, 9, 9, 9, 9, 10, 10, 10, 10, 11, 11, 11, 11, 11, 11, 12, 13, 14, 12, 13,
+  13, 12, 15, 13, 13, 16, 16, 17, 16, 17, 17, 17, 15, 15, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  18, 18, 18, 19, 19, 20, 20, 20, 20, 21, 22, 19, 19, 19, 19, 22, 19, 23, 22, 23, 24, 24, 24, 24, 21,
+  21, 21, 21, 24, 24, 25, 25, 25, 25, 25, 25, 25, 26, 26, 26, 27, 27, 27, 27, 28, 28, 28, 27, 26, 26,
+  29, 30, 30, 29, 29, 31, 29, 29, 31, 31, 29, 29, 31, 31, 31, 31, 31, 31, 31, 32, 33, 33, 33, 33, 33,
+  33, 33, 32, 32, 32, 34, 34, 32, 32, 32, 32, 32, 32, 32, 35, 34, 35, 35, 34, 34, 34, 34, 36, 36, 36,
+  37, 38, 37, 37, 37, 37, 39, 39, 39, 39, 40, 40, 40, 0, 40, 39, 40, 39, 40, 40, 38, 38, 38, 38, 41,
+  41, 41, 41, 41, 42, 43, 43, 43, 44, 44, 44, 44, 44, 43, 42, 41, 41, 45, 45, 41, 42, 45, 46, 46, 46,
+  46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 0, 47, 47, 47, 47, 47,
+  48, 48, 48, 49, 49, 50, 50, 50, 51, 51, 51, 52, 52, 52, 52, 53, 53, 53, 54, 55, 55, 54, 53, 53, 55,
+  56, 56, 56, 57, 58, 59, 59, 59, 59, 59, 60, 60, 60, 58, 58, 58, 61, 61, 61, 61, 62, 63, 62, 64, 64,
+  64, 65, 66, 66, 67, 68, 68, 68, 69, 70, 71, 71, 72, 73, 74, 0, 74, 75, 0, 65, 0, 65, 66, 0, 76,
+  77, 77, 77, 0, 77, 77, 78, 78, 77, 78, 79, 79, 78, 79, 80, 80, 80, 79, 79, 77, 81, 81, 81, 82, 82,
+  0, 83, 83, 83, 83, 84, 84, 85, 85, 82, 82, 86, 86, 86, 86, 87, 87, 87, 87, 87, 88, 87, 86, 0, 0,
+  89, 89, 89, 90, 90, 90, 91, 91, 91, 91, 90, 91, 91, 91, 91, 91, 91, 91, 91, 0, 92, 92, 92, 92, 92,
+  91, 91, 92, 0, 0, 93, 93, 93, 94, 95, 95, 95, 94, 94, 94, 96, 97, 98, 98, 98, 98, 98, 98, 95, 95,
+  99, 100, 99, 100, 100, 100, 94, 94, 95, 0, 101, 101, 101, 102, 102, 103, 103, 104, 104, 105, 106, 106, 106, 105, 106,
+  106, 106, 106, 106, 105, 107, 108, 109, 107, 110, 110, 111, 111, 112, 112, 113, 113, 112, 114, 114, 114, 115, 115, 116, 116,
+  117, 117, 117, 117, 118, 117, 119, 119, 118, 0, 120, 120, 120, 120, 120, 120, 120, 0, 0, 0, 121, 121, 119, 119, 119,
+  118, 119, 121, 121, 0, 122, 123, 124, 0, 123, 125, 0, 125, 125, 125, 126, 122, 122, 122, 126, 126, 125, 126, 126, 122,
+  127, 127, 0, 128, 129, 0, 130, 130, 130, 131, 131, 131, 132, 132, 130, 130, 130, 130, 0, 0, 133, 133, 133, 133, 133,
+  133, 133, 133, 0, 0, 134, 134, 134, 134, 134, 134, 134, 134, 134, 0, 135, 135, 135, 135, 135, 135, 135, 135, 135, 135,
+  136, 137, 136, 138, 138, 137, 139, 140, 140, 141, 141, 141, 142, 141, 142, 142, 142, 142, 143, 143, 144, 0, 144, 143, 144,
+  143, 143, 143, 144, 144, 145, 146, 0, 145, 147, 148, 147, 147, 147, 147, 149, 149, 0, 0, 148, 148, 148, 148, 150, 0,
+  147, 147, 147, 148, 147, 147, 150, 150, 150, 0, 151, 151, 151, 0, 152, 152, 152, 153, 153, 152, 154, 154, 154, 153, 152,
+  152, 152, 152, 153, 153, 155, 155, 0, 155, 155, 155, 155, 155, 156, 156, 156, 156, 156, 156, 0, 0, 0, 0, 0, 0,
+  157, 157, 0, 158, 158, 159, 159, 160, 160, 0, 161, 161, 161, 161, 161, 0, 162, 162, 162, 163, 163, 163, 163, 162, 162,
+  162, 162, 164, 164, 164, 165, 165, 0, 0, 166, 166, 166, 166, 166, 166, 167, 167, 0, 167, 167, 167, 166, 166, 165, 167,
+  168, 168, 169, 169, 168, 170, 170, 170, 170, 171, 172, 172, 173, 173, 174, 174, 174, 174, 175, 175, 176, 0, 176, 177, 177,
+  178, 178, 178, 179, 180, 181, 181, 182, 180, 180, 183, 184, 184, 181, 179, 185, 185, 185, 185, 185, 175, 175, 186, 186, 187,
+  188, 188, 188, 188, 189, 189, 189, 189, 190, 190, 190, 190, 190, 189, 189, 189, 189, 0, 0, 0, 191, 191, 191, 191, 191,
+  191, 191, 191, 191, 191, 191, 191, 192, 192, 192, 192, 192, 192, 192, 0, 193, 193, 0, 194, 193, 194, 193, 194, 0, 0,
+  195, 0, 196, 195, 0, 197, 197, 197, 0, 198, 198, 0, 0, 198, 198, 198, 0, 0, 0, 0, 199, 199, 0, 199, 199,
+  199, 0, 200, 200, 200, 200, 200, 200, 200, 200, 0, 0, 0, 0, 201, 201, 201, 0, 202, 202, 202, 0, 202, 202, 0,
+  203, 0, 204, 204, 204, 205, 205, 205, 205, 0, 206, 206, 207, 207, 207, 207, 207, 206, 206, 208, 209, 208, 209, 210, 210,
+  211, 212, 213, 213, 0, 214, 214, 215, 216, 214, 216, 215, 215, 215, 217, 218, 219, 220, 218, 218, 221, 221, 221, 221, 219,
+  222, 222, 223, 223, 224, 224, 220, 220, 220, 225, 225, 225, 0, 0, 0, 0, 0, 226, 226, 0, 227, 227, 227, 227, 228,
+  228, 228, 228, 228, 228, 229, 229, 230, 231, 231, 232, 232, 0, 233, 233, 233, 233, 233, 233, 233, 234, 234, 234, 234, 234,
+]);
 
-  return uncompressedMapping;
+/** The slot for a ZIP's 3-digit prefix, or -1 when it does not start with three digits. */
+export const zipPrefixSlot = (zip: string): number => {
+  const a = zip.charCodeAt(0) - 48;
+  const b = zip.charCodeAt(1) - 48;
+  const c = zip.charCodeAt(2) - 48;
+  if (!(a >= 0 && a <= 9 && b >= 0 && b <= 9 && c >= 0 && c <= 9)) return -1;
+  return a * 100 + b * 10 + c;
 };
 
 export const getAreaCodeFromZip = (zip: string): string | null => {
   if (!zip || zip.length < 3) return null;
-  const prefix = zip.substring(0, 3);
-  const mapping = getUncompressedMapping();
-  return mapping[prefix] || null;
+  const slot = zipPrefixSlot(zip);
+  if (slot < 0) return null;
+  const entry = AREA_CODE_SLOTS[slot];
+  return entry ? AREA_CODES[entry - 1] : null;
 };
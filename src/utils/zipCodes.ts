@@ -1,50 +1,100 @@
-// A mapping of 3-digit ZIP Code prefixes to major City/State pairs.
+// Generated by generate_area_codes.py; edit the script, not this file.
+//
+// The major City/State for each 3-digit ZIP Code prefix.
 // Used for Zip Code Enrichment to auto-fill address details.
 
+import { zipPrefixSlot } from './areaCodes';
+
 export interface LocationData {
   city: string;
   state: string;
 }
 
-export const ZIP_PREFIX_MAP: Record<string, LocationData> = {
-  '100': { city: 'New York', state: 'NY' },
-  '900': { city: 'Los Angeles', state: 'CA' },
-  '606': { city: 'Chicago', state: 'IL' },
-  '770': { city: 'Houston', state: 'TX' },
-  '850': { city: 'Phoenix', state: 'AZ' },
-  '191': { city: 'Philadelphia', state: 'PA' },
-  '782': { city: 'San Antonio', state: 'TX' },
-  '921': { city: 'San Diego', state: 'CA' },
-  '752': { city: 'Dallas', state: 'TX' },
-  '787': { city: 'Austin', state: 'TX' },
-  '322': { city: 'Jacksonville', state: 'FL' },
-  '951': { city: 'San Jose', state: 'CA' },
-  '761': { city: 'Fort Worth', state: 'TX' },
-  '432': { city: 'Columbus', state: 'OH' },
-  '282': { city: 'Charlotte', state: 'NC' },
-  '462': { city: 'Indianapolis', state: 'IN' },
-  '941': { city: 'San Francisco', state: 'CA' },
-  '981': { city: 'Seattle', state: 'WA' },
-  '802': { city: 'Denver', state: 'CO' },
-  '200': { city: 'Washington', state: 'DC' },
-  '021': { city: 'Boston', state: 'MA' },
-  '372': { city: 'Nashville', state: 'TN' },
-  '891': { city: 'Las Vegas', state: 'NV' },
-  '482': { city: 'Detroit', state: 'MI' },
-  '972': { city: 'Portland', state: 'OR' },
-  '381': { city: 'Memphis', state: 'TN' },
-  '402': { city: 'Louisville', state: 'KY' },
-  '532': { city: 'Milwaukee', state: 'WI' },
-  '212': { city: 'Baltimore', state: 'MD' },
-  '303': { city: 'Atlanta', state: 'GA' },
-  '641': { city: 'Kansas City', state: 'MO' },
-  '331': { city: 'Miami', state: 'FL' },
-};
+const PLACES: readonly LocationData[] = [
+  { city: 'Boston', state: 'MA' },
+  { city: 'New York', state: 'NY' },
+  { city: 'Philadelphia', state: 'PA' },
+  { city: 'Washington', state: 'DC' },
+  { city: 'Baltimore', state: 'MD' },
+  { city: 'Charlotte', state: 'NC' },
+  { city: 'Atlanta', state: 'GA' },
+  { city: 'Jacksonville', state: 'FL' },
+  { city: 'Miami', state: 'FL' },
+  { city: 'Nashville', state: 'TN' },
+  { city: 'Memphis', state: 'TN' },
+  { city: 'Louisville', state: 'KY' },
+  { city: 'Columbus', state: 'OH' },
+  { city: 'Indianapolis', state: 'IN' },
+  { city: 'Detroit', state: 'MI' },
+  { city: 'Milwaukee', state: 'WI' },
+  { city: 'Chicago', state: 'IL' },
+  { city: 'Kansas City', state: 'MO' },
+  { city: 'Dallas', state: 'TX' },
+  { city: 'Fort Worth', state: 'TX' },
+  { city: 'Houston', state: 'TX' },
+  { city: 'San Antonio', state: 'TX' },
+  { city: 'Austin', state: 'TX' },
+  { city: 'Denver', state: 'CO' },
+  { city: 'Phoenix', state: 'AZ' },
+  { city: 'Las Vegas', state: 'NV' },
+  { city: 'Los Angeles', state: 'CA' },
+  { city: 'San Diego', state: 'CA' },
+  { city: 'San Francisco', state: 'CA' },
+  { city: 'San Jose', state: 'CA' },
+  { city: 'Portland', state: 'OR' },
+  { city: 'Seattle', state: 'WA' },
+];
+
+// Slot = the ZIP's 3-digit prefix; value = 1 + an index into PLACES, or 0.
+const PLACE_SLOTS = new Uint8Array([
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, 0,
+  4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 5, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 6, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 7, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0,
+  0, 0, 0, 0, 0, 0, 9, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0,
+  0, 0, 0, 0, 0, 0, 11, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 12, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 13, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 14, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 16, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 18, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 19, 0, 0, 0, 0, 0, 0, 0, 0, 20, 0, 0, 0, 0, 0, 0, 0, 0, 21, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 22, 0, 0, 0, 0, 23, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 24, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  25, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 26, 0, 0, 0, 0, 0, 0, 0, 0,
+  27, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 28, 0, 0, 0,
+  0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 29, 0, 0, 0, 0, 0, 0, 0, 0,
+  0, 30, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 31, 0, 0,
+  0, 0, 0, 0, 0, 0, 32, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+]);
 
 export const enrichZipCode = (zip: string): LocationData | null => {
   if (!zip || zip.length < 3) return null;
-  const prefix = zip.substring(0, 3);
-  return ZIP_PREFIX_MAP[prefix] || null;
+  const slot = zipPrefixSlot(zip);
+  if (slot < 0) return null;
+  const entry = PLACE_SLOTS[slot];
+  return entry ? PLACES[entry - 1] : null;
 };
 
 export const enrichZipCodeAsync = async (zip: string): Promise<LocationData | null> => {
@@ -0,0 +1,259 @@
+import argparse
+import json
+import sys
+import time
+
+from playwright.sync_api import sync_playwright
+
+from fixtures import Replayer
+
+# Times the flows the verification scripts walk through, instead of sleeping
+# past them. Every run gets a fresh context, so nothing is cached between runs.
+#
+# Times come from the page's own clock (`performance.now()`), not from Python:
+# an init script stamps the moment each watched element first appears, and the
+# moment of the last input and the last click, so a render time is exactly
+# "click to element on screen" with none of Playwright's round trips in it.
+#
+# Several directory sizes are benchmarked by pointing `--directory` at one app
+# per seeded mock API, e.g. `--directory 1k=http://localhost:5173
+# --directory 50k=http://localhost:5174`. Or, with no mock API running at all,
+# replay a fixture recorded by verify_all.py at several sizes: `--replay
+# fixtures.json.gz --scale 1000 --scale 50000`.
+
+DEFAULT_DIRECTORY = "mock=http://localhost:5173"
+DEFAULT_RUNS = 5
+
+# A p50 this much slower than the baseline's fails the comparison, unless the
+# difference is under the floor, which keeps jitter on fast steps from failing it.
+DEFAULT_TOLERANCE = 0.2
+REGRESSION_FLOOR_MS = 50
+
+STEP_TIMEOUT_MS = 30000
+
+# name -> (CSS selector, text it must contain or None). `app` is the toolbar,
+# which only renders once the credentials check has passed.
+MARKS = {
+    "app": (".toolbar", None),
+    "chart": (".recharts-surface", None),
+    "review_mode": (".review-mode-overlay", None),
+    "volunteer_web": ("h1, h2, h3", "The Volunteer Web"),
+}
+
+INIT_SCRIPT = """
+(() => {
+  const watched = %s;
+  const marks = window.__locusMarks = {};
+  const longTasks = window.__locusLongTasks = [];
+  window.__locusInput = 0;
+  window.__locusClick = 0;
+
+  const check = () => {
+    for (const [name, [selector, text]] of Object.entries(watched)) {
+      if (name in marks) continue;
+      for (const el of document.querySelectorAll(selector)) {
+        if (text === null || el.textContent.includes(text)) {
+          marks[name] = performance.now();
+          break;
+        }
+      }
+    }
+  };
+  new MutationObserver(check).observe(document, {childList: true, subtree: true});
+
+  document.addEventListener('input', () => { window.__locusInput = performance.now(); }, true);
+  document.addEventListener('click', () => { window.__locusClick = performance.now(); }, true);
+
+  try {
+    new PerformanceObserver((list) => {
+      for (const entry of list.getEntries()) longTasks.push(entry.duration);
+    }).observe({type: 'longtask', buffered: true});
+  } catch (e) {
+    // No Long Tasks API in this browser; the counts stay at zero.
+  }
+})();
+""" % json.dumps(MARKS)
+
+METRICS = ["login_ms", "first_chart_ms", "review_mode_ms", "volunteer_web_ms",
+           "long_tasks", "long_task_ms", "heap_mb"]
+
+
+def _heap_mb(cdp):
+    metrics = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+    return metrics.get("JSHeapUsedSize", 0) / (1024 * 1024)
+
+
+def _wait_mark(page, name):
+    page.wait_for_function("name => name in window.__locusMarks", arg=name, timeout=STEP_TIMEOUT_MS)
+    return page.evaluate("name => window.__locusMarks[name]", name)
+
+
+def _open_view(page, label):
+    """Click a sidebar item; False when this build has no such view."""
+    item = page.locator(".sidebar-nav button", has_text=label)
+    if item.count() == 0:
+        return False
+    item.first.click()
+    return True
+
+
+def run_once(browser, url, routes=None):
+    """One cold pass over the flows: every metric for this run, None where skipped."""
+    context = browser.new_context(viewport={"width": 1280, "height": 800})
+    context.add_init_script(INIT_SCRIPT)
+    if routes:
+        routes.attach(context)
+    page = context.new_page()
+    cdp = context.new_cdp_session(page)
+    cdp.send("Performance.enable")
+    result = dict.fromkeys(METRICS)
+    heap = []
+
+    try:
+        page.goto(url)
+        page.fill("input[placeholder='Application ID']", "test")
+        page.fill("input[placeholder='Secret']", "test")
+        entered = page.evaluate("window.__locusInput")
+
+        # Includes the app's one-second debounce before it checks credentials;
+        # that is part of what a user waits through too.
+        result["login_ms"] = _wait_mark(page, "app") - entered
+        result["first_chart_ms"] = _wait_mark(page, "chart") - entered
+        heap.append(_heap_mb(cdp))
+
+        if _open_view(page, "Data Health"):
+            button = page.get_by_role("button", name="Review Mode")
+            try:
+                button.wait_for(timeout=STEP_TIMEOUT_MS)
+            except Exception:
+                pass  # No anomalies in this directory, so no Review Mode to time.
+            else:
+                button.click()
+                clicked = page.evaluate("window.__locusClick")
+                result["review_mode_ms"] = _wait_mark(page, "review_mode") - clicked
+                heap.append(_heap_mb(cdp))
+                page.locator(".review-mode-overlay .btn-close").first.click()
+
+        if _open_view(page, "Volunteer Web"):
+            clicked = page.evaluate("window.__locusClick")
+            result["volunteer_web_ms"] = _wait_mark(page, "volunteer_web") - clicked
+            heap.append(_heap_mb(cdp))
+
+        long_tasks = page.evaluate("window.__locusLongTasks")
+        result["long_tasks"] = len(long_tasks)
+        result["long_task_ms"] = sum(long_tasks)
+        result["heap_mb"] = max(heap) if heap else None
+    finally:
+        context.close()
+    return result
+
+
+def percentile(values, p):
+    """Nearest-rank percentile; small run counts make interpolation meaningless."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarise(runs):
+    summary = {}
+    for metric in METRICS:
+        values = [r[metric] for r in runs if r[metric] is not None]
+        if values:
+            summary[metric] = {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                               "runs": len(values)}
+    return summary
+
+
+def compare(report, baseline, tolerance):
+    """Lines describing every metric whose p50 got slower than the baseline allows."""
+    regressions = []
+    for directory, metrics in report.items():
+        for metric, stats in metrics.items():
+            before = (baseline.get(directory) or {}).get(metric)
+            if not before or not metric.endswith("_ms"):
+                continue
+            slower = stats["p50"] - before["p50"]
+            if slower > REGRESSION_FLOOR_MS and stats["p50"] > before["p50"] * (1 + tolerance):
+                regressions.append(f"{directory} {metric}: p50 {before['p50']:.0f}ms -> "
+                                   f"{stats['p50']:.0f}ms (+{slower:.0f}ms)")
+    return regressions
+
+
+def print_report(report):
+    for directory, metrics in report.items():
+        print(f"\n{directory}")
+        for metric in METRICS:
+            if metric in metrics:
+                stats = metrics[metric]
+                print(f"  {metric:18s} p50 {stats['p50']:9.1f}   p95 {stats['p95']:9.1f}   "
+                      f"({stats['runs']} runs)")
+            else:
+                print(f"  {metric:18s} skipped")
+
+
+def parse_directory(value):
+    name, sep, url = value.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError("expected NAME=URL")
+    return name, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard flows.")
+    parser.add_argument("--directory", action="append", type=parse_directory,
+                        help=f"NAME=URL of a running app; repeat for each size (default: {DEFAULT_DIRECTORY})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="cold runs per directory")
+    parser.add_argument("--output", help="write the report here as JSON")
+    parser.add_argument("--baseline", help="compare against this report and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fraction a p50 may grow before it counts as a regression")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="answer API requests from this fixture file (see fixtures.py) instead of a mock API")
+    parser.add_argument("--scale", type=int, action="append",
+                        help="with --replay, a directory size to benchmark; repeat for each")
+    args = parser.parse_args()
+    directories = args.directory or [parse_directory(DEFAULT_DIRECTORY)]
+    if args.scale and not args.replay:
+        parser.error("--scale needs --replay")
+
+    # (name, app URL, fixture to replay or None) for each directory benchmarked
+    targets = [(name, url, None) for name, url in directories]
+    if args.replay:
+        url = directories[0][1]
+        targets = [(f"replay-{n}" if n else "replay", url, Replayer(args.replay, n))
+                   for n in args.scale or [None]]
+
+    report = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for name, url, routes in targets:
+                runs = []
+                for i in range(args.runs):
+                    started = time.perf_counter()
+                    try:
+                        runs.append(run_once(browser, url, routes))
+                    except Exception as e:
+                        print(f"{name} run {i + 1}: Error: {e}")
+                        continue
+                    print(f"{name} run {i + 1}/{args.runs}: {time.perf_counter() - started:.1f}s")
+                report[name] = summarise(runs)
+        finally:
+            browser.close()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nSlower than baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
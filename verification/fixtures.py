@@ -0,0 +1,374 @@
+import copy
+import gzip
+import hashlib
+import json
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Recorded API traffic for the Playwright flows, so they can run without the mock
+# API: record once against a live backend, then replay from the file through
+# `context.route`, with nothing listening on port 3000.
+#
+# A fixture file is gzipped JSON. Every response body is stored once under its
+# digest, and requests point at bodies, so the same page fetched by four flows
+# costs one copy. Page links are stored relative, pcomirror style, so a fixture
+# does not remember which port it was recorded on.
+#
+# Replay serves the people and check-in collections from the records the pages
+# held rather than from the pages themselves: any offset and page size works, and
+# a directory can be scaled up. `scale=50000` clones the recorded people, their
+# contacts and households, and their check-ins until there are that many people,
+# each clone with its own ids, surname, street number, email and phone, so the
+# app renders a directory that size without anything having to serve one.
+#
+# PATCHes are answered from the recording where it has the same request, and
+# otherwise echoed; either way a person's new attributes show up in later reads.
+# Any other request the recording never saw gets a 404 and is listed in `misses`.
+
+API_PATTERN = "**/api/**"
+API_PREFIX = re.compile(r"^.*?/api(?=/)")
+ORIGIN = re.compile(r"^[a-z]+://[^/]+")
+WRITE_METHODS = frozenset(["POST", "PUT", "PATCH", "DELETE"])
+
+PEOPLE = "/people/v2/people"
+CHECK_INS = "/check-ins/v2/check_ins"
+CHECK_IN_COUNT = re.compile(r"^/check-ins/v2/people/([^/]+)$")
+PERSON = re.compile(r"^/people/v2/people/([^/]+)$")
+DEFAULT_PER_PAGE = 25  # the mock's and PCO's
+
+
+def request_key(method, url):
+    """`METHOD /path?sorted=query`, with the origin and `/api` prefix gone."""
+    parts = urlsplit(API_PREFIX.sub("", ORIGIN.sub("", url), count=1))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method} {parts.path}" + (f"?{query}" if query else "")
+
+
+def _relative_links(body):
+    links = body.get("links") if isinstance(body, dict) else None
+    if isinstance(links, dict):
+        body["links"] = {k: ORIGIN.sub("", v) if isinstance(v, str) else v for k, v in links.items()}
+    return body
+
+
+def _digest(body):
+    return hashlib.sha1(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class Recorder:
+    """Route handler that passes requests to the real API and keeps what came back."""
+
+    def __init__(self):
+        self.responses = {}
+        self.bodies = {}
+        self.lock = threading.Lock()
+
+    def attach(self, context, pattern=API_PATTERN):
+        context.route(pattern, self.handle)
+
+    def handle(self, route):
+        request = route.request
+        try:
+            response = route.fetch()
+        except Exception:
+            route.abort()
+            return
+        text = response.text()
+        content_type = response.headers.get("content-type", "application/json")
+        try:
+            body = _relative_links(json.loads(text))
+        except ValueError:
+            body = text
+        entry = {"status": response.status, "type": content_type}
+        if request.method in WRITE_METHODS and request.post_data:
+            entry["request"] = _payload(request)
+        with self.lock:
+            digest = _digest(body)
+            self.bodies[digest] = body
+            self.responses[request_key(request.method, request.url)] = {**entry, "body": digest}
+        route.fulfill(response=response)
+
+    def save(self, path):
+        used = {e["body"] for e in self.responses.values()}
+        data = {"version": 1, "responses": self.responses,
+                "bodies": {k: v for k, v in self.bodies.items() if k in used}}
+        with gzip.open(path, "wt") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+
+def _page(items, query, path, total=None):
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    try:
+        offset = int(params.get("offset") or 0)
+        per_page = int(params.get("per_page") or DEFAULT_PER_PAGE)
+    except ValueError:
+        offset, per_page = 0, DEFAULT_PER_PAGE
+    total = len(items) if total is None else total
+    chunk = items[offset:offset + per_page]
+    links = {"self": f"{path}?{urlencode({**params, 'offset': offset, 'per_page': per_page})}"}
+    if offset + per_page < total:
+        links["next"] = f"{path}?{urlencode({**params, 'offset': offset + per_page, 'per_page': per_page})}"
+    return chunk, links, {"total_count": total, "count": len(chunk)}
+
+
+class Directory:
+    """The people and check-ins a recording saw, scaled to any size."""
+
+    def __init__(self, people, included, check_ins, scale=None):
+        self.base_people = people
+        self.base_included = included
+        self.base_check_ins = check_ins
+        # Clone k of id n is n + k * span, with span past every numeric id recorded.
+        ids = [r["id"] for r in [*people, *included.values(), *check_ins]]
+        ids += [str((r.get("attributes") or {}).get("household_id") or "") for r in people]
+        self.span = 10 ** len(str(max((int(i) for i in ids if i.isdigit()), default=0)))
+        self.surnames = sorted({(p.get("attributes") or {}).get("last_name") or "" for p in people} - {""})
+        self.surname_index = {name: i for i, name in enumerate(self.surnames)}
+        self.people = list(people)
+        self.check_ins = list(check_ins)
+        self.included = dict(included)
+        self.overrides = {}
+        if scale and people and scale > len(people):
+            self._scale(scale)
+        elif scale:
+            self.people = self.people[:scale]
+
+    # -- cloning --
+
+    def clone_id(self, value, k):
+        if value is None or k == 0:
+            return value
+        return str(int(value) + k * self.span) if value.isdigit() else f"{value}~{k}"
+
+    def base_id(self, value):
+        if value.isdigit():
+            return str(int(value) % self.span)
+        return value.split("~", 1)[0]
+
+    def _vary(self, attributes, k):
+        a = dict(attributes)
+        if a.get("last_name") in self.surname_index:
+            a["last_name"] = self.surnames[(self.surname_index[a["last_name"]] + k) % len(self.surnames)]
+            if a.get("name"):
+                a["name"] = f"{a.get('first_name') or ''} {a['last_name']}".strip()
+        if isinstance(a.get("street"), str):
+            a["street"] = _renumber(a["street"], k)
+        if isinstance(a.get("address"), str) and "@" in a["address"]:
+            local, _, domain = a["address"].partition("@")
+            a["address"] = f"{local}.{k}@{domain}"
+        if isinstance(a.get("number"), str):
+            a["number"] = _rephone(a["number"], k)
+        for key, vary in (("email_addresses", "address"), ("addresses", "street"), ("phone_numbers", "number")):
+            if isinstance(a.get(key), list):
+                a[key] = [self._vary(r, k) if isinstance(r, dict) and vary in r else r for r in a[key]]
+        if a.get("household_id"):
+            a["household_id"] = self.clone_id(str(a["household_id"]), k)
+        return a
+
+    def _clone_resource(self, resource, k):
+        clone = {**resource, "id": self.clone_id(resource["id"], k),
+                 "attributes": self._vary(resource.get("attributes") or {}, k)}
+        if resource.get("relationships"):
+            clone["relationships"] = {name: self._clone_rel(rel, k)
+                                      for name, rel in resource["relationships"].items()}
+        return clone
+
+    def _clone_rel(self, rel, k):
+        data = (rel or {}).get("data")
+        if isinstance(data, list):
+            return {**rel, "data": [{**d, "id": self.clone_id(d["id"], k)} for d in data]}
+        if isinstance(data, dict):
+            return {**rel, "data": {**data, "id": self.clone_id(data["id"], k)}}
+        return rel
+
+    def _scale(self, target):
+        n = len(self.base_people)
+        copies = -(-target // n)
+        by_person = {}
+        for c in self.base_check_ins:
+            person = ((c.get("relationships") or {}).get("person") or {}).get("data") or {}
+            by_person.setdefault(person.get("id"), []).append(c)
+        for k in range(1, copies):
+            for person in self.base_people:
+                if len(self.people) >= target:
+                    break
+                self.people.append(self._clone_resource(person, k))
+                for kind, rid in _refs(person):
+                    record = self.base_included.get((kind, rid))
+                    # Events and other shared records are not copied.
+                    if record is not None and kind != "Event":
+                        clone = self._clone_resource(record, k)
+                        self.included[(kind, clone["id"])] = clone
+                for c in by_person.get(person["id"], []):
+                    clone = self._clone_resource(c, k)
+                    event = (c.get("relationships") or {}).get("event")
+                    if event:
+                        clone["relationships"]["event"] = event
+                    self.check_ins.append(clone)
+        # Clones attend when their originals did; keep the recording's newest-first
+        # (or oldest-first) order across them.
+        def created(c):
+            return (c.get("attributes") or {}).get("created_at") or ""
+
+        if len(self.base_check_ins) > 1:
+            newest_first = created(self.base_check_ins[0]) >= created(self.base_check_ins[-1])
+            self.check_ins.sort(key=created, reverse=newest_first)
+
+    # -- serving --
+
+    def person(self, person):
+        override = self.overrides.get(person["id"])
+        if override:
+            person = {**person, "attributes": {**(person.get("attributes") or {}), **override}}
+        return person
+
+    def people_page(self, query):
+        chunk, links, meta = _page(self.people, query, PEOPLE)
+        data = [self.person(p) for p in chunk]
+        body = {"links": links, "data": data, "meta": meta}
+        included = [self.included[ref] for p in chunk for ref in _refs(p) if ref in self.included]
+        if included:
+            body["included"] = included
+        return body
+
+    def check_ins_page(self, query):
+        chunk, links, meta = _page(self.check_ins, query, CHECK_INS)
+        return {"links": links, "data": chunk, "meta": meta}
+
+    def find(self, person_id):
+        for p in self.people:
+            if p["id"] == person_id:
+                return self.person(p)
+        return None
+
+
+def _payload(request):
+    try:
+        return json.loads(request.post_data) if request.post_data else None
+    except ValueError:
+        return None
+
+
+def _refs(resource):
+    for rel in (resource.get("relationships") or {}).values():
+        data = (rel or {}).get("data")
+        for d in data if isinstance(data, list) else [data] if isinstance(data, dict) else []:
+            yield d.get("type"), d.get("id")
+
+
+def _renumber(street, k):
+    match = re.match(r"(\d+)(.*)", street)
+    if not match:
+        return street
+    return f"{(int(match.group(1)) + k * 37) % 9900 + 100}{match.group(2)}"
+
+
+def _rephone(number, k):
+    digits = [i for i, c in enumerate(number) if c.isdigit()]
+    if len(digits) < 4:
+        return number
+    tail = digits[-4:]
+    value = (int("".join(number[i] for i in tail)) + k * 7919) % 10000
+    chars = list(number)
+    for i, d in zip(tail, f"{value:04d}"):
+        chars[i] = d
+    return "".join(chars)
+
+
+class Replayer:
+    """Route handler that answers API requests from a fixture file."""
+
+    def __init__(self, path, scale=None):
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+        self.responses = data["responses"]
+        self.bodies = data["bodies"]
+        self.misses = []
+        self.lock = threading.Lock()
+        self.directory = self._directory(scale)
+
+    def _directory(self, scale):
+        people, included, check_ins = {}, {}, {}
+        pages = []
+        for key, entry in self.responses.items():
+            method, _, target = key.partition(" ")
+            path, _, query = target.partition("?")
+            body = self.bodies[entry["body"]]
+            if method == "GET" and entry["status"] == 200 and isinstance(body, dict):
+                offset = dict(parse_qsl(query)).get("offset") or "0"
+                pages.append((int(offset) if offset.isdigit() else 0, path, body))
+        # In page order, so the directory keeps the order the API served it in.
+        for _, path, body in sorted(pages, key=lambda page: page[0]):
+            if path == PEOPLE:
+                for p in body.get("data", []):
+                    people.setdefault(p["id"], p)
+                for r in body.get("included") or []:
+                    included[(r["type"], r["id"])] = r
+            elif path == CHECK_INS:
+                for c in body.get("data", []):
+                    check_ins.setdefault(c["id"], c)
+        if not people and not check_ins:
+            return None
+        return Directory(list(people.values()), included, list(check_ins.values()), scale)
+
+    def attach(self, context, pattern=API_PATTERN):
+        context.route(pattern, self.handle)
+
+    def handle(self, route):
+        request = route.request
+        status, body = self.answer(request.method, request.url, _payload(request))
+        route.fulfill(status=status, content_type="application/json", body=json.dumps(body))
+
+    def answer(self, method, url, payload=None):
+        """(status, JSON body) for one request."""
+        key = request_key(method, url)
+        target = key.split(" ", 1)[1]
+        path, _, query = target.partition("?")
+        directory = self.directory
+
+        if method == "GET" and directory is not None:
+            if path == PEOPLE and directory.people:
+                return 200, directory.people_page(query)
+            if path == CHECK_INS and directory.check_ins:
+                return 200, directory.check_ins_page(query)
+            match = PERSON.match(path)
+            if match and key not in self.responses:
+                person = directory.find(match.group(1))
+                if person:
+                    return 200, {"data": person}
+
+        if method == "PATCH" and directory is not None and PERSON.match(path):
+            attributes = ((payload or {}).get("data") or {}).get("attributes") or {}
+            person_id = PERSON.match(path).group(1)
+            with self.lock:
+                directory.overrides[person_id] = {**directory.overrides.get(person_id, {}), **attributes}
+
+        entry = self.responses.get(key)
+        if entry is None and directory is not None:
+            # A clone asks for what its original asked for.
+            match = CHECK_IN_COUNT.match(path) or PERSON.match(path)
+            if match:
+                original = path.replace(match.group(1), directory.base_id(match.group(1)))
+                entry = self.responses.get(f"{method} {original}" + (f"?{query}" if query else ""))
+                if entry is not None:
+                    body = copy.deepcopy(self.bodies[entry["body"]])
+                    if isinstance(body, dict) and isinstance(body.get("data"), dict):
+                        body["data"]["id"] = match.group(1)
+                    return entry["status"], body
+        if entry is not None:
+            return entry["status"], self.bodies[entry["body"]]
+
+        if method in WRITE_METHODS:
+            # Nothing recorded: answer the way the mock does, echoing the write.
+            data = (payload or {}).get("data") or {}
+            status = 201 if method == "POST" else 200
+            if PERSON.match(path) and directory is not None:
+                person = directory.find(PERSON.match(path).group(1))
+                if person:
+                    return status, {"data": person}
+            return status, {"data": {**data, "id": data.get("id") or path.rsplit("/", 1)[-1]}}
+
+        with self.lock:
+            self.misses.append(key)
+        return 404, {"errors": [{"status": "404", "title": "Not found", "detail": f"not recorded: {key}"}]}
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+import visual_diff
+
+
+def _font():
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", 13)
+    except OSError:
+        return ImageFont.load_default(size=13)
+
+
+def _render(text):
+    image = Image.new("RGB", (400, 100), "white")
+    ImageDraw.Draw(image).text((20, 40), text, fill="black", font=_font())
+    return image
+
+
+def _compare(tmp_path, monkeypatch, before, after):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "baselines").mkdir()
+    before.save(tmp_path / "baselines" / "shot.png")
+    after.save(tmp_path / "shot.png", compress_level=1)
+    return visual_diff.compare("shot.png", baseline_dir="baselines", diff_dir="diffs")
+
+
+@pytest.mark.parametrize("old, new", [("5", "6"), ("1", "7"), ("3", "8"), ("0", "9")])
+def test_one_glyph_change_fails(tmp_path, monkeypatch, old, new):
+    result = _compare(tmp_path, monkeypatch, _render(f"Count: {old}"), _render(f"Count: {new}"))
+    assert result["status"] == "failed"
+    assert result["different_pixels"] > 1
+
+
+def test_every_digit_swap_differs():
+    for old in range(10):
+        for new in range(old + 1, 10):
+            before = visual_diff._padded(np.asarray(_render(f"Count: {old}")))
+            after = visual_diff._padded(np.asarray(_render(f"Count: {new}")))
+            ty, tx = np.nonzero(visual_diff.tile_fingerprints(before) != visual_diff.tile_fingerprints(after))
+            different, _ = visual_diff.diff_tiles(before, after, ty, tx, visual_diff.DEFAULT_THRESHOLD)
+            assert different.sum() > 1, f"{old} -> {new}"
+
+
+def test_same_pixels_in_other_bytes_pass(tmp_path, monkeypatch):
+    image = _render("Count: 5")
+    result = _compare(tmp_path, monkeypatch, image, image)
+    assert result["status"] == "passed"
+    assert result["different_pixels"] == 0
@@ -1,8 +1,7 @@
 from playwright.sync_api import sync_playwright
 
-def run_cuj(page):
-    page.goto("http://localhost:5173") # Assuming vite default port
-    page.wait_for_timeout(2000)
+def run_cuj(page, url="http://localhost:5173"): # Assuming vite default port
+    page.goto(url)
 
     # Fill auth to bypass AuthOverlay
     page.get_by_placeholder("Application ID").fill("admin")
@@ -1,9 +1,9 @@
 from playwright.sync_api import Page, expect, sync_playwright
 import time
 
-def test_volunteer_web(page: Page):
+def test_volunteer_web(page: Page, url: str = "http://localhost:5173"):
     print("Navigating...")
-    page.goto("http://localhost:5173")
+    page.goto(url)
 
     # 1. Login
     print("Logging in...")
@@ -12,7 +12,7 @@ def test_volunteer_web(page: Page):
         page.fill('input[placeholder="Secret"]', "test")
         # Wait for API check
         print("Waiting for API check...")
-        time.sleep(3)
+        page.wait_for_selector(".auth-overlay", state="hidden", timeout=10000)
     except Exception as e:
         print(f"Login input failed: {e}")
 
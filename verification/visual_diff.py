@@ -0,0 +1,331 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Compares the screenshots the verification flows save against approved
+# baselines, so a UI regression fails a run instead of waiting to be noticed:
+#
+#   python verification/visual_diff.py            # after the flows have run
+#   python verification/visual_diff.py --update   # approve what changed
+#
+# Baselines mirror the screenshots' paths under verification/baselines, so
+# verification/volunteer_web.png is checked against
+# verification/baselines/verification/volunteer_web.png.
+#
+# Most screenshots do not change from run to run, and Chromium encodes the same
+# pixels to the same bytes, so files are compared before anything is decoded.
+# When they differ, both images are cut into TILE x TILE tiles and each tile is
+# fingerprinted in one vectorized pass; only tiles whose fingerprints differ are
+# looked at pixel by pixel. A typical change (one counter, one badge) touches a
+# handful of tiles out of a thousand.
+#
+# Within those tiles a pixel counts as different when its colour moved further
+# than --threshold in YIQ space, the perceptual distance pixelmatch uses. A
+# difference is put down to anti-aliasing instead when each image has the other's
+# colour within one pixel of it (an edge that landed a subpixel to one side), or
+# when the pixel sits on a gradient between a darker and a brighter neighbour in
+# either image, as smoothed edges do. That gradient only counts when the
+# darkest and the brightest neighbour are both inside solid areas in both
+# images, pixelmatch's sibling test: every glyph edge is a gradient too, and
+# without it a changed digit passes as anti-aliasing. Anti-aliased pixels are
+# drawn in the heatmap but do not fail the comparison.
+#
+# Screenshots are compared in a process pool, one per CPU by default.
+
+BASELINE_DIR = os.path.join("verification", "baselines")
+DIFF_DIR = os.path.join("verification", "diffs")
+
+# What the flows write, relative to the repository root. The verification_*
+# ones are alternatives: which one appears depends on the data the flow found.
+SCREENSHOTS = (
+    "verification_phone_fix.png",
+    "verification_no_phone_tab.png",
+    "verification_no_anomalies.png",
+    os.path.join("verification", "volunteer_web.png"),
+    os.path.join("verification", "family_audit_modal.png"),
+)
+
+TILE = 32
+# Padding around the image: a pixel's neighbours, and theirs for the sibling test.
+BORDER = 2
+DEFAULT_THRESHOLD = 0.1
+# The largest YIQ distance there is, between black and white.
+MAX_YIQ_DELTA = 35215.0
+# Fraction of pixels that may differ before a screenshot fails.
+DEFAULT_MAX_RATIO = 0.0
+
+FAILING = ("failed", "resized", "new", "missing")
+
+RGB_TO_YIQ = np.array([
+    [0.29889531, 0.59597799, 0.21147017],
+    [0.58662247, -0.27417610, -0.52261711],
+    [0.11448223, -0.32180189, 0.31114694],
+], dtype=np.float32)
+YIQ_WEIGHTS = np.array([0.5053, 0.299, 0.1957], dtype=np.float32)
+
+# One odd 64-bit multiplier per pixel position in a tile. A tile's fingerprint
+# is the wrapping sum of its packed pixels times these, so two tiles that differ
+# in a single pixel never share one.
+_WEIGHTS = (np.random.default_rng(0x10C05).integers(0, 2**63, size=(TILE, TILE), dtype=np.uint64)
+            | np.uint64(1))
+
+
+def load(data):
+    """A PNG's bytes as an (h, w, 3) uint8 array."""
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _padded(pixels):
+    """`pixels` zero-padded to whole tiles, with a BORDER of pixels on every side."""
+    h, w = pixels.shape[:2]
+    return np.pad(pixels, ((BORDER, -h % TILE + BORDER), (BORDER, -w % TILE + BORDER), (0, 0)))
+
+
+def tile_fingerprints(padded):
+    """(rows, cols) uint64: one fingerprint per tile of a `_padded` image."""
+    core = padded[BORDER:-BORDER, BORDER:-BORDER]
+    packed = (core[..., 0].astype(np.uint64) << np.uint64(16)) | (core[..., 1].astype(np.uint64) << np.uint64(8)) \
+        | core[..., 2].astype(np.uint64)
+    rows, cols = core.shape[0] // TILE, core.shape[1] // TILE
+    tiles = packed.reshape(rows, TILE, cols, TILE) * _WEIGHTS[None, :, None, :]
+    return tiles.sum(axis=(1, 3), dtype=np.uint64)
+
+
+def _tiles(padded, ty, tx):
+    """(n, TILE + 2 * BORDER, TILE + 2 * BORDER, 3): the tiles at (ty, tx), each with its border."""
+    rows = ty[:, None] * TILE + np.arange(TILE + 2 * BORDER)
+    cols = tx[:, None] * TILE + np.arange(TILE + 2 * BORDER)
+    return padded[rows[:, :, None], cols[:, None, :]]
+
+
+def _delta(a, b):
+    d = a - b
+    return (d * d) @ YIQ_WEIGHTS
+
+
+def _nearest(pixels, around):
+    """Per pixel of `pixels`, the smallest distance to any pixel in its 3x3 neighbourhood of `around`."""
+    size = around.shape[1] - 2
+    best = None
+    for dy in range(3):
+        for dx in range(3):
+            d = _delta(pixels, around[:, dy:dy + size, dx:dx + size])
+            best = d if best is None else np.minimum(best, d)
+    return best
+
+
+def _neighbours(array):
+    """(8, n, size, size, ...): each pixel's eight neighbours, for `array` of tiles with a one-pixel border."""
+    size = array.shape[1] - 2
+    return np.stack([array[:, dy:dy + size, dx:dx + size]
+                     for dy in range(3) for dx in range(3) if not dy == dx == 1])
+
+
+def _many_siblings(rgb):
+    """Per pixel of tiles with a one-pixel border, whether three or more neighbours are exactly its colour."""
+    core = rgb[:, 1:-1, 1:-1]
+    return ((_neighbours(rgb) == core).all(axis=-1).sum(axis=0)) >= 3
+
+
+def _on_edge(y, siblings, other_siblings):
+    """
+    Per pixel, whether it sits in a gradient the way an anti-aliased edge does
+    (pixelmatch's `antialiased`): a darker and a brighter neighbour, at most two
+    neighbours the same as it, and the darkest and brightest neighbours each
+    inside a solid area, three or more neighbours of their own colour, in both
+    images. A glyph's own edge fails the last test: its darkest neighbour is a
+    thin stroke, not a solid fill.
+
+    `y` is the luma of tiles with a one-pixel border; `siblings` and
+    `other_siblings` are `_many_siblings` of this and the other image, for the
+    same pixels.
+    """
+    core = y[:, 1:-1, 1:-1]
+    delta = _neighbours(y) - core
+    darkest, brightest = delta.argmin(axis=0)[None], delta.argmax(axis=0)[None]
+    gradient = (delta.min(axis=0) < 0) & (delta.max(axis=0) > 0) & ((delta == 0).sum(axis=0) <= 2)
+    solid = _neighbours(siblings) & _neighbours(other_siblings)
+    return (gradient & np.take_along_axis(solid, darkest, axis=0)[0]
+            & np.take_along_axis(solid, brightest, axis=0)[0])
+
+
+def diff_tiles(before, after, ty, tx, threshold):
+    """(different, anti-aliased) boolean masks, (n, TILE, TILE), for the given tiles."""
+    limit = MAX_YIQ_DELTA * threshold * threshold
+    a_rgb, b_rgb = _tiles(before, ty, tx), _tiles(after, ty, tx)
+    # With the outer ring of the border dropped: each pixel and its neighbours.
+    a = a_rgb[:, 1:-1, 1:-1].astype(np.float32) @ RGB_TO_YIQ
+    b = b_rgb[:, 1:-1, 1:-1].astype(np.float32) @ RGB_TO_YIQ
+    a_core, b_core = a[:, 1:-1, 1:-1], b[:, 1:-1, 1:-1]
+    changed = _delta(a_core, b_core) > limit
+    if not changed.any():
+        return changed, changed
+    a_siblings, b_siblings = _many_siblings(a_rgb), _many_siblings(b_rgb)
+    shifted = changed & ((_nearest(b_core, a) <= limit) & (_nearest(a_core, b) <= limit)
+                         | _on_edge(a[..., 0], a_siblings, b_siblings)
+                         | _on_edge(b[..., 0], b_siblings, a_siblings))
+    return changed & ~shifted, shifted
+
+
+def heatmap(after, ty, tx, different, aliased):
+    """The new screenshot faded to grey, with differences in red and anti-aliasing in yellow."""
+    h, w = after.shape[:2]
+    grey = after.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    faded = (255 - (255 - grey) * 0.1).astype(np.uint8)
+    canvas = np.repeat(faded[..., None], 3, axis=2)
+    canvas = np.pad(canvas, ((0, -h % TILE), (0, -w % TILE), (0, 0)))
+    for y, x, d, s in zip(ty, tx, different, aliased):
+        block = canvas[y * TILE:(y + 1) * TILE, x * TILE:(x + 1) * TILE]
+        block[s] = (255, 200, 0)
+        block[d] = (230, 0, 0)
+    return canvas[:h, :w]
+
+
+def _heatmap_path(diff_dir, name):
+    return os.path.join(diff_dir, os.path.splitext(name)[0] + ".diff.png")
+
+
+def compare(name, baseline_dir=BASELINE_DIR, diff_dir=DIFF_DIR, threshold=DEFAULT_THRESHOLD,
+            max_ratio=DEFAULT_MAX_RATIO):
+    """Compare one screenshot with its baseline: the result as a dict."""
+    started = time.perf_counter()
+    baseline = os.path.join(baseline_dir, name)
+    result = {"screenshot": name}
+    have_new, have_old = os.path.exists(name), os.path.exists(baseline)
+    if not have_old:
+        result["status"] = "new" if have_new else "absent"
+    elif not have_new:
+        result["status"] = "missing"
+    else:
+        with open(name, "rb") as f, open(baseline, "rb") as g:
+            new, old = f.read(), g.read()
+        if new == old:
+            result["status"] = "same"
+        else:
+            result.update(_compare_pixels(name, old, new, diff_dir, threshold, max_ratio))
+    stale = _heatmap_path(diff_dir, name)
+    if "heatmap" not in result and os.path.exists(stale):
+        os.remove(stale)
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def _compare_pixels(name, old, new, diff_dir, threshold, max_ratio):
+    before, after = load(old), load(new)
+    if before.shape != after.shape:
+        return {"status": "resized", "size": [before.shape[1], before.shape[0]],
+                "new_size": [after.shape[1], after.shape[0]]}
+
+    h, w = after.shape[:2]
+    before, after = _padded(before), _padded(after)
+    changed = tile_fingerprints(before) != tile_fingerprints(after)
+    ty, tx = np.nonzero(changed)
+    different, aliased = diff_tiles(before, after, ty, tx, threshold)
+    different_count = int(different.sum())
+    ratio = different_count / (h * w)
+    result = {
+        "status": "failed" if different_count and ratio > max_ratio else "passed",
+        "tiles": int(changed.size),
+        "changed_tiles": len(ty),
+        "different_pixels": different_count,
+        "anti_aliased_pixels": int(aliased.sum()),
+        "ratio": round(ratio, 6),
+    }
+    if different_count or result["anti_aliased_pixels"]:
+        path = _heatmap_path(diff_dir, name)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        Image.fromarray(heatmap(after[BORDER:h + BORDER, BORDER:w + BORDER], ty, tx, different, aliased)).save(path)
+        result["heatmap"] = path
+    return result
+
+
+def compare_all(names, baseline_dir=BASELINE_DIR, diff_dir=DIFF_DIR, threshold=DEFAULT_THRESHOLD,
+                max_ratio=DEFAULT_MAX_RATIO, workers=None):
+    """Results for every screenshot in `names`, in the same order."""
+    args = [(n, baseline_dir, diff_dir, threshold, max_ratio) for n in names]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(names) < 2:
+        return [compare(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=min(workers, len(names))) as pool:
+        return list(pool.map(compare, *zip(*args), chunksize=max(1, len(names) // (4 * workers))))
+
+
+def update(results, baseline_dir=BASELINE_DIR):
+    """Make every new or changed screenshot the baseline; drop baselines of missing ones."""
+    for r in results:
+        baseline = os.path.join(baseline_dir, r["screenshot"])
+        if r["status"] in ("failed", "resized", "new", "passed"):
+            os.makedirs(os.path.dirname(baseline) or ".", exist_ok=True)
+            shutil.copyfile(r["screenshot"], baseline)
+            r["status"] = "updated"
+        elif r["status"] == "missing":
+            os.remove(baseline)
+            r["status"] = "removed"
+
+
+def find_screenshots(paths):
+    """Every .png under `paths`, which may be files or directories."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".png"))
+        else:
+            found.append(path)
+    return [os.path.normpath(p) for p in found]
+
+
+def print_report(results, wall):
+    shown = [r for r in results if r["status"] != "absent"]
+    for r in shown:
+        line = f"{r['status'].upper():8s} {r['screenshot']}"
+        if "changed_tiles" in r:
+            line += (f"  {r['changed_tiles']}/{r['tiles']} tiles, {r['different_pixels']} px"
+                     f" ({r['ratio']:.4%}), {r['anti_aliased_pixels']} anti-aliased")
+        if "new_size" in r:
+            line += f"  {r['size'][0]}x{r['size'][1]} -> {r['new_size'][0]}x{r['new_size'][1]}"
+        if r.get("heatmap"):
+            line += f"  -> {r['heatmap']}"
+        print(line)
+    failing = sum(r["status"] in FAILING for r in shown)
+    print(f"\n{len(shown)} screenshots in {wall:.2f}s, {failing} failing")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare verification screenshots with their baselines.")
+    parser.add_argument("screenshots", nargs="*",
+                        help="screenshots or directories of them (default: the ones the flows save)")
+    parser.add_argument("--baselines", default=BASELINE_DIR, help="where the approved screenshots are kept")
+    parser.add_argument("--diffs", default=DIFF_DIR, help="where heatmaps are written")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="colour distance, 0 to 1, below which a pixel counts as unchanged")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="fraction of a screenshot's pixels that may differ before it fails")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: one per CPU)")
+    parser.add_argument("--update", action="store_true", help="accept the current screenshots as the baselines")
+    parser.add_argument("--output", help="write the per-screenshot results here as JSON")
+    args = parser.parse_args()
+
+    names = find_screenshots(args.screenshots) if args.screenshots else list(SCREENSHOTS)
+    started = time.perf_counter()
+    results = compare_all(names, args.baselines, args.diffs, args.threshold, args.max_ratio, args.workers)
+    if args.update:
+        update(results, args.baselines)
+    wall = time.perf_counter() - started
+
+    print_report(results, wall)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seconds": round(wall, 2), "screenshots": results}, f, indent=2)
+        print(f"Report saved to {args.output}")
+    sys.exit(1 if any(r["status"] in FAILING for r in results) else 0)
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from playwright.sync_api import sync_playwright
+
+from verification import visual_diff
+from verification.fixtures import Recorder, Replayer
+from verification.verify_automations import run_cuj
+from verification.verify_volunteer_web import test_volunteer_web
+from verification_script import run_verification
+from verify_screenshot import verify_screenshot
+
+# Every verification flow in one pass, sharing one browser and one mock API.
+#
+# Chromium is started once with a DevTools port. Playwright's sync API belongs
+# to the thread that started it, so each worker starts its own driver and
+# attaches to that browser over CDP; a new context there costs milliseconds
+# where a new browser costs seconds. Flows run side by side, so the pass takes
+# about as long as the slowest one.
+#
+# A warm-up login runs first and its storage state, IndexedDB included, seeds
+# every flow's context. That carries the API response cache and saved config,
+# so a flow's login is served from cache. The credentials themselves live only
+# in React state and are never stored, which is why the flows still type them.
+#
+# `--record FILE` saves every flow's API traffic as it runs; `--replay FILE`
+# then answers it from the file (see verification/fixtures.py) and the mock API
+# is not started at all. `--scale N` replays the recorded directory grown to N
+# people. `--visual` compares the screenshots the flows saved with their
+# baselines afterwards (see verification/visual_diff.py).
+
+APP_URL = "http://localhost:5173"
+MOCK_API_PORT = 3000
+APP_PORT = 5173
+DEVTOOLS_PORT = 9333
+
+# Each is called as flow(page, app_url).
+FLOWS = {
+    "run_verification": run_verification,
+    "verify_screenshot": verify_screenshot,
+    "run_cuj": run_cuj,
+    "test_volunteer_web": test_volunteer_web,
+}
+
+STARTUP_TIMEOUT = 60
+
+
+def _port_open(port):
+    with socket.socket() as s:
+        s.settimeout(0.5)
+        return s.connect_ex(("localhost", port)) == 0
+
+
+def _wait_for_port(port, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while not _port_open(port):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"Server for port {port} did not start")
+        time.sleep(0.2)
+
+
+def start_servers(mock_api=True):
+    """The mock API and the dev server, as playwright.config.ts starts them; reuses running ones."""
+    started = []
+    servers = [
+        (MOCK_API_PORT, ["node", "mock-api/server.js"], None),
+        (APP_PORT, ["npm", "run", "dev"], {"VITE_API_TARGET": f"http://localhost:{MOCK_API_PORT}"}),
+    ]
+    if not mock_api:
+        servers = servers[1:]
+    for port, command, env in servers:
+        if _port_open(port):
+            print(f"Reusing server on port {port}")
+            continue
+        print(f"Starting {' '.join(command)}")
+        process = subprocess.Popen(command, env={**os.environ, **(env or {})},
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+        started.append(process)
+        _wait_for_port(port, process)
+    return started
+
+
+def save_login_state(browser, url, path, routes=None):
+    """Log in once and keep what the app stored, for every flow's context to start from."""
+    context = browser.new_context()
+    if routes:
+        routes.attach(context)
+    try:
+        page = context.new_page()
+        page.goto(url)
+        page.fill("input[placeholder='Application ID']", "test")
+        page.fill("input[placeholder='Secret']", "test")
+        page.wait_for_selector(".recharts-surface", timeout=30000)
+        context.storage_state(path=path, indexed_db=True)
+    finally:
+        context.close()
+
+
+def run_flow(name, endpoint, url, state_path, routes=None):
+    """Run one flow in a fresh context on the shared browser: its result as a dict."""
+    result = {"flow": name, "thread": threading.current_thread().name}
+    started = time.perf_counter()
+    with sync_playwright() as p:
+        browser = p.chromium.connect_over_cdp(endpoint)
+        context = browser.new_context(storage_state=state_path, viewport={"width": 1280, "height": 800})
+        if routes:
+            routes.attach(context)
+        page = context.new_page()
+        try:
+            FLOWS[name](page, url)
+            result["status"] = "passed"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            context.close()
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def print_report(results, wall):
+    print()
+    for r in results:
+        line = f"{r['status'].upper():7s} {r['flow']:20s} {r['seconds']:6.1f}s"
+        if r.get("error"):
+            line += f"  {r['error']}"
+        print(line)
+    serial = sum(r["seconds"] for r in results)
+    print(f"\n{len(results)} flows in {wall:.1f}s ({serial:.1f}s if run one after another)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every verification flow on one shared browser.")
+    parser.add_argument("--url", default=APP_URL, help="the running app")
+    parser.add_argument("--workers", type=int, default=len(FLOWS), help="flows run at once")
+    parser.add_argument("--flow", action="append", choices=sorted(FLOWS),
+                        help="run only this flow; repeatable (default: all)")
+    parser.add_argument("--no-servers", action="store_true",
+                        help="do not start the mock API and dev server; expect them running")
+    parser.add_argument("--output", help="write the per-flow results here as JSON")
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument("--record", metavar="FILE", help="save the flows' API traffic as a fixture file")
+    fixtures.add_argument("--replay", metavar="FILE",
+                          help="answer API requests from a fixture file; the mock API is not started")
+    parser.add_argument("--scale", type=int, help="with --replay, grow the recorded directory to this many people")
+    parser.add_argument("--visual", action="store_true",
+                        help="compare the flows' screenshots with verification/baselines afterwards")
+    args = parser.parse_args()
+    names = args.flow or list(FLOWS)
+    if args.scale and not args.replay:
+        parser.error("--scale needs --replay")
+
+    routes = Recorder() if args.record else Replayer(args.replay, args.scale) if args.replay else None
+    servers = [] if args.no_servers else start_servers(mock_api=not args.replay)
+    started = time.perf_counter()
+    try:
+        with sync_playwright() as p, tempfile.TemporaryDirectory() as tmp:
+            browser = p.chromium.launch(headless=True, args=[f"--remote-debugging-port={DEVTOOLS_PORT}"])
+            try:
+                state_path = os.path.join(tmp, "state.json")
+                save_login_state(browser, args.url, state_path, routes)
+                endpoint = f"http://localhost:{DEVTOOLS_PORT}"
+                with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="flow") as pool:
+                    futures = [pool.submit(run_flow, name, endpoint, args.url, state_path, routes)
+                               for name in names]
+                    results = [f.result() for f in futures]
+            finally:
+                browser.close()
+    finally:
+        # `npm run dev` forks vite, so the whole process group goes.
+        for process in servers:
+            os.killpg(process.pid, signal.SIGTERM)
+    wall = time.perf_counter() - started
+
+    print_report(results, wall)
+    if args.record:
+        routes.save(args.record)
+        print(f"Recorded {len(routes.responses)} responses to {args.record}")
+    if args.replay and routes.misses:
+        print(f"{len(routes.misses)} request(s) not in {args.replay}, answered 404:")
+        for key in sorted(set(routes.misses)):
+            print(f"  {key}")
+    passed = all(r["status"] == "passed" for r in results)
+    report = {"seconds": round(wall, 2), "flows": results}
+    if args.visual:
+        print()
+        started = time.perf_counter()
+        screenshots = visual_diff.compare_all(list(visual_diff.SCREENSHOTS))
+        visual_diff.print_report(screenshots, time.perf_counter() - started)
+        passed = passed and not any(r["status"] in visual_diff.FAILING for r in screenshots)
+        report["screenshots"] = screenshots
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+    sys.exit(0 if passed else 1)
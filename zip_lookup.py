@@ -0,0 +1,392 @@
+# Generated by generate_area_codes.py; edit the script, not this file.
+#
+# The same ZIP-prefix tables as src/utils/areaCodes.ts and src/utils/zipCodes.ts,
+# for the Python batch tools. Slot = the ZIP's 3-digit prefix; value = 1 + an
+# index into the value tuple, or 0 for no mapping.
+
+AREA_CODES = (
+    '413',
+    '978',
+    '508',
+    '781',
+    '617',
+    '401',
+    '603',
+    '207',
+    '802',
+    '860',
+    '203',
+    '201',
+    '973',
+    '908',
+    '732',
+    '856',
+    '609',
+    '212',
+    '718',
+    '914',
+    '845',
+    '516',
+    '631',
+    '518',
+    '315',
+    '607',
+    '716',
+    '585',
+    '724',
+    '412',
+    '814',
+    '570',
+    '717',
+    '610',
+    '215',
+    '302',
+    '202',
+    '703',
+    '301',
+    '410',
+    '540',
+    '434',
+    '804',
+    '757',
+    '276',
+    '304',
+    '336',
+    '919',
+    '252',
+    '704',
+    '910',
+    '828',
+    '803',
+    '864',
+    '843',
+    '770',
+    '404',
+    '912',
+    '706',
+    '478',
+    '229',
+    '904',
+    '386',
+    '850',
+    '352',
+    '407',
+    '321',
+    '305',
+    '954',
+    '561',
+    '813',
+    '727',
+    '863',
+    '239',
+    '941',
+    '772',
+    '205',
+    '256',
+    '334',
+    '251',
+    '615',
+    '931',
+    '865',
+    '901',
+    '731',
+    '662',
+    '601',
+    '228',
+    '502',
+    '859',
+    '606',
+    '270',
+    '614',
+    '740',
+    '419',
+    '440',
+    '216',
+    '330',
+    '513',
+    '937',
+    '317',
+    '219',
+    '574',
+    '260',
+    '765',
+    '812',
+    '248',
+    '734',
+    '313',
+    '810',
+    '989',
+    '517',
+    '269',
+    '616',
+    '231',
+    '906',
+    '515',
+    '641',
+    '319',
+    '712',
+    '563',
+    '920',
+    '262',
+    '414',
+    '608',
+    '715',
+    '651',
+    '952',
+    '612',
+    '218',
+    '507',
+    '320',
+    '605',
+    '701',
+    '406',
+    '847',
+    '630',
+    '708',
+    '312',
+    '773',
+    '815',
+    '309',
+    '217',
+    '618',
+    '636',
+    '314',
+    '573',
+    '660',
+    '816',
+    '417',
+    '913',
+    '785',
+    '620',
+    '316',
+    '402',
+    '308',
+    '504',
+    '985',
+    '337',
+    '225',
+    '318',
+    '870',
+    '501',
+    '479',
+    '405',
+    '580',
+    '918',
+    '972',
+    '214',
+    '903',
+    '936',
+    '817',
+    '940',
+    '254',
+    '325',
+    '713',
+    '281',
+    '409',
+    '979',
+    '361',
+    '830',
+    '210',
+    '956',
+    '512',
+    '806',
+    '432',
+    '915',
+    '303',
+    '970',
+    '719',
+    '307',
+    '208',
+    '801',
+    '435',
+    '623',
+    '480',
+    '520',
+    '928',
+    '505',
+    '575',
+    '702',
+    '775',
+    '213',
+    '310',
+    '562',
+    '626',
+    '818',
+    '619',
+    '760',
+    '909',
+    '951',
+    '949',
+    '714',
+    '805',
+    '559',
+    '661',
+    '831',
+    '650',
+    '415',
+    '916',
+    '510',
+    '408',
+    '209',
+    '707',
+    '530',
+    '808',
+    '503',
+    '541',
+    '206',
+    '425',
+    '253',
+    '360',
+    '509',
+    '907',
+)
+
+AREA_CODE_SLOTS = (
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 3, 3, 3, 2, 2, 4, 5, 5, 3, 4,
+    3, 3, 3, 6, 6, 7, 7, 7, 7, 7, 7, 7, 7, 7, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8, 8,
+    9, 9, 9, 9, 9, 0, 9, 9, 9, 9, 10, 10, 10, 10, 11, 11, 11, 11, 11, 11, 12, 13, 14, 12, 13,
+    13, 12, 15, 13, 13, 16, 16, 17, 16, 17, 17, 17, 15, 15, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    18, 18, 18, 19, 19, 20, 20, 20, 20, 21, 22, 19, 19, 19, 19, 22, 19, 23, 22, 23, 24, 24, 24, 24, 21,
+    21, 21, 21, 24, 24, 25, 25, 25, 25, 25, 25, 25, 26, 26, 26, 27, 27, 27, 27, 28, 28, 28, 27, 26, 26,
+    29, 30, 30, 29, 29, 31, 29, 29, 31, 31, 29, 29, 31, 31, 31, 31, 31, 31, 31, 32, 33, 33, 33, 33, 33,
+    33, 33, 32, 32, 32, 34, 34, 32, 32, 32, 32, 32, 32, 32, 35, 34, 35, 35, 34, 34, 34, 34, 36, 36, 36,
+    37, 38, 37, 37, 37, 37, 39, 39, 39, 39, 40, 40, 40, 0, 40, 39, 40, 39, 40, 40, 38, 38, 38, 38, 41,
+    41, 41, 41, 41, 42, 43, 43, 43, 44, 44, 44, 44, 44, 43, 42, 41, 41, 45, 45, 41, 42, 45, 46, 46, 46,
+    46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 46, 0, 47, 47, 47, 47, 47,
+    48, 48, 48, 49, 49, 50, 50, 50, 51, 51, 51, 52, 52, 52, 52, 53, 53, 53, 54, 55, 55, 54, 53, 53, 55,
+    56, 56, 56, 57, 58, 59, 59, 59, 59, 59, 60, 60, 60, 58, 58, 58, 61, 61, 61, 61, 62, 63, 62, 64, 64,
+    64, 65, 66, 66, 67, 68, 68, 68, 69, 70, 71, 71, 72, 73, 74, 0, 74, 75, 0, 65, 0, 65, 66, 0, 76,
+    77, 77, 77, 0, 77, 77, 78, 78, 77, 78, 79, 79, 78, 79, 80, 80, 80, 79, 79, 77, 81, 81, 81, 82, 82,
+    0, 83, 83, 83, 83, 84, 84, 85, 85, 82, 82, 86, 86, 86, 86, 87, 87, 87, 87, 87, 88, 87, 86, 0, 0,
+    89, 89, 89, 90, 90, 90, 91, 91, 91, 91, 90, 91, 91, 91, 91, 91, 91, 91, 91, 0, 92, 92, 92, 92, 92,
+    91, 91, 92, 0, 0, 93, 93, 93, 94, 95, 95, 95, 94, 94, 94, 96, 97, 98, 98, 98, 98, 98, 98, 95, 95,
+    99, 100, 99, 100, 100, 100, 94, 94, 95, 0, 101, 101, 101, 102, 102, 103, 103, 104, 104, 105, 106, 106, 106, 105, 106,
+    106, 106, 106, 106, 105, 107, 108, 109, 107, 110, 110, 111, 111, 112, 112, 113, 113, 112, 114, 114, 114, 115, 115, 116, 116,
+    117, 117, 117, 117, 118, 117, 119, 119, 118, 0, 120, 120, 120, 120, 120, 120, 120, 0, 0, 0, 121, 121, 119, 119, 119,
+    118, 119, 121, 121, 0, 122, 123, 124, 0, 123, 125, 0, 125, 125, 125, 126, 122, 122, 122, 126, 126, 125, 126, 126, 122,
+    127, 127, 0, 128, 129, 0, 130, 130, 130, 131, 131, 131, 132, 132, 130, 130, 130, 130, 0, 0, 133, 133, 133, 133, 133,
+    133, 133, 133, 0, 0, 134, 134, 134, 134, 134, 134, 134, 134, 134, 0, 135, 135, 135, 135, 135, 135, 135, 135, 135, 135,
+    136, 137, 136, 138, 138, 137, 139, 140, 140, 141, 141, 141, 142, 141, 142, 142, 142, 142, 143, 143, 144, 0, 144, 143, 144,
+    143, 143, 143, 144, 144, 145, 146, 0, 145, 147, 148, 147, 147, 147, 147, 149, 149, 0, 0, 148, 148, 148, 148, 150, 0,
+    147, 147, 147, 148, 147, 147, 150, 150, 150, 0, 151, 151, 151, 0, 152, 152, 152, 153, 153, 152, 154, 154, 154, 153, 152,
+    152, 152, 152, 153, 153, 155, 155, 0, 155, 155, 155, 155, 155, 156, 156, 156, 156, 156, 156, 0, 0, 0, 0, 0, 0,
+    157, 157, 0, 158, 158, 159, 159, 160, 160, 0, 161, 161, 161, 161, 161, 0, 162, 162, 162, 163, 163, 163, 163, 162, 162,
+    162, 162, 164, 164, 164, 165, 165, 0, 0, 166, 166, 166, 166, 166, 166, 167, 167, 0, 167, 167, 167, 166, 166, 165, 167,
+    168, 168, 169, 169, 168, 170, 170, 170, 170, 171, 172, 172, 173, 173, 174, 174, 174, 174, 175, 175, 176, 0, 176, 177, 177,
+    178, 178, 178, 179, 180, 181, 181, 182, 180, 180, 183, 184, 184, 181, 179, 185, 185, 185, 185, 185, 175, 175, 186, 186, 187,
+    188, 188, 188, 188, 189, 189, 189, 189, 190, 190, 190, 190, 190, 189, 189, 189, 189, 0, 0, 0, 191, 191, 191, 191, 191,
+    191, 191, 191, 191, 191, 191, 191, 192, 192, 192, 192, 192, 192, 192, 0, 193, 193, 0, 194, 193, 194, 193, 194, 0, 0,
+    195, 0, 196, 195, 0, 197, 197, 197, 0, 198, 198, 0, 0, 198, 198, 198, 0, 0, 0, 0, 199, 199, 0, 199, 199,
+    199, 0, 200, 200, 200, 200, 200, 200, 200, 200, 0, 0, 0, 0, 201, 201, 201, 0, 202, 202, 202, 0, 202, 202, 0,
+    203, 0, 204, 204, 204, 205, 205, 205, 205, 0, 206, 206, 207, 207, 207, 207, 207, 206, 206, 208, 209, 208, 209, 210, 210,
+    211, 212, 213, 213, 0, 214, 214, 215, 216, 214, 216, 215, 215, 215, 217, 218, 219, 220, 218, 218, 221, 221, 221, 221, 219,
+    222, 222, 223, 223, 224, 224, 220, 220, 220, 225, 225, 225, 0, 0, 0, 0, 0, 226, 226, 0, 227, 227, 227, 227, 228,
+    228, 228, 228, 228, 228, 229, 229, 230, 231, 231, 232, 232, 0, 233, 233, 233, 233, 233, 233, 233, 234, 234, 234, 234, 234,
+)
+
+PLACES = (
+    ('Boston', 'MA'),
+    ('New York', 'NY'),
+    ('Philadelphia', 'PA'),
+    ('Washington', 'DC'),
+    ('Baltimore', 'MD'),
+    ('Charlotte', 'NC'),
+    ('Atlanta', 'GA'),
+    ('Jacksonville', 'FL'),
+    ('Miami', 'FL'),
+    ('Nashville', 'TN'),
+    ('Memphis', 'TN'),
+    ('Louisville', 'KY'),
+    ('Columbus', 'OH'),
+    ('Indianapolis', 'IN'),
+    ('Detroit', 'MI'),
+    ('Milwaukee', 'WI'),
+    ('Chicago', 'IL'),
+    ('Kansas City', 'MO'),
+    ('Dallas', 'TX'),
+    ('Fort Worth', 'TX'),
+    ('Houston', 'TX'),
+    ('San Antonio', 'TX'),
+    ('Austin', 'TX'),
+    ('Denver', 'CO'),
+    ('Phoenix', 'AZ'),
+    ('Las Vegas', 'NV'),
+    ('Los Angeles', 'CA'),
+    ('San Diego', 'CA'),
+    ('San Francisco', 'CA'),
+    ('San Jose', 'CA'),
+    ('Portland', 'OR'),
+    ('Seattle', 'WA'),
+)
+
+PLACE_SLOTS = (
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, 0,
+    4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 5, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 6, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 7, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0,
+    0, 0, 0, 0, 0, 0, 9, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0,
+    0, 0, 0, 0, 0, 0, 11, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 12, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 13, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 14, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 16, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 18, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 19, 0, 0, 0, 0, 0, 0, 0, 0, 20, 0, 0, 0, 0, 0, 0, 0, 0, 21, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 22, 0, 0, 0, 0, 23, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 24, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    25, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 26, 0, 0, 0, 0, 0, 0, 0, 0,
+    27, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 28, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 29, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 30, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 31, 0, 0,
+    0, 0, 0, 0, 0, 0, 32, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+)
+
+
+def zip_prefix_slot(zip_code):
+    """The slot for a ZIP's 3-digit prefix, or -1 when it does not start with three digits."""
+    prefix = zip_code[:3]
+    if len(prefix) != 3 or not prefix.isascii() or not prefix.isdigit():
+        return -1
+    return int(prefix)
+
+
+def area_code_from_zip(zip_code):
+    if not zip_code or len(zip_code) < 3:
+        return None
+    slot = zip_prefix_slot(zip_code)
+    if slot < 0:
+        return None
+    entry = AREA_CODE_SLOTS[slot]
+    return AREA_CODES[entry - 1] if entry else None
+
+
+def enrich_zip_code(zip_code):
+    """(city, state) for a ZIP's prefix, or None."""
+    if not zip_code or len(zip_code) < 3:
+        return None
+    slot = zip_prefix_slot(zip_code)
+    if slot < 0:
+        return None
+    entry = PLACE_SLOTS[slot]
+    return PLACES[entry - 1] if entry else None